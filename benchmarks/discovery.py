@@ -0,0 +1,119 @@
+"""Count the filesystem calls test discovery makes.
+
+Builds a synthetic project of packages, test packages and directories of
+non-Python files, discovers its tests the way ``nose2`` does, and reports
+how many times ``os.stat``, ``os.listdir`` and ``os.scandir`` were called,
+and how long discovery took. Imports of the test modules are not counted.
+Discovery then runs twice more with a discovery cache, as in a watch loop:
+once to fill the cache and once to use it. Run with::
+
+  python benchmarks/discovery.py [number of packages]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from nose2 import events, loader, session
+from nose2.plugins.loader.discovery import DiscoveryCache, DiscoveryLoader
+from nose2.plugins.loader.testcases import TestCaseLoader
+
+TEST_MODULE = """\
+import unittest
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        pass
+"""
+
+
+def make_tree(root, packages):
+    for i in range(packages):
+        pkg = os.path.join(root, "src", f"pkg{i}")
+        tests = os.path.join(root, "tests", f"test_pkg{i}")
+        assets = os.path.join(pkg, "assets", "images")
+        for path in (pkg, tests, assets):
+            os.makedirs(path)
+        for path in (pkg, tests):
+            open(os.path.join(path, "__init__.py"), "w").close()
+        for j in range(10):
+            open(os.path.join(pkg, f"module{j}.py"), "w").close()
+            with open(os.path.join(tests, f"test_module{i}_{j}.py"), "w") as fh:
+                fh.write(TEST_MODULE)
+            open(os.path.join(assets, f"image{j}.png"), "w").close()
+            open(os.path.join(pkg, "assets", f"data{j}.json"), "w").close()
+    open(os.path.join(root, "tests", "__init__.py"), "w").close()
+    # an existing checkout, not one that is being written to
+    past = time.time() - 3600
+    for path, _, _ in os.walk(root):
+        os.utime(path, (past, past))
+
+
+def discover(root, cache_file=None):
+    ssn = session.Session()
+    ssn.startDir = root
+    plugin = DiscoveryLoader(session=ssn)
+    TestCaseLoader(session=ssn)
+    if cache_file:
+        plugin._cache = DiscoveryCache(cache_file)
+    event = events.LoadFromNamesEvent(loader.PluggableTestLoader(ssn), [], None)
+    calls = Counter()
+    originals = {name: getattr(os, name) for name in ("stat", "listdir", "scandir")}
+
+    def counting(name):
+        def call(*args, **kwargs):
+            if not importing:
+                calls[name] += 1
+            return originals[name](*args, **kwargs)
+
+        return call
+
+    importing = False
+    real_import = __import__
+
+    def counting_import(*args, **kwargs):
+        nonlocal importing
+        importing, was = True, importing
+        try:
+            return real_import(*args, **kwargs)
+        finally:
+            importing = was
+
+    for name in originals:
+        setattr(os, name, counting(name))
+    builtins = sys.modules["builtins"]
+    builtins.__import__ = counting_import
+    started = time.perf_counter()
+    try:
+        suite = ssn.hooks.loadTestsFromNames(event)
+    finally:
+        elapsed = time.perf_counter() - started
+        builtins.__import__ = real_import
+        for name, original in originals.items():
+            setattr(os, name, original)
+    return suite.countTestCases(), calls, elapsed
+
+
+def main(packages=100):
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as tmp:
+        make_tree(root, packages)
+        files = sum(len(names) for _, _, names in os.walk(root))
+        cache_file = os.path.join(tmp, "discovery.json")
+        runs = [
+            ("no cache", discover(root)),
+            ("cold cache", discover(root, cache_file)),
+            ("warm cache", discover(root, cache_file)),
+        ]
+    print(f"{packages} packages, {files} files")
+    for label, (count, calls, elapsed) in runs:
+        counts = ", ".join(
+            f"{calls[name]:5d} {name}" for name in ("stat", "listdir", "scandir")
+        )
+        print(f"{label:>10}: {counts}, {count} tests, {elapsed * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
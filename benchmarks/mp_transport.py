@@ -0,0 +1,84 @@
+"""Compare the mp plugin's result transports.
+
+A worker process sends the encoded results of batches of passing tests to
+the main process, through the pipe or through a shared memory ring buffer,
+and the main process receives and decodes them the way it does during a
+test run. The main process's CPU time is what limits how many workers it
+can keep up with. Run with::
+
+  python benchmarks/mp_transport.py [number of tests] [batch size]
+"""
+
+import multiprocessing
+import sys
+import time
+
+from mp_wire import make_case, make_results
+
+from nose2.plugins import mp
+
+
+def worker(conn, ring, messages):
+    if ring is not None:
+        conn = mp._RingConnection(conn, mp._ResultRing.attach(ring))
+    conn.recv()
+    for data in messages:
+        conn.send(data)
+    conn.send(None)
+    conn.close()
+
+
+def run(transport, messages):
+    parent, child = multiprocessing.Pipe()
+    ring = None
+    if transport == "shared-memory":
+        ring = mp._ResultRing.create(4 * 2**20)
+        parent = mp._RingConnection(parent, ring)
+    proc = multiprocessing.get_context("fork").Process(
+        target=worker, args=(child, ring and ring.name, messages)
+    )
+    proc.start()
+    child.close()
+    started = time.perf_counter()
+    cpu = time.process_time()
+    parent.send("go")
+    count = 0
+    while True:
+        message = parent.recv()
+        if message is None:
+            break
+        if isinstance(message, bytes):
+            message = mp._decodeResults(message)
+        count += len(message)
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu
+    parent.close()
+    proc.join()
+    return count, elapsed, cpu
+
+
+def main(count=10000, batch=32):
+    case = make_case(count)
+    tests = [case(f"test_{i}") for i in range(count)]
+    results = make_results(tests)
+    messages = [
+        mp._encodeResults(results[i : i + batch]) for i in range(0, count, batch)
+    ]
+    print(f"{count} passing tests in batches of {batch}, best of 5")
+    for transport in ("pipe", "shared-memory"):
+        times = []
+        for _ in range(5):
+            received, elapsed, cpu = run(transport, messages)
+            assert received == count, received
+            times.append((elapsed, cpu))
+        elapsed = min(elapsed for elapsed, _ in times)
+        cpu = min(cpu for _, cpu in times)
+        print(
+            f"{transport:>14}: {elapsed * 1000:7.2f} ms, "
+            f"main process CPU {cpu * 1000:7.2f} ms, "
+            f"{count / cpu:8.0f} results per CPU second"
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
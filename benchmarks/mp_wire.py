@@ -0,0 +1,79 @@
+"""Compare the mp plugin's result wire formats.
+
+Encodes the results of a batch of passing tests the way a worker process
+does, both as pickled event lists and in the compact format, and decodes
+and localizes them the way the main process does. Run with::
+
+  python benchmarks/mp_wire.py [number of tests]
+"""
+
+import pickle
+import sys
+import time
+import timeit
+import unittest
+
+from nose2 import events, result, session, util
+from nose2.plugins import mp
+
+
+def make_case(count):
+    attrs = {f"test_{i}": lambda self: None for i in range(count)}
+    return type("Bench", (unittest.TestCase,), attrs)
+
+
+def make_results(tests):
+    results = []
+    for test in tests:
+        now = time.time()
+        outcome = events.TestOutcomeEvent(test, None, result.PASS, expected=True)
+        results.append(
+            (
+                util.test_name(test),
+                [
+                    ("startTest", events.StartTestEvent(test, None, now)),
+                    ("setTestOutcome", outcome),
+                    ("testOutcome", outcome),
+                    ("stopTest", events.StopTestEvent(test, None, now)),
+                ],
+            )
+        )
+    return results
+
+
+def main(count=1000):
+    case = make_case(count)
+    tests = [case(f"test_{i}") for i in range(count)]
+    plugin = mp.MultiProcess(session=session.Session())
+    plugin.cases = {util.test_name(test): test for test in tests}
+    results = make_results(tests)
+
+    def localize(decoded):
+        for _, unit_events in decoded:
+            for _, event in unit_events:
+                plugin._localize(event)
+
+    formats = {
+        "pickle": (
+            lambda: pickle.dumps(results),
+            lambda data: localize(pickle.loads(data)),
+        ),
+        "compact": (
+            lambda: pickle.dumps(mp._encodeResults(results)),
+            lambda data: localize(mp._decodeResults(pickle.loads(data))),
+        ),
+    }
+    print(f"{count} passing tests, best of 5")
+    for name, (encode, decode) in formats.items():
+        data = encode()
+        enc = min(timeit.repeat(encode, number=1, repeat=5))
+        dec = min(timeit.repeat(lambda: decode(data), number=1, repeat=5))
+        print(
+            f"{name:>8}: {len(data):>8} bytes, "
+            f"worker encode {enc * 1000:7.2f} ms, "
+            f"main decode+localize {dec * 1000:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
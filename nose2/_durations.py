@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import logging
+import statistics
+import time
+
+log = logging.getLogger(__name__)
+
+
+class Durations:
+    """Test and fixture group durations, saved between test runs.
+
+    The durations file is a JSON document that maps test ids and fixture
+    group ids (test class or module names) to ``[seconds, timestamp]``
+    pairs, where ``timestamp`` records when the duration was measured.
+    Entries of tests that do not run are kept, so running a subset of
+    the suite does not forget the durations of the rest.
+
+    :param path: The durations file. If empty, nothing is loaded or saved.
+
+    """
+
+    version = 1
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.tests: dict[str, list[float]] = {}
+        self.groups: dict[str, list[float]] = {}
+        self._loaded = False
+        self._median: float | None = None
+
+    def load(self):
+        """Load durations from the durations file, once"""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            log.debug("No durations loaded from %s", self.path)
+            return
+        if data.get("version") != self.version:
+            log.warning("Ignoring durations file %s: unknown version", self.path)
+            return
+        # measurements taken during this run win over the loaded ones
+        self.tests = {**data.get("tests", {}), **self.tests}
+        self.groups = {**data.get("groups", {}), **self.groups}
+        self._median = None
+
+    def save(self):
+        """Write durations to the durations file"""
+        self.load()
+        data = {"version": self.version, "tests": self.tests, "groups": self.groups}
+        try:
+            with open(self.path, "w") as fh:
+                json.dump(data, fh, indent=0, sort_keys=True)
+        except OSError:
+            log.exception("Unable to write durations file %s", self.path)
+
+    def record(self, testid, duration):
+        """Record the duration of one test"""
+        self.tests[testid] = [duration, time.time()]
+        self._median = None
+
+    def recordGroup(self, groupid, duration):
+        """Record the duration of a fixture group"""
+        self.groups[groupid] = [duration, time.time()]
+
+    def estimate(self, unit, tests):
+        """Estimate how long ``unit``, made up of ``tests``, will take.
+
+        Tests without a recorded duration are assumed to take the median
+        duration of the tests that have one.
+        """
+        if unit in self.groups:
+            return self.groups[unit][0]
+        known = [self.tests[test][0] for test in tests if test in self.tests]
+        if self._median is None:
+            durations = [duration for duration, _ in self.tests.values()]
+            self._median = statistics.median(durations) if durations else 0.0
+        return sum(known) + self._median * (len(tests) - len(known))
@@ -11,3 +11,11 @@ class TestNotFoundError(Exception):
 
 class LoadTestsFailure(Exception):
     """Raised when a test cannot be loaded"""
+
+
+class WorkerCrashError(Exception):
+    """Reported for a test that was lost when its worker process exited"""
+
+
+class TestTimeoutError(Exception):
+    """Reported for a test that ran longer than its timeout"""
@@ -9,6 +9,7 @@ import traceback
 import unittest
 
 from nose2 import events
+from nose2.suite import StreamingSuite
 
 log = logging.getLogger(__name__)
 __unittest = True
@@ -66,6 +67,9 @@ class PluggableTestLoader:
                 suites = self.loadTestsFromModule(module)
             else:
                 suites = []
+        if isinstance(suites, StreamingSuite) and not event.extraTests:
+            # tests are loaded as they run: don't load them all here
+            return suites
         if event.extraTests:
             suites.extend(event.extraTests)
         return self.suiteClass(suites)
@@ -14,4 +14,5 @@ DEFAULT_PLUGINS = (
     "nose2.plugins.failfast",
     "nose2.plugins.debugger",
     "nose2.plugins.prettyassert",
+    "nose2.plugins.fixtures",
 )
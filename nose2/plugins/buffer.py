@@ -12,13 +12,18 @@ sys.stderr into buffers, attaching the buffered output to test error
 report detail, and getting out of the way when other plugins want to
 talk to the user.
 
+When tests run in the threads of the threads plugin, each thread gets its
+own buffers, and :func:`stopTestRun` puts the real streams back at the end
+of the test run.
+
 """
 
 import io
 import sys
+import threading
 
 from nose2 import events
-from nose2.util import ln
+from nose2.util import in_worker_thread, ln
 
 __unittest = True
 
@@ -50,6 +55,31 @@ class _Buffer:
         return repr(self._buffer.getvalue())
 
 
+class _ThreadStreams:
+    """Stand-in for sys.stdout or sys.stderr while tests run in threads.
+
+    Output goes to the buffer of the current thread, if it has one, and to
+    the real stream otherwise.
+    """
+
+    def __init__(self, stream) -> None:
+        self._stream = stream
+        self._local = threading.local()
+
+    def setBuffer(self, buffer):
+        self._local.buffer = buffer
+
+    def _target(self):
+        buffer = getattr(self._local, "buffer", None)
+        return self._stream if buffer is None else buffer
+
+    def write(self, data):
+        return self._target().write(data)
+
+    def __getattr__(self, attr):
+        return getattr(self._target(), attr)
+
+
 class OutputBufferPlugin(events.Plugin):
     """Buffer output during test execution"""
 
@@ -57,9 +87,12 @@ class OutputBufferPlugin(events.Plugin):
     configSection = "output-buffer"
 
     def __init__(self) -> None:
+        # buffers of the tests running in the threads plugin's threads
+        self._local = threading.local()
+        self._lock = threading.Lock()
         self.captureStdout = self.config.as_bool("stdout", default=True)
         self.captureStderr = self.config.as_bool("stderr", default=False)
-        self.bufStdout = self.bufStderr = None
+        self._bufStdout = self._bufStderr = None
         self.realStdout = sys.__stdout__
         self.realStderr = sys.__stderr__
         self._disable = False
@@ -73,6 +106,32 @@ class OutputBufferPlugin(events.Plugin):
         self.realStdout = sys.__stdout__
         self.realStderr = sys.__stderr__
 
+    @property
+    def bufStdout(self):
+        if in_worker_thread():
+            return getattr(self._local, "stdout", None)
+        return self._bufStdout
+
+    @bufStdout.setter
+    def bufStdout(self, buffer):
+        if in_worker_thread():
+            self._local.stdout = buffer
+        else:
+            self._bufStdout = buffer
+
+    @property
+    def bufStderr(self):
+        if in_worker_thread():
+            return getattr(self._local, "stderr", None)
+        return self._bufStderr
+
+    @bufStderr.setter
+    def bufStderr(self, buffer):
+        if in_worker_thread():
+            self._local.stderr = buffer
+        else:
+            self._bufStderr = buffer
+
     def startTest(self, event):
         """Start buffering selected stream(s)"""
         self._buffer()
@@ -123,9 +182,19 @@ class OutputBufferPlugin(events.Plugin):
     def stopSubprocess(self, event):
         self._restore()
 
+    def stopTestRun(self, event):
+        """Put back streams replaced for tests run in threads"""
+        for name in ("stdout", "stderr"):
+            stream = getattr(sys, name)
+            if isinstance(stream, _ThreadStreams):
+                setattr(sys, name, stream._stream)
+
     def _restore(self):
         if self._disable:
             return
+        if in_worker_thread():
+            self._route(None, None)
+            return
         if self.captureStdout:
             sys.stdout = self.realStdout
         if self.captureStderr:
@@ -137,8 +206,29 @@ class OutputBufferPlugin(events.Plugin):
         if self.captureStdout:
             if fresh or self.bufStdout is None:
                 self.bufStdout = _Buffer(sys.stdout)
-            sys.stdout = self.bufStdout
         if self.captureStderr:
             if fresh or self.bufStderr is None:
                 self.bufStderr = _Buffer(sys.stderr)
+        if in_worker_thread():
+            self._route(self.bufStdout, self.bufStderr)
+            return
+        if self.captureStdout:
+            sys.stdout = self.bufStdout
+        if self.captureStderr:
             sys.stderr = self.bufStderr
+
+    def _route(self, stdout, stderr):
+        # other threads are running tests too: keep a stand-in for each
+        # stream that sends output to the buffer of the current thread
+        for name, capture, buffer in (
+            ("stdout", self.captureStdout, stdout),
+            ("stderr", self.captureStderr, stderr),
+        ):
+            if not capture:
+                continue
+            with self._lock:
+                stream = getattr(sys, name)
+                if not isinstance(stream, _ThreadStreams):
+                    stream = _ThreadStreams(stream)
+                    setattr(sys, name, stream)
+            stream.setBuffer(buffer)
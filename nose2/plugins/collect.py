@@ -3,14 +3,114 @@ This plugin implements :func:`startTestRun`, setting a test executor
 (``event.executeTests``) that just collects tests without executing
 them. To do so it calls result.startTest, result.addSuccess and
 result.stopTest for each test, without calling the test itself.
+
+Static Collection
+-----------------
+
+Collecting tests still imports every test module, which can take a long
+time for test modules with heavy dependencies. With
+:option:`--collect-static`, or ``static = True`` in the ``[collect-only]``
+section of a config file, test discovery reads test modules with
+:mod:`ast` instead of importing them, and finds the tests that the
+default test loaders would load from them:
+
+* test methods of :class:`unittest.TestCase` subclasses,
+* test functions,
+* test methods of test classes, and
+* tests parameterized with :func:`nose2.tools.params`, when all of its
+  arguments are literals.
+
+Modules that have to be imported to know their tests are imported as
+usual. These include modules with ``load_tests`` functions, generator
+tests, ``__test__`` or ``layer`` attributes, test classes whose base
+classes are imported from other modules, decorators on tests other than
+:func:`nose2.tools.params` and those of :mod:`unittest` and
+:mod:`unittest.mock`, and imports of names that contain the test method
+prefix. Packages are imported, and so are test modules named on the
+command line.
+
+Tests that are found statically are listed by their test ids. Static
+collection is only used with the default test loaders: with other plugins
+that load or select tests, like the :doc:`attrib plugin <attrib>` or the
+:doc:`mp plugin <mp>`, test modules are imported and a warning is
+logged.
+
+Test Manifest
+-------------
+
+With :option:`--collect-manifest` ``FILE``, or ``manifest = FILE`` in the
+``[collect-only]`` section of a config file, the ids of the collected
+tests and the names of their fixture groups are written to ``FILE`` as
+JSON::
+
+  {
+  "tests": [
+  {
+  "group": null,
+  "id": "tests.test_things.TestThings.test_one"
+  },
+  ...
+  ],
+  "version": 1
+  }
+
+Together with the :doc:`shard plugin <shard>`, this lists the tests of
+one shard of the test suite, which can then be passed to nose2 by name::
+
+  nose2 --collect-only --collect-static --shard 2/4 --collect-manifest s2.json
+
 """
 
+from __future__ import annotations
+
+import ast
+import json
+import logging
+import os
 import unittest
+from fnmatch import fnmatch
 
+from nose2 import util
 from nose2.events import Plugin
+from nose2.plugins import dundertest, layers, logcapture, shard
+from nose2.plugins.loader import (
+    functions,
+    generators,
+    loadtests,
+    parameters,
+    testcases,
+    testclasses,
+)
 
+log = logging.getLogger(__name__)
 __unittest = True
 
+# hooks of plugins that load, select or run tests: static collection is
+# only used if the plugins on them are ones it knows about
+_LOADING_HOOKS = (
+    "handleFile",
+    "matchPath",
+    "loadTestsFromModule",
+    "loadTestsFromTestCase",
+    "loadTestsFromTestClass",
+    "getTestCaseNames",
+    "getTestMethodNames",
+    "moduleLoadedSuite",
+    "startTestRun",
+)
+_KNOWN_PLUGINS = (
+    testcases.TestCaseLoader,
+    functions.Functions,
+    testclasses.TestClassLoader,
+    generators.Generators,
+    parameters.Parameters,
+    loadtests.LoadTestsLoader,
+    dundertest.DunderTestFilter,
+    layers.Layers,
+    logcapture.LogCapture,
+    shard.Shard,
+)
+
 
 class CollectOnly(Plugin):
     """Collect but don't run tests"""
@@ -23,10 +123,41 @@ class CollectOnly(Plugin):
     )
     _mpmode = False
 
+    def __init__(self) -> None:
+        self.static = self.config.as_bool("static", False)
+        self.manifest = self.config.as_str("manifest", "")
+        self.addFlag(
+            self.setStatic,
+            None,
+            "collect-static",
+            "Collect tests by reading test modules, without importing them",
+        )
+        self.addArgument(
+            self.setManifest,
+            None,
+            "collect-manifest",
+            "Write the ids of collected tests to FILE as JSON",
+        )
+        self._tests: list[dict] = []
+
+    def setStatic(self, *_):
+        self.static = True
+        self._register_cb()
+
+    def setManifest(self, path):
+        self.manifest = path[0]
+        self._register_cb()
+
     def registerInSubprocess(self, event):
         event.pluginClasses.append(self.__class__)
         self._mpmode = True
 
+    def createTests(self, event):
+        """Read test modules instead of importing them, with ``static``"""
+        if self.static and self._canCollectStatically():
+            collector = _StaticCollector(self.session.testMethodPrefix)
+            self.session.hooks.register("handleFile", collector)
+
     def startTestRun(self, event):
         """Replace ``event.executeTests``"""
         if self._mpmode:
@@ -36,6 +167,30 @@ class CollectOnly(Plugin):
     def startSubprocess(self, event):
         event.executeTests = self.collectTests
 
+    def startTest(self, event):
+        """Record the test for the manifest"""
+        if self.manifest:
+            self._tests.append(
+                {
+                    "id": util.test_name(event.test),
+                    "group": util.fixture_group(event.test),
+                }
+            )
+
+    def stopTestRun(self, event):
+        """Write the manifest"""
+        if not self.manifest:
+            return
+        path = self.manifest
+        if not os.path.isabs(path):
+            path = os.path.join(os.getcwd(), path)
+        data = {"version": 1, "tests": self._tests}
+        try:
+            with open(path, "w") as fh:
+                json.dump(data, fh, indent=0, sort_keys=True)
+        except OSError:
+            log.exception("Unable to write test manifest %s", path)
+
     def collectTests(self, suite, result):
         """Collect tests, but don't run them"""
         for test in suite:
@@ -45,3 +200,464 @@ class CollectOnly(Plugin):
             result.startTest(test)
             result.addSuccess(test)
             result.stopTest(test)
+
+    def _canCollectStatically(self):
+        for method in _LOADING_HOOKS:
+            for plugin in getattr(self.session.hooks, method).plugins:
+                if plugin is self or isinstance(plugin, _KNOWN_PLUGINS):
+                    continue
+                log.warning(
+                    "Collecting tests by importing them: %s uses %s",
+                    plugin.__class__.__name__,
+                    method,
+                )
+                return False
+        return True
+
+
+class _StaticCollector:
+    """Find the tests of test modules without importing them.
+
+    Registered for :func:`handleFile`, it reads each file that matches
+    the test file pattern, and loads stand-ins for its tests if
+    :class:`_ModuleReader` can find them all.
+    """
+
+    def __init__(self, prefix) -> None:
+        self.prefix = prefix
+
+    def handleFile(self, event):
+        if not util.valid_module_name(event.name) or not fnmatch(
+            event.name, event.pattern
+        ):
+            return
+        try:
+            with open(event.path, "rb") as fh:
+                tree = ast.parse(fh.read(), event.path)
+        except (OSError, SyntaxError, ValueError):
+            # importing the module reports the error
+            return
+        name, package_path = util.name_from_path(event.path)
+        try:
+            found = _ModuleReader(name, self.prefix).read(tree)
+        except _NeedsImport as exc:
+            log.debug("Importing %s to collect its tests: %s", name, exc)
+            return
+        util.ensure_importable(package_path)
+        cls = util.transplant_class(_StaticTest, name)
+        event.handled = True
+        return event.loader.suiteClass(
+            cls(testid, group, doc) for testid, group, doc in found
+        )
+
+
+class _NeedsImport(Exception):
+    """A module has to be imported to find its tests"""
+
+
+# names that resolve to these are unittest's test case classes
+_TEST_CASES = {
+    "unittest.TestCase",
+    "unittest.case.TestCase",
+    "unittest.IsolatedAsyncioTestCase",
+    "unittest.async_case.IsolatedAsyncioTestCase",
+}
+_PARAMS = {"nose2.tools.params", "nose2.tools.params.params"}
+# decorators that leave the tests they decorate as they are
+_PLAIN_DECORATORS = {
+    f"{module}.{name}"
+    for module in ("unittest", "unittest.case")
+    for name in ("skip", "skipIf", "skipUnless", "expectedFailure")
+} | {
+    f"{module}.patch{suffix}"
+    for module in ("unittest.mock", "mock")
+    for suffix in ("", ".object", ".dict", ".multiple")
+}
+# builtins that change what a module or class contains when it's loaded
+_DYNAMIC_CALLS = {"exec", "eval", "globals", "locals", "setattr", "vars"}
+# attributes that the default plugins read from tests
+_TEST_ATTRS = {"__test__", "layer", "paramList", "sortTestMethodsUsing"}
+_CLASS_FIXTURES = ("setUpClass", "tearDownClass")
+
+
+class _Function:
+    def __init__(self, node, params) -> None:
+        self.name = node.name
+        self.params = params
+        self.nargs = len(node.args.posonlyargs) + len(node.args.args)
+        self.decorated = len(node.decorator_list) > (params is not None)
+        self.doc = _firstLine(ast.get_docstring(node))
+
+
+class _Class:
+    def __init__(self, name) -> None:
+        self.name = name
+        self.isCase = False
+        # test methods by name, inherited ones included
+        self.members: dict[str, _Function] = {}
+        self.fixtures = False
+        self.runTest = False
+
+
+class _ModuleReader:
+    """Find the tests of a module in its syntax tree.
+
+    Follows what the default test loaders do with the module once it is
+    imported, and raises :class:`_NeedsImport` for anything it can't be
+    sure of without running the module's code.
+    """
+
+    def __init__(self, module, prefix) -> None:
+        self.module = module
+        self.prefix = prefix
+        # what the names bound in the module refer to, and the qualified
+        # names of imported ones
+        self.names: dict[str, _Function | _Class | None] = {}
+        self.imports: dict[str, str] = {}
+
+    def read(self, tree):
+        """Return ``(testid, group, doc)`` for each test in the module"""
+        for node in tree.body:
+            self._statement(node)
+        return self._tests()
+
+    def _statement(self, node):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            self._import(node)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if node.name == "load_tests":
+                raise _NeedsImport("defines load_tests")
+            function = self.names[node.name] = self._function(node)
+            self.imports.pop(node.name, None)
+            if (
+                node.name.startswith(self.prefix)
+                and function.nargs
+                and function.decorated
+            ):
+                # a decorator may replace it with a function that takes no
+                # arguments, which the function loader would load
+                raise _NeedsImport(f"decorates {node.name}, which takes arguments")
+        elif isinstance(node, ast.ClassDef):
+            self.names[node.name] = self._class(node)
+            self.imports.pop(node.name, None)
+        elif isinstance(node, ast.Delete):
+            self._checkCalls(node)
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    self.names.pop(target.id, None)
+                    self.imports.pop(target.id, None)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            self._checkCalls(node)
+            if isinstance(node, ast.Assign):
+                targets = node.targets
+            else:
+                targets = [node.target]
+            for target in targets:
+                self._bind(target)
+        elif isinstance(node, ast.If) and _isMainCheck(node.test):
+            pass
+        elif isinstance(node, ast.Raise):
+            raise _NeedsImport("raises an exception")
+        else:
+            self._compound(node)
+
+    def _import(self, node):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    self.imports[alias.asname] = alias.name
+                    self.names[alias.asname] = None
+                else:
+                    root = alias.name.split(".")[0]
+                    self.imports[root] = root
+                    self.names[root] = None
+            return
+        module = "." * node.level + (node.module or "")
+        for alias in node.names:
+            if alias.name == "*":
+                raise _NeedsImport(f"imports * from {module}")
+            bound = alias.asname or alias.name
+            if module.split(".")[0] != "unittest" and any(
+                self._testLike(name) for name in (alias.name, bound)
+            ):
+                raise _NeedsImport(f"imports {alias.name} from {module}")
+            self.imports[bound] = f"{module}.{alias.name}"
+            self.names[bound] = None
+
+    def _compound(self, node):
+        """Check an if, try, with or loop statement at module level"""
+        for child in ast.walk(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                raise _NeedsImport(f"defines {child.name} conditionally")
+            if isinstance(child, ast.ClassDef):
+                raise _NeedsImport(f"defines {child.name} conditionally")
+            if isinstance(child, (ast.Import, ast.ImportFrom)):
+                self._import(child)
+            elif isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+                self._bind(child)
+            elif isinstance(child, ast.Raise):
+                raise _NeedsImport("raises an exception")
+        self._checkCalls(node)
+
+    def _bind(self, target):
+        """Record an assignment to ``target`` at module level"""
+        if isinstance(target, (ast.Tuple, ast.List)):
+            for elt in target.elts:
+                self._bind(elt)
+        elif isinstance(target, ast.Starred):
+            self._bind(target.value)
+        elif isinstance(target, ast.Name):
+            if target.id.lower().startswith(self.prefix.lower()) or target.id in (
+                "__test__",
+                "load_tests",
+            ):
+                raise _NeedsImport(f"assigns to {target.id}")
+            self.names[target.id] = None
+            self.imports.pop(target.id, None)
+        elif isinstance(target, ast.Attribute):
+            if target.attr in _TEST_ATTRS or target.attr.startswith(self.prefix):
+                raise _NeedsImport(f"assigns to {target.attr}")
+
+    def _checkCalls(self, node):
+        for child in ast.walk(node):
+            if not isinstance(child, ast.Call):
+                continue
+            func = child.func
+            if isinstance(func, ast.Name) and func.id in _DYNAMIC_CALLS | {"type"}:
+                raise _NeedsImport(f"calls {func.id}")
+            if isinstance(func, ast.Attribute) and func.attr == "createTests":
+                raise _NeedsImport("creates tests with such")
+
+    def _function(self, node):
+        """Describe the function or method defined by ``node``"""
+        isTest = node.name.startswith(self.prefix)
+        params = None
+        for decorator in node.decorator_list:
+            target = decorator.func if isinstance(decorator, ast.Call) else decorator
+            qualified = self._qualify(target)
+            if qualified in _PARAMS and isinstance(decorator, ast.Call):
+                params = self._params(decorator)
+            elif qualified not in _PLAIN_DECORATORS and isTest:
+                raise _NeedsImport(f"decorates {node.name}")
+        if isTest and _isGenerator(node):
+            raise _NeedsImport(f"{node.name} is a generator")
+        return _Function(node, params)
+
+    def _params(self, call):
+        if call.keywords:
+            raise _NeedsImport("calls params with keywords")
+        params = []
+        for arg in call.args:
+            try:
+                value = ast.literal_eval(arg)
+            except ValueError:
+                raise _NeedsImport("calls params with values that aren't literals")
+            params.append(value if isinstance(value, tuple) else (value,))
+        return params
+
+    def _class(self, node):
+        cls = _Class(node.name)
+        for base in reversed(node.bases):
+            kind = self._base(base)
+            if kind is None:
+                raise _NeedsImport(f"{node.name} has base {ast.unparse(base)}")
+            if isinstance(kind, _Class):
+                cls.isCase = cls.isCase or kind.isCase
+                cls.members.update(kind.members)
+                cls.fixtures = cls.fixtures or kind.fixtures
+                cls.runTest = cls.runTest or kind.runTest
+            elif kind == "case":
+                cls.isCase = True
+        if node.keywords:
+            raise _NeedsImport(f"{node.name} has a metaclass")
+        for decorator in node.decorator_list:
+            target = decorator.func if isinstance(decorator, ast.Call) else decorator
+            if self._qualify(target) not in _PLAIN_DECORATORS:
+                raise _NeedsImport(f"decorates {node.name}")
+        isTestClass = node.name.lower().startswith(self.prefix.lower())
+        for stmt in node.body:
+            if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                if stmt.name == "__init__" and isTestClass and not cls.isCase:
+                    raise _NeedsImport(f"{node.name} has __init__")
+                names = [stmt.name]
+                if stmt.name.startswith(self.prefix):
+                    cls.members[stmt.name] = self._function(stmt)
+                    names = []
+            elif isinstance(stmt, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+                self._checkCalls(stmt)
+                if isinstance(stmt, ast.Assign):
+                    targets = stmt.targets
+                else:
+                    targets = [stmt.target]
+                names = [name for target in targets for name in _boundNames(target)]
+            elif isinstance(stmt, ast.ClassDef):
+                names = [stmt.name]
+            elif isinstance(stmt, (ast.Expr, ast.Pass)):
+                self._checkCalls(stmt)
+                names = []
+            else:
+                raise _NeedsImport(f"{node.name} has {type(stmt).__name__} statements")
+            for name in names:
+                if name.startswith(self.prefix) or name in _TEST_ATTRS:
+                    raise _NeedsImport(f"assigns to {node.name}.{name}")
+                cls.fixtures = cls.fixtures or name in _CLASS_FIXTURES
+                cls.runTest = cls.runTest or name == "runTest"
+        return cls
+
+    def _base(self, node):
+        """Resolve a base class.
+
+        Returns a :class:`_Class` for classes defined in the module, "case"
+        for unittest's test case classes, "plain" for builtins, or ``None``
+        for anything else.
+        """
+        if isinstance(node, ast.Name) and node.id in self.names:
+            kind = self.names[node.id]
+            if isinstance(kind, _Class):
+                return kind
+            return "case" if self.imports.get(node.id) in _TEST_CASES else None
+        if isinstance(node, ast.Name):
+            # a builtin, which is never a test case
+            return "plain"
+        return "case" if self._qualify(node) in _TEST_CASES else None
+
+    def _qualify(self, node):
+        """The qualified name of an imported name or attribute, if it is one"""
+        parts = []
+        while isinstance(node, ast.Attribute):
+            parts.append(node.attr)
+            node = node.value
+        if not isinstance(node, ast.Name) or node.id not in self.imports:
+            return None
+        parts.append(self.imports[node.id])
+        return ".".join(reversed(parts))
+
+    def _testLike(self, name):
+        return self.prefix.lower() in name.lower()
+
+    def _tests(self):
+        """List the tests in the order that the default loaders load them"""
+        moduleFixtures = any(
+            name in self.names for name in ("setUpModule", "tearDownModule")
+        )
+        cases, funcs, classes, params = [], [], [], []
+        for name in sorted(self.names):
+            obj = self.names[name]
+            if isinstance(obj, _Class) and obj.isCase:
+                cases.append(obj)
+            elif isinstance(obj, _Class) and name.lower().startswith(
+                self.prefix.lower()
+            ):
+                classes.append(obj)
+            elif isinstance(obj, _Function) and obj.name.startswith(self.prefix):
+                if obj.params is not None:
+                    params.append(obj)
+                elif obj.nargs == 0:
+                    funcs.append(obj)
+        # loader plugins are called in the order of their module names
+        group = self.module if moduleFixtures else None
+        tests = [(f"{self.module}.{func.name}", group, func.doc) for func in funcs]
+        for func in params:
+            name = f"{self.module}.{func.name}"
+            for index, args in enumerate(func.params):
+                testid = util.name_from_args(name, index, args)
+                tests.append((testid.split("\n")[0], group, func.doc))
+        tests.extend(self._methodTests(cases, moduleFixtures))
+        tests.extend(self._methodTests(classes, moduleFixtures))
+        return tests
+
+    def _methodTests(self, classes, moduleFixtures):
+        for cls in classes:
+            if moduleFixtures:
+                group = self.module
+            elif cls.fixtures:
+                group = f"{self.module}.{cls.name}"
+            else:
+                group = None
+            names = _methodNames(cls.members)
+            if cls.isCase and not names and cls.runTest:
+                names = [("runTest", None)]
+            for method, doc in names:
+                testid = f"{self.module}.{cls.name}.{method}"
+                yield testid.split("\n")[0], group, doc
+
+
+def _methodNames(members):
+    """The names of the test methods of a class, as the loaders sort them"""
+    names = []
+    for name, method in members.items():
+        if method.params is None:
+            names.append((name, method.doc))
+            continue
+        for index, args in enumerate(method.params):
+            names.append((util.name_from_args(name, index, args), method.doc))
+    return sorted(names, key=lambda item: item[0].lower())
+
+
+def _boundNames(target):
+    if isinstance(target, (ast.Tuple, ast.List)):
+        for elt in target.elts:
+            yield from _boundNames(elt)
+    elif isinstance(target, ast.Starred):
+        yield from _boundNames(target.value)
+    elif isinstance(target, ast.Name):
+        yield target.id
+
+
+def _isGenerator(node):
+    """Does the function defined by ``node`` yield?"""
+    stack = list(node.body)
+    while stack:
+        child = stack.pop()
+        if isinstance(child, (ast.Yield, ast.YieldFrom)):
+            return True
+        if not isinstance(
+            child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)
+        ):
+            stack.extend(ast.iter_child_nodes(child))
+    return False
+
+
+def _isMainCheck(test):
+    """Is ``test`` the condition ``__name__ == "__main__"``?"""
+    return (
+        isinstance(test, ast.Compare)
+        and isinstance(test.left, ast.Name)
+        and test.left.id == "__name__"
+        and len(test.comparators) == 1
+        and isinstance(test.comparators[0], ast.Constant)
+        and test.comparators[0].value == "__main__"
+    )
+
+
+def _firstLine(doc):
+    return doc and doc.strip().split("\n")[0].strip() or None
+
+
+class _StaticTest(unittest.TestCase):
+    """Stand-in for a test found without importing its module"""
+
+    def __init__(self, testid, group, doc) -> None:
+        super().__init__()
+        # util.test_name and util.fixture_group use these
+        self._funcName = testid
+        self._fixtureGroup = group
+        self._doc = doc
+
+    def id(self):
+        return self._funcName
+
+    def shortDescription(self):
+        return self._doc
+
+    def __str__(self):
+        return self._funcName
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._funcName}>"
+
+    def __eq__(self, other):
+        return isinstance(other, _StaticTest) and self._funcName == other._funcName
+
+    def __hash__(self):
+        return hash(self._funcName)
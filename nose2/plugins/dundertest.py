@@ -6,6 +6,7 @@ that define a ``__test__`` attribute that evaluates to ``False``.
 from unittest import TestSuite
 
 from nose2 import events
+from nose2.suite import StreamingSuite
 
 __unittest = True
 
@@ -22,7 +23,18 @@ class DunderTestFilter(events.Plugin):
         Recurse :attr:`event.suite` and remove all test suites and test cases
         that define a ``__test__`` attribute that evaluates to ``False``.
         """
-        self.removeNonTests(event.suite)
+        if isinstance(event.suite, StreamingSuite):
+            # remove them as they are loaded
+            event.suite.addFilter(self._isTest)
+        else:
+            self.removeNonTests(event.suite)
+
+    def _isTest(self, test):
+        if not getattr(test, "__test__", True):
+            return False
+        if isinstance(test, TestSuite):
+            self.removeNonTests(test)
+        return True
 
     def removeNonTests(self, suite):
         for test in list(suite):
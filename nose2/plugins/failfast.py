@@ -5,6 +5,20 @@ This plugin implements :func:`testOutcome` and sets
 ``event.result.shouldStop`` if it sees an outcome with exc_info that
 is not expected.
 
+To let a test run go on until it has seen more than one error or failure,
+pass :option:`--max-failures` or set ``max-failures`` in the
+``[fail-fast]`` section of a config file:
+
+.. code-block:: ini
+
+   [fail-fast]
+   always-on = True
+   max-failures = 10
+
+With the :doc:`mp plugin <mp>`, the main process stops handing out tests
+as soon as the limit is reached, and tells its worker processes to stop
+after the tests they are running.
+
 """
 
 from nose2 import events
@@ -15,18 +29,36 @@ __unittest = True
 class FailFast(events.Plugin):
     """Stop the test run after error or failure"""
 
+    configSection = "fail-fast"
     commandLineSwitch = (
         "F",
         "fail-fast",
         "Stop the test run after the first error or failure",
     )
 
+    def __init__(self):
+        self.maxFailures = max(1, self.config.as_int("max-failures", 1))
+        self.failures = 0
+        self.addArgument(
+            self.setMaxFailures,
+            None,
+            "max-failures",
+            "Stop the test run after N errors or failures",
+        )
+
+    def setMaxFailures(self, num):
+        """Set the number of errors and failures to stop after"""
+        self.maxFailures = max(1, int(num[0]))
+        self.register()
+
     def resultCreated(self, event):
         """Mark new result"""
-        if hasattr(event.result, "failfast"):
+        if hasattr(event.result, "failfast") and self.maxFailures == 1:
             event.result.failfast = True
 
     def testOutcome(self, event):
         """Stop on unexpected error or failure"""
         if event.exc_info and not event.expected:
-            event.result.shouldStop = True
+            self.failures += 1
+            if self.failures >= self.maxFailures:
+                event.result.shouldStop = True
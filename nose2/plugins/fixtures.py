@@ -0,0 +1,33 @@
+"""
+Tear down worker fixtures at the end of the test run.
+
+Resources made by fixtures decorated with
+:func:`nose2.tools.fixtures.worker_fixture` last for the whole test run, and
+are torn down by this plugin in :func:`stopTestRun`. With the :doc:`mp
+plugin <mp>`, the plugin runs in each worker process too, and tears down
+the resources of that process in :func:`stopSubprocess`.
+
+"""
+
+from nose2 import events
+from nose2.tools import fixtures
+
+__unittest = True
+
+
+class WorkerFixtures(events.Plugin):
+    """Tear down worker fixtures"""
+
+    alwaysOn = True
+
+    def registerInSubprocess(self, event):
+        """Run in worker processes, to tear down their fixtures"""
+        event.pluginClasses.append(self.__class__)
+
+    def stopSubprocess(self, event):
+        """Tear down the fixtures of this worker process"""
+        fixtures.tearDown()
+
+    def stopTestRun(self, event):
+        """Tear down the fixtures of this test run"""
+        fixtures.tearDown()
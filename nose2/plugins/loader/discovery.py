@@ -9,7 +9,40 @@ one to allow other plugins to load the actual tests.
 It also fires :func:`handleFile` for every file that it sees, and
 :func:`matchPath` for every Python module, to allow other plugins to
 load tests from other kinds of files and to influence which modules
-are examined for tests.
+are examined for tests. These events are only fired if some plugin
+implements the hook.
+
+Directories are read with :func:`os.scandir`, and whether a directory is
+a package is decided from its listing, so discovery doesn't look up each
+file on its own. This matters most on slow or network file systems.
+
+To skip listing directories that haven't changed since the last test run,
+set ``cache-file`` in the ``[discovery]`` section of a config file:
+
+.. code-block:: ini
+
+   [discovery]
+   cache-file = .nose2-discovery.json
+
+Each directory's listing is saved with the directory's modification time,
+and only directories that have been modified since are listed again. The
+test file pattern, code directories and plugin hooks are applied to the
+saved listings as usual, so changing them doesn't need a new cache.
+
+To start running tests before discovery has finished, set ``stream`` in
+the same section:
+
+.. code-block:: ini
+
+   [discovery]
+   stream = True
+
+Test modules are then imported as the test run reaches them, and the
+first tests run while later ones are still being discovered. With the
+:doc:`mp plugin <mp>`, tests are handed to worker processes as soon as
+their module is loaded. Plugins that need every test before the test run
+starts, such as :doc:`layers <layers>` or :doc:`shard <shard>`, still
+load all tests first.
 
 """
 
@@ -19,12 +52,17 @@ are examined for tests.
 # unittest2 is Copyright (c) 2001-2010 Python Software Foundation; All
 # Rights Reserved. See: http://docs.python.org/license.html
 
+from __future__ import annotations
+
+import json
 import logging
 import os
 import sys
+import time
 from fnmatch import fnmatch
 
 from nose2 import events, util
+from nose2.suite import StreamingSuite
 
 __unittest = True
 log = logging.getLogger(__name__)
@@ -58,6 +96,15 @@ class DirectoryHandler:
 
 
 class Discoverer:
+    # whether each directory seen during discovery is a package
+    _packages = None
+    # the DiscoveryCache, if directory listings are saved between runs
+    _cache: DiscoveryCache | None = None
+    # whether tests are loaded while they run, and whether discovery is
+    # walking a directory tree
+    _stream = False
+    _walking = False
+
     def loadTestsFromName(self, event):
         """Load tests from module named by event.name"""
         # turn name into path or module name
@@ -67,6 +114,7 @@ class Discoverer:
         name = event.name
         module = None
         _, top_level_dir = self._getStartDirs()
+        self._packages = {}
         try:
             # try name as a dotted module name first
             __import__(name)
@@ -125,9 +173,31 @@ class Discoverer:
                 loader.failedLoadTests(self.session.startDir, sys.exc_info())
             )
         log.debug("_discover in %s (%s)", start_dir, top_level_dir)
-        tests = list(self._find_tests(event, start_dir, top_level_dir))
+        tests = self._walk(event, start_dir, top_level_dir)
+        if self._stream and not self._walking:
+            return StreamingSuite(tests)
         return loader.suiteClass(tests)
 
+    def _walk(self, event, start_dir, top_level_dir):
+        """Yield the tests found by discovery in ``start_dir``"""
+        if self._walking:
+            # a load_tests function is discovering tests during discovery
+            yield from self._find_tests(event, start_dir, top_level_dir)
+            return
+        self._walking = True
+        complete = False
+        try:
+            self._packages = {}
+            if self._cache is not None:
+                # listings hold every file only if a plugin handles files
+                self._cache.load({"all-files": _fires(self.session.hooks.handleFile)})
+            yield from self._find_tests(event, start_dir, top_level_dir)
+            complete = True
+        finally:
+            self._walking = False
+            if self._cache is not None:
+                self._cache.save(complete)
+
     def _find_tests(self, event, start, top_level):
         """Used by discovery. Yields test suites it loads."""
         log.debug("_find_tests(%r, %r)", start, top_level)
@@ -140,25 +210,93 @@ class Discoverer:
         elif os.path.isfile(start):
             yield from self._find_tests_in_file(event, start, full_path, top_level)
 
-    def _find_tests_in_dir(self, event, full_path, top_level):
-        if not os.path.isdir(full_path):
-            return
+    def _find_tests_in_dir(self, event, full_path, top_level, listing=None):
+        """Yield the tests found in the directory ``full_path``.
+
+        ``listing`` is the directory's listing from :meth:`_listing`, if the
+        caller already has it.
+        """
+        if listing is None:
+            if not os.path.isdir(full_path):
+                return
+            listing = self._listing(full_path)
+        entries, package = listing
+        if self._packages is not None:
+            self._packages[full_path] = package
         log.debug("find in dir %s (%s)", full_path, top_level)
         dir_handler = DirectoryHandler(self.session)
         yield from dir_handler.handle_dir(event, full_path, top_level)
         if dir_handler.event_handled:
             return
-        for path in os.listdir(full_path):
-            entry_path = os.path.join(full_path, path)
-            if os.path.isfile(entry_path):
-                yield from self._find_tests_in_file(event, path, entry_path, top_level)
-            elif os.path.isdir(entry_path):
-                if (
-                    "test" in path.lower()
-                    or util.ispackage(entry_path)
-                    or path in self.session.libDirs
-                ):
-                    yield from self._find_tests(event, entry_path, top_level)
+        for name, is_dir in entries:
+            entry_path = os.path.join(full_path, name)
+            if not is_dir:
+                yield from self._find_tests_in_file(event, name, entry_path, top_level)
+                continue
+            named = "test" in name.lower() or name in self.session.libDirs
+            if not named and not self._isPackage(name, entry_path):
+                continue
+            try:
+                sub_listing = self._listing(entry_path)
+            except OSError:
+                if named:
+                    raise
+                log.debug("Unable to list %s", entry_path)
+                continue
+            yield from self._find_tests_in_dir(
+                event, entry_path, top_level, sub_listing
+            )
+
+    def _isPackage(self, name, path):
+        """Is the directory ``path``, named ``name``, a package?
+
+        Only directories that will be walked are listed, so other
+        directories -- ``.git``, ``node_modules`` or data -- are ruled out
+        by their name, or by looking up the ``__init__`` files.
+        """
+        if not util.IDENT_RE.match(name):
+            return False
+        return any(
+            os.path.isfile(os.path.join(path, init)) for init in util.PACKAGE_INIT_FILES
+        )
+
+    def _listing(self, path):
+        """List the directory ``path`` for discovery.
+
+        Returns the ``(name, is_dir)`` pairs of its subdirectories and of
+        the files that could hold tests -- Python modules, or every file if
+        a plugin handles files -- and whether it is a package. Entry types
+        come from :func:`os.scandir`, and whether the directory is a package
+        from the names in the same listing, so files are not looked up one
+        by one. With a discovery cache, a directory is only listed again if
+        it has been modified since its listing was saved.
+        """
+        cache = self._cache
+        if cache is not None:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = None
+            listing = cache.get(path, mtime)
+            if listing is not None:
+                return listing
+        all_files = _fires(self.session.hooks.handleFile)
+        ident = util.IDENT_RE.match(os.path.basename(path))
+        entries = []
+        package = False
+        with os.scandir(path) as it:
+            for entry in it:
+                name = entry.name
+                if entry.is_file():
+                    if ident and name in util.PACKAGE_INIT_FILES:
+                        package = True
+                    if all_files or util.valid_module_name(name):
+                        entries.append((name, False))
+                elif entry.is_dir():
+                    entries.append((name, True))
+        if cache is not None:
+            cache.put(path, mtime, entries, package)
+        return entries, package
 
     def _find_tests_in_file(
         self, event, filename, full_path, top_level, module_name=None
@@ -166,30 +304,37 @@ class Discoverer:
         log.debug("find in file %s (%s)", full_path, top_level)
         pattern = self.session.testFilePattern
         loader = event.loader
-        evt = events.HandleFileEvent(loader, filename, full_path, pattern, top_level)
-        result = self.session.hooks.handleFile(evt)
-        if evt.extraTests:
-            yield loader.suiteClass(evt.extraTests)
+        hooks = self.session.hooks
+        if _fires(hooks.handleFile):
+            evt = events.HandleFileEvent(
+                loader, filename, full_path, pattern, top_level
+            )
+            result = hooks.handleFile(evt)
+            if evt.extraTests:
+                yield loader.suiteClass(evt.extraTests)
 
-        if evt.handled:
-            if result:
-                yield result
-            return
+            if evt.handled:
+                if result:
+                    yield result
+                return
 
         if not util.valid_module_name(filename):
             # valid Python identifiers only
             return
 
-        evt = events.MatchPathEvent(filename, full_path, pattern)
-        result = self.session.hooks.matchPath(evt)
-        if evt.handled:
-            if not result:
+        if _fires(hooks.matchPath):
+            evt = events.MatchPathEvent(filename, full_path, pattern)
+            result = hooks.matchPath(evt)
+            if evt.handled:
+                if not result:
+                    return
+            elif not self._match_path(filename, full_path, pattern):
                 return
         elif not self._match_path(filename, full_path, pattern):
             return
 
         if module_name is None:
-            module_name, package_path = util.name_from_path(full_path)
+            module_name, package_path = util.name_from_path(full_path, self._packages)
             util.ensure_importable(package_path)
         try:
             module = util.module_from_name(module_name)
@@ -225,12 +370,107 @@ class Discoverer:
         return fnmatch(path, pattern)
 
 
+def _fires(hook):
+    """Would calling ``hook`` do anything?
+
+    Events are only built for hooks that some plugin implements, or that,
+    like those of the print-hooks plugin, act on every call.
+    """
+    return bool(hook.plugins) or type(hook) is not events.Hook
+
+
+class DiscoveryCache:
+    """Directory listings saved between test runs.
+
+    Each listing is saved with the modification time of its directory, and
+    used in later test runs for as long as the directory isn't modified.
+    Adding, removing or renaming an entry in a directory modifies it;
+    changing a file does not, and modules are always imported again.
+
+    :param path: The file the listings are saved to.
+
+    """
+
+    version = 1
+    # listings of directories modified this recently aren't trusted, in
+    # case they change again within the resolution of their mtime
+    settleTime = 2 * 10**9
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.key = None
+        # saved listings, and those used or made in this test run
+        self.dirs: dict = {}
+        self.seen: dict = {}
+        self.changed = False
+
+    def load(self, key):
+        """Load the saved listings, unless they were saved with another ``key``"""
+        self.key = key
+        self.seen = {}
+        self.changed = False
+        try:
+            with open(self.path) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            data = {}
+        if data.get("version") != self.version or data.get("key") != key:
+            log.debug("Discarding discovery cache %s", self.path)
+            self.dirs = {}
+            self.changed = True
+        else:
+            self.dirs = data.get("dirs", {})
+
+    def get(self, path, mtime):
+        """Return the listing of ``path``, if it was saved at ``mtime``"""
+        saved = self.dirs.get(path)
+        if mtime is None or saved is None or saved[0] != mtime:
+            return None
+        self.seen[path] = saved
+        return [tuple(entry) for entry in saved[1]], saved[2]
+
+    def put(self, path, mtime, entries, package):
+        if mtime is not None and time.time_ns() - mtime < self.settleTime:
+            mtime = None
+        self.seen[path] = [mtime, entries, package]
+        self.changed = True
+
+    def save(self, complete=True):
+        """Save the listings used in this test run.
+
+        If discovery stopped early, and the walk isn't ``complete``, the
+        saved listings of directories it didn't reach are kept as well.
+        """
+        dirs = self.seen if complete else {**self.dirs, **self.seen}
+        if not self.changed and dirs.keys() == self.dirs.keys():
+            return
+        data = {"version": self.version, "key": self.key, "dirs": dirs}
+        temp = f"{self.path}.{os.getpid()}"
+        try:
+            with open(temp, "w") as fh:
+                json.dump(data, fh)
+            os.replace(temp, self.path)
+        except OSError as exc:
+            log.warning("Unable to save discovery cache %s: %s", self.path, exc)
+            return
+        self.dirs = dict(dirs)
+        self.changed = False
+
+
 class DiscoveryLoader(events.Plugin, Discoverer):
     """Loader plugin that can discover tests"""
 
     alwaysOn = True
     configSection = "discovery"
 
+    def __init__(self) -> None:
+        cache_file = self.config.as_str("cache-file", "")
+        if cache_file:
+            if not os.path.isabs(cache_file):
+                cache_file = os.path.join(os.getcwd(), cache_file)
+            self._cache = DiscoveryCache(cache_file)
+        self._stream = self.config.as_bool("stream", False)
+
     def registerInSubprocess(self, event):
         event.pluginClasses.append(self.__class__)
 
@@ -241,3 +481,8 @@ class DiscoveryLoader(events.Plugin, Discoverer):
     def loadTestsFromNames(self, event):
         """Discover tests if no test names specified"""
         return Discoverer.loadTestsFromNames(self, event)
+
+    def stopTestRun(self, event):
+        """Save the discovery cache, if the test run stopped mid-discovery"""
+        if self._walking and self._cache is not None:
+            self._cache.save(complete=False)
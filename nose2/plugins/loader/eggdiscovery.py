@@ -81,7 +81,7 @@ class EggDiscoveryLoader(events.Plugin, discovery.Discoverer):
                     modname,
                 )
 
-    def _find_tests_in_dir(self, event, full_path, top_level):
+    def _find_tests_in_dir(self, event, full_path, top_level, listing=None):
         if os.path.exists(full_path):
             return
         elif _has_pkg_resources and full_path.find(".egg") != -1:
@@ -8,6 +8,9 @@ set up a logging configuration that captures log messages during test
 execution, and appends them to error reports for tests that fail or
 raise exceptions.
 
+When tests run in threads, each test gets the messages logged by the thread
+it ran in.
+
 """
 
 import logging
@@ -15,7 +18,7 @@ import threading
 from logging.handlers import BufferingHandler
 
 from nose2.events import Plugin
-from nose2.util import ln, parse_log_level
+from nose2.util import in_worker_thread, ln, parse_log_level
 
 log = logging.getLogger(__name__)
 __unittest = True
@@ -53,6 +56,9 @@ class LogCapture(Plugin):
 
     def startTest(self, event):
         """Set up handler for new test"""
+        if in_worker_thread() and self.handler in logging.getLogger().handlers:
+            # tests in other threads are logging to it
+            return
         self._setupLoghandler()
 
     def setTestOutcome(self, event):
@@ -61,7 +67,10 @@ class LogCapture(Plugin):
 
     def stopTest(self, event):
         """Clear captured messages, ready for next test"""
-        self.handler.truncate()
+        if in_worker_thread():
+            self.handler.truncate(threading.get_ident())
+        else:
+            self.handler.truncate()
 
     def outcomeDetail(self, event):
         """Append captured log messages to ``event.extraDetail``"""
@@ -96,7 +105,11 @@ class LogCapture(Plugin):
 
     def _addCapturedLogs(self, event):
         format = self.handler.format
-        records = [format(r) for r in self.handler.buffer]
+        records = self.handler.buffer
+        if in_worker_thread():
+            ident = threading.get_ident()
+            records = [r for r in records if r.thread == ident]
+        records = [format(r) for r in records]
         if "logs" in event.metadata:
             event.metadata["logs"].extend(records)
         else:
@@ -155,8 +168,13 @@ class MyMemoryHandler(BufferingHandler):
     def flush(self):
         pass  # do nothing
 
-    def truncate(self):
-        self.buffer = []
+    def truncate(self, thread=None):
+        """Forget captured records, or only those logged by ``thread``"""
+        if thread is None:
+            self.buffer = []
+            return
+        with self.lock:
+            self.buffer = [r for r in self.buffer if r.thread != thread]
 
     def filter(self, record):
         return self.filterset.allow(record.name)
@@ -1,17 +1,37 @@
 from __future__ import annotations
 
+import faulthandler
+import fnmatch
+import importlib
 import logging
+import math
 import multiprocessing
 import multiprocessing.connection as connection
 import os
+import pickle
 import platform
 import select
+import socket
+import statistics
+import struct
 import sys
+import tempfile
+import threading
+import time
+import traceback
 import typing as t
 import unittest
+from collections import deque
 from collections.abc import Sequence
+from multiprocessing import shared_memory
+from multiprocessing.reduction import ForkingPickler
 
-from nose2 import events, loader, result, runner, session, util
+import nose2
+from nose2 import events, exceptions, loader, result, runner, session, util
+from nose2._durations import Durations
+from nose2.plugins import dundertest, layers, prof
+from nose2.plugins.attrib import _get_attr
+from nose2.suite import LayerSuite, StreamingSuite
 
 log = logging.getLogger(__name__)
 
@@ -22,9 +42,27 @@ if platform.system() == "Windows":
 else:
     MP_CTX = multiprocessing.get_context("fork")
 
+# hooks of plugins that load tests, or change the suite of loaded tests
+_COLLECTION_HOOKS = (
+    "loadTestsFromModule",
+    "loadTestsFromTestCase",
+    "loadTestsFromName",
+    "getTestCaseNames",
+    "moduleLoadedSuite",
+    "createdTestSuite",
+    "startTestRun",
+)
+
 
 class MultiProcess(events.Plugin):
     configSection = "multiprocess"
+    # with an adaptive batch size, aim for batches that keep a worker busy
+    # for about this many seconds
+    batchDuration = 0.1
+    # hooks whose events this plugin uses itself, to time tests
+    replayedHooks = frozenset(("startTest", "stopTest"))
+    # in elastic mode, how often to decide whether to add or retire a worker
+    scaleInterval = 1.0
 
     def __init__(self) -> None:
         self.addArgument(
@@ -33,11 +71,105 @@ class MultiProcess(events.Plugin):
             "processes",
             "Number of processes used to run tests (0 = auto)",
         )
+        self.addArgument(
+            self.setWorker,
+            None,
+            "mp-worker",
+            "Run tests for the nose2 coordinator listening at HOST:PORT",
+        )
         self.testRunTimeout = self.config.as_float("test-run-timeout", 60.0)
         self._procs = self.config.as_int("processes", 0)
         self.setAddress(self.config.as_str("bind_address", None))
+        self.batchSize = self.config.as_int("batch-size", 1)
+        self.maxBatchSize = self.config.as_int("max-batch-size", 32)
+        self.prefetch = max(1, self.config.as_int("prefetch", 1))
+        self.schedule = self.config.as_str("schedule", "longest-first")
+        self.preload = self.config.as_bool("preload-tests", False)
+        self.collectInWorkers = self.config.as_bool("collect-in-workers", False)
+        self.maxTestsPerWorker = self.config.as_int("max-tests-per-worker", 0)
+        self.maxWorkerMemory = self.config.as_int("max-worker-memory", 0)
+        self.crashRetries = self.config.as_int("crash-retries", 1)
+        self.memoryPerProcess = self.config.as_int("memory-per-process", 0)
+        self.pinCpus = self.config.as_bool("pin-cpus", False)
+        self.splitClasses = self.config.as_list("split-classes", [])
+        self.chunkDuration = self.config.as_float("chunk-duration", 0.0)
+        self.resources = _parseResources(self.config.as_list("resources", []))
+        self.elastic = self.config.as_bool("elastic", False)
+        self.minProcs = max(1, self.config.as_int("min-processes", 1))
+        self.maxLoad = self.config.as_float("max-load", 1.0)
+        self.memoryReserve = self.config.as_int("memory-reserve", 256)
+        self.resultTransport = self.config.as_str("result-transport", "pipe")
+        if self.resultTransport not in ("pipe", "shared-memory"):
+            raise ValueError(
+                f"Invalid result-transport {self.resultTransport!r}: "
+                "expected pipe or shared-memory"
+            )
+        self.resultBufferSize = self.config.as_float("result-buffer-size", 4.0)
+        self.testTimeout = self.config.as_float("test-timeout", 0.0)
+        self.listen = _parseAddress(self.config.as_str("listen", ""), "listen")
+        self.authkey = self.config.as_str("authkey", "") or os.environ.get(
+            "NOSE2_MP_AUTHKEY", ""
+        )
+        self.workerAddress = None
+        startMethod = self.config.as_str("start-method", "")
+        self.context = MP_CTX
+        if startMethod:
+            self.context = multiprocessing.get_context(startMethod)
+        self.preloadModules = self.config.as_list("preload", [])
+        # how long each worker process took to be ready for tests
+        self.startupTimes: list[float] = []
+        durations_file = self.config.as_str("durations-file", "")
+        if durations_file and not os.path.isabs(durations_file):
+            durations_file = os.path.join(os.getcwd(), durations_file)
+        self.durations = Durations(durations_file)
 
         self.cases: dict[str, unittest.TestCase] = {}
+        # test ids of the fixture groups and layers found by _flatten
+        self.units: dict[str, list[str]] = {}
+        self.unitTests: dict[str, list[unittest.TestCase]] = {}
+        # the modules to load the tests of each layer from
+        self.layerUnits: dict[str, list[str]] = {}
+        # the chunks that fixture classes were split into
+        self.chunks: dict[str, list[str]] = {}
+        # tests inherited by forked processes, and the index of each test id
+        self._preloaded: list[tuple[str, list[unittest.TestCase]]] = []
+        self._preloadIndex: dict[str, int] = {}
+        # moving average of observed test durations, for adaptive batches
+        self._testDuration: float | None = None
+        # batches sent to each worker and not yet reported back, and the
+        # number of tests sent to each worker
+        self._inFlight: dict[t.Any, deque[list[str]]] = {}
+        self._testsSent: dict[t.Any, int] = {}
+        # workers that should exit once their current batches are done
+        self._retiring: set = set()
+        # units that were running when a worker crashed, and how many
+        # crashes each unit has been alone in
+        self._suspects: set[str] = set()
+        self._crashes: dict[str, int] = {}
+        # connections to workers on other hosts
+        self._remotes: set = set()
+        # when each local worker process was started
+        self._startTimes: dict[t.Any, float] = {}
+        # the CPUs each local worker process is pinned to
+        self._cpuSets: dict[t.Any, list[int]] = {}
+        # workers that have been told to stop, once the test run should stop
+        self._stopped: set = set()
+        # the resources each unit uses, how many dispatched units use each
+        # resource, and how many times each unit holds its resources
+        self._unitResources: dict[str, tuple[str, ...]] = {}
+        self._resourceUse: dict[str, int] = {}
+        self._holding: dict[str, int] = {}
+        # workers that are waiting for a unit whose resources are free
+        self._idle: set = set()
+        # workers retired to shrink an elastic pool, which aren't replaced,
+        # and when to next decide whether to grow or shrink the pool
+        self._shrinking: set = set()
+        self._nextScale = 0.0
+        # the suites of tests still being discovered, when they are
+        # dispatched as they are loaded
+        self._loading: t.Iterator | None = None
+        # test modules found by discovery, for worker processes to import
+        self._collector: _ModuleCollector | None = None
 
     @property
     def procs(self):
@@ -45,10 +177,8 @@ class MultiProcess(events.Plugin):
         0."""
 
         if self._procs == 0:
-            try:
-                self._procs = multiprocessing.cpu_count()
-            except NotImplementedError:
-                self._procs = 1
+            self._procs = _autoProcs(self.memoryPerProcess)
+            log.debug("Using %i worker processes", self._procs)
         return self._procs
 
     @procs.setter
@@ -62,6 +192,12 @@ class MultiProcess(events.Plugin):
         self.procs = int(num[0])  # FIXME merge n fix
         self.register()
 
+    def setWorker(self, address):
+        self.workerAddress = _parseAddress(address[0], "--mp-worker")
+        if self.workerAddress is None:
+            raise ValueError(f"Invalid coordinator address: {address[0]}")
+        self.register()
+
     def setAddress(self, address):
         if address is None or address.strip() == "":
             address = []
@@ -89,87 +225,655 @@ class MultiProcess(events.Plugin):
     def pluginsLoaded(self, event):
         self.addMethods("registerInSubprocess", "startSubprocess", "stopSubprocess")
 
+    def createTests(self, event):
+        """Serve a coordinator instead of running tests, in worker mode.
+
+        Otherwise, with ``collect-in-workers``, keep discovery from
+        importing test modules here.
+        """
+        if self.workerAddress is not None:
+            sys.exit(self._serveCoordinator())
+        if self.collectInWorkers and self._canCollect():
+            self._collector = _ModuleCollector()
+            self.session.hooks.register("matchPath", self._collector)
+
     def startTestRun(self, event):
         event.executeTests = self._runmp
 
+    def stopTestRun(self, event):
+        """Save durations of the tests that ran"""
+        if self.durations.path:
+            self.durations.save()
+
+    def beforeSummaryReport(self, event):
+        """Report how long worker processes took to start"""
+        if self.startupTimes and self.session.verbosity > 0:
+            event.stream.writeln(
+                "Started %d worker process%s (%s) in %.3fs on average, "
+                "%.3fs at most"
+                % (
+                    len(self.startupTimes),
+                    len(self.startupTimes) != 1 and "es" or "",
+                    self.context.get_start_method(),
+                    statistics.mean(self.startupTimes),
+                    max(self.startupTimes),
+                )
+            )
+
     def beforeInteraction(self, event):
         # prevent interactive plugins from running
         event.handled = True
         return False
 
     def _runmp(self, test, result):
-        # flatten technically modifies a hash of test cases, let's
-        # only run it once per run.
-        flat = list(self._flatten(test))
-
-        # do not send import failures to the subprocesses, which will mangle them
-        # but 'run' them in the main process.
-        failed_import_id = "nose2.loader.LoadTestsFailure"
-        result_ = self.session.testResult
-        for testid in flat:
-            if testid.startswith(failed_import_id):
-                self.cases[testid].run(result_)
-
+        queue: deque[str] = deque()
+        collecting = self._collector is not None
+        if (
+            isinstance(test, StreamingSuite)
+            and test.loading
+            and not self._canPreload()
+            and not collecting
+        ):
+            # tests are still being discovered: dispatch them as they are
+            # loaded, starting workers once there is something to run
+            self._loading = iter(test)
+            while not queue and self._loadMore(queue):
+                pass
+        else:
+            self._enqueue(queue, test)
+        if self._canPreload():
+            self._preloaded = [(unit, self._testsForUnit(unit)) for unit in queue]
+            self._preloadIndex = {
+                unit: index for index, (unit, _) in enumerate(self._preloaded)
+            }
+        session_export = self._exportSession()
+        self._preimport()
         # XXX Process-Handling: The length of the filtered list needs to be
         # known for _startProcs, until this can be cleaned up.  This
         # wasn't the best way to deal with too few tests
-        flat = [x for x in flat if not x.startswith(failed_import_id)]
-        procs = self._startProcs(len(flat))
-
-        # send one initial task to each process
-        for _proc, conn in procs:
-            if not flat:
-                break
-            caseid = flat.pop(0)
-            # NOTE: it throws errors on broken pipes and bad serialization
-            conn.send(caseid)
+        count = len(queue) if self._loading is None else self.procs
+        if collecting:
+            count += len(self._collector.modules)
+        procs = self._startProcs(count, session_export)
+        if collecting and self._collector.modules:
+            self._collect(procs, queue, session_export)
+            # chunks of split classes are only known now
+            session_export = self._exportSession()
+            if self.chunks:
+                for _proc, conn in procs:
+                    conn.send({"chunks": self.chunks})
+        workers = {conn: proc for proc, conn in procs}
+        done: set = set()
+        # remote workers may join as soon as there are tests to run
+        listener = self._listen() if queue else None
+        if result.shouldStop:
+            # an import failure was enough to stop the test run
+            queue.clear()
+            self._loading = None
+
+        # fill each process's pipeline with its initial batches
+        for _ in range(self.prefetch):
+            for _proc, conn in procs:
+                self._dispatch(conn, queue, len(procs), done)
 
         rdrs = [conn for proc, conn in procs if proc.is_alive()]
-        while flat or rdrs:
-            ready, _, _ = select.select(rdrs, [], [], self.testRunTimeout)
+        while rdrs or (queue and not result.shouldStop):
+            if self._loading is not None:
+                if result.shouldStop:
+                    self._loading = None
+                else:
+                    # load the next module while workers run tests
+                    self._loadMore(queue, rdrs)
+            # resources may have been released since idle workers asked
+            for conn in [conn for conn in self._idle if conn in rdrs]:
+                self._dispatch(conn, queue, len(workers), done)
+            if self.elastic and queue and not result.shouldStop:
+                self._scale(session_export, queue, procs, workers, rdrs, done)
+            listening = [listener] if listener and queue else []
+            # don't wait for results while there are tests left to load
+            timeout = 0 if self._loading is not None else self.testRunTimeout
+            ready, _, _ = select.select(rdrs + listening, [], [], timeout)
             for conn in ready:
-                # XXX Process-Handling: If we get an EOFError on receive the
-                # process finished= or we lost the process and the test it was
-                # working on.  Also do we rebuild the process?
+                if conn in listening:
+                    for conn, greeting in listener.accepted():
+                        conn = self._acceptWorker(conn, greeting, session_export)
+                        if conn is None:
+                            continue
+                        workers[conn] = None
+                        rdrs.append(conn)
+                        for _ in range(self.prefetch):
+                            self._dispatch(conn, queue, len(workers), done)
+                    continue
                 try:
                     remote_events = conn.recv()
-                except EOFError:
-                    # probably dead/12
-                    log.warning("Subprocess connection closed unexpectedly")
-                    continue
+                except (EOFError, OSError):
+                    # the process died, taking its current batch with it
+                    rdrs.remove(conn)
+                    self._idle.discard(conn)
+                    self._recover(conn, workers[conn], queue)
+                    remote_events = None
+                else:
+                    if isinstance(remote_events, dict):
+                        self._workerReady(conn, remote_events)
+                        continue
+                    # If remote_events is None, the process exited normally,
+                    # which should mean that we didn't any more tests for it.
+                    if remote_events is None:
+                        log.debug("Conn closed %s", conn)
+                        rdrs.remove(conn)
+                        self._idle.discard(conn)
+                        # a process that timed out leaves tests unrun
+                        for batch in self._inFlight.pop(conn, ()):
+                            self._requeue(queue, batch)
 
-                # If remote_events is None, the process exited normally,
-                # which should mean that we didn't any more tests for it.
                 if remote_events is None:
-                    log.debug("Conn closed %s", conn)
-                    rdrs.remove(conn)
+                    # replace retired and crashed processes while there
+                    # are tests left to run
+                    if (
+                        (queue or self._loading is not None)
+                        and not result.shouldStop
+                        and workers[conn] is not None
+                        and conn not in self._shrinking
+                    ):
+                        cpus = self._cpuSets.pop(conn, None)
+                        self._addWorker(
+                            session_export, queue, procs, workers, rdrs, done, cpus
+                        )
                     continue
 
-                # replay events
-                testid, events = remote_events
-                log.debug("Received results for %s", testid)
-                for hook, event in events:
-                    log.debug("Received %s(%s)", hook, event)
-                    self._localize(event)
-                    getattr(self.session.hooks, hook)(event)
-
-                # Send the next test_id
-                # NOTE: send throws errors on broken pipes and bad serialization
-                if not flat:
-                    # If there are no more, send None - it's the 'done' flag
-                    conn.send(None)
+                # a batch of tests comes back as a list of results
+                if isinstance(remote_events, bytes):
+                    remote_events = _decodeResults(remote_events)
+                elif not isinstance(remote_events, list):
+                    remote_events = [remote_events]
+                if self._inFlight.get(conn):
+                    # run again any tests a timed out process didn't get to
+                    batch = self._inFlight[conn].popleft()
+                    reported = {testid for testid, _ in remote_events}
+                    self._requeue(
+                        queue, [unit for unit in batch if unit not in reported]
+                    )
+                for testid, hook_events in remote_events:
+                    self._replay(testid, hook_events)
+                    self._release(testid)
+                if result.shouldStop:
+                    # fail fast: nothing more to run, anywhere
+                    self._stop(rdrs, queue, done)
                     continue
-                caseid = flat.pop(0)
-                conn.send(caseid)
 
-        for _, conn in procs:
+                if self.maxWorkerMemory and workers[conn] is not None:
+                    rss = _processMemory(workers[conn].pid)
+                    if rss is not None and rss > self.maxWorkerMemory * 2**20:
+                        log.debug("Retiring process %s: %s bytes", conn, rss)
+                        self._retiring.add(conn)
+
+                # Send the next batch of test ids
+                self._dispatch(conn, queue, len(procs), done)
+
+        if listener is not None:
+            listener.close()
+        for conn in workers:
             conn.close()
 
         # ensure we wait until all processes are done before
         # exiting, to allow plugins running there to finalize
         for proc, _ in procs:
+            if result.shouldStop:
+                proc.join(self.testRunTimeout)
+                if proc.is_alive():
+                    log.warning("Terminating subprocess %s", proc.pid)
+                    proc.terminate()
             proc.join()
 
+    def _stop(self, conns, queue, done):
+        """Stop the test run on every worker.
+
+        No more tests are dispatched, and each worker is told to stop after
+        the test it is running, skipping any batches queued in its pipe.
+        """
+        queue.clear()
+        self._loading = None
+        for conn in conns:
+            if conn in self._stopped:
+                continue
+            self._stopped.add(conn)
+            try:
+                conn.send({"stop": True})
+                if conn not in done:
+                    conn.send(None)
+            except OSError:
+                log.debug("Unable to stop %s", conn)
+            done.add(conn)
+
+    def _canCollect(self):
+        """Can worker processes collect the tests instead of this process?
+
+        Only if every plugin here that loads tests, or changes the loaded
+        suite, also runs in worker processes.
+        """
+        if self._canPreload():
+            return False
+        inWorkers = set(self._workerPluginClasses())
+        for method in _COLLECTION_HOOKS:
+            for plugin in getattr(self.session.hooks, method).plugins:
+                if plugin is self or type(plugin) in inWorkers:
+                    continue
+                if isinstance(plugin, (dundertest.DunderTestFilter, prof.Profiler)):
+                    # worker processes leave out tests with a false __test__,
+                    # and the profiler doesn't look at the suite
+                    continue
+                log.warning(
+                    "Collecting tests in this process: %s uses %s", plugin, method
+                )
+                return False
+        return True
+
+    def _collect(self, procs, queue, session_export):
+        """Have worker processes import the test modules discovery found.
+
+        Modules are handed out a few at a time, and each worker sends back
+        a description of the tests it loaded, which stand in for them here.
+        The units of the collected tests are added to ``queue``. Modules
+        that a worker process dies importing are reported as load failures,
+        and the process is replaced.
+        """
+        modules = self._collector.modules
+        log.debug("Collecting %d modules in worker processes", len(modules))
+        size = max(1, len(modules) // (len(procs) * 4 or 1))
+        chunks = [modules[i : i + size] for i in range(0, len(modules), size)]
+        pending = deque(range(len(chunks)))
+        collected: dict[int, list] = {}
+        # the chunk each worker is importing
+        importing: dict[t.Any, int] = {}
+
+        def handOut(conn):
+            if pending:
+                importing[conn] = pending.popleft()
+                conn.send({"collect": chunks[importing[conn]]})
+
+        for _proc, conn in procs:
+            handOut(conn)
+        while importing:
+            ready, _, _ = select.select(list(importing), [], [], self.testRunTimeout)
+            for conn in ready:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    message = None
+                if isinstance(message, dict) and "ready" in message:
+                    self._workerReady(conn, message)
+                    continue
+                index = importing.pop(conn)
+                if isinstance(message, dict) and "collected" in message:
+                    collected[index] = message["collected"]
+                    handOut(conn)
+                    continue
+                # the process died: its modules could take down any other
+                log.warning("Worker process died importing %s", chunks[index])
+                conn.close()
+                for proc, other in list(procs):
+                    if other is conn:
+                        proc.join(self.testRunTimeout)
+                        procs.remove((proc, other))
+                if pending:
+                    proc, conn = self._startProc(session_export)
+                    procs.append((proc, conn))
+                    handOut(conn)
+                collected[index] = []
+                for name in chunks[index]:
+                    exc = exceptions.WorkerCrashError(
+                        f"Module {name} was being imported by a process that died"
+                    )
+                    failure = ("LoadTestsFailure", name, exc)
+                    collected[index].append({"failure": failure})
+        loader_ = self.session.testLoader
+        suite = unittest.TestSuite()
+        for index in range(len(chunks)):
+            for info in collected[index]:
+                if "failure" in info:
+                    suite.addTest(loader_._makeFailedTest(*info["failure"]))
+                else:
+                    cls = util.transplant_class(_CollectedTest, info["module"])
+                    suite.addTest(cls(info))
+        self._enqueue(queue, suite)
+
+    def _enqueue(self, queue, suite):
+        """Add the units of the tests in ``suite`` to ``queue``"""
+        # flatten technically modifies a hash of test cases, let's
+        # only run it once per suite.
+        flat = list(self._flatten(suite))
+
+        # do not send import failures to the subprocesses, which will mangle them
+        # but 'run' them in the main process.
+        failed_import_id = "nose2.loader.LoadTestsFailure"
+        result_ = self.session.testResult
+        for testid in flat:
+            if testid.startswith(failed_import_id):
+                self.cases[testid].run(result_)
+
+        units = self._schedule([x for x in flat if not x.startswith(failed_import_id)])
+        for unit in units:
+            resources = self._resourcesFor(unit)
+            if resources:
+                self._unitResources[unit] = resources
+        queue.extend(units)
+
+    def _loadMore(self, queue, conns=()):
+        """Add the tests of the next suite discovery loads to ``queue``.
+
+        Workers in ``conns`` are already running, and are sent the chunks
+        of any fixture classes the suite's tests are split into before
+        they can be dispatched.
+
+        Returns ``False`` once there are no more tests to load.
+        """
+        suite = next(self._loading, None)
+        if suite is None:
+            self._loading = None
+            return False
+        known = set(self.chunks)
+        self._enqueue(queue, [suite])
+        chunks = {
+            unit: testids for unit, testids in self.chunks.items() if unit not in known
+        }
+        if chunks:
+            for conn in conns:
+                conn.send({"chunks": chunks})
+        return True
+
+    def _schedule(self, flat):
+        """Order test ids so that the longest units are dispatched first.
+
+        Durations come from the ``durations-file`` of previous runs, if
+        there is one. Without any history, fixture groups are assumed to
+        take longer the more tests they have, and to take longer than
+        single tests.
+        """
+        if self.schedule != "longest-first":
+            return flat
+        if self.durations.path:
+            self.durations.load()
+        if self.durations.tests or self.durations.groups:
+            estimate = self.durations.estimate
+        else:
+
+            def estimate(unit, tests):
+                return len(tests)
+
+        costs = {unit: estimate(unit, self.units.get(unit, [unit])) for unit in flat}
+        # sorted is stable, so ties keep their discovery order
+        return sorted(flat, key=lambda unit: -costs[unit])
+
+    def _replay(self, testid, events):
+        log.debug("Received results for %s", testid)
+        started = first = last = timedOut = None
+        ran = set()
+        for hook, event in events:
+            log.debug("Received %s(%s)", hook, event)
+            self._localize(event)
+            getattr(self.session.hooks, hook)(event)
+            if hook == "startTest":
+                ran.add(util.test_name(event.test))
+                started = event.startTime
+                if first is None:
+                    first = started
+            elif hook == "stopTest" and started is not None:
+                duration = event.stopTime - started
+                self._observeDuration(duration)
+                self.durations.record(util.test_name(event.test), duration)
+                last = event.stopTime
+            elif hook == "testOutcome" and _isTimeout(event):
+                timedOut = event.test
+        if testid in self.units and first is not None and last is not None:
+            self.durations.recordGroup(testid, last - first)
+        if testid in self.units and timedOut is not None:
+            self._reportNotRun(testid, ran, timedOut)
+
+    def _reportNotRun(self, unit, ran, timedOut):
+        """Report the tests of ``unit`` that a timed out test kept from running.
+
+        The process that timed out exited in the middle of the fixture group,
+        so its remaining tests are reported as skipped rather than run again
+        without the fixtures that were set up for them.
+        """
+        reason = (
+            f"not run: {util.test_name(timedOut)} in the same fixture group "
+            "timed out"
+        )
+        result = self.session.testResult
+        for testid in self.units[unit]:
+            if testid in ran or testid not in self.cases:
+                continue
+            test = self.cases[testid]
+            result.startTest(test)
+            result.addSkip(test, reason)
+            result.stopTest(test)
+
+    def _recover(self, conn, proc, queue):
+        """Recover the tests of a worker process that died.
+
+        Tests the process had not started yet are put back at the front of
+        the queue. The batch it was running is put back too, and each of its
+        units will be dispatched alone from then on, so that a unit that
+        crashes its process can be told apart from its neighbours. A unit
+        that crashes more than ``crash-retries`` processes on its own is
+        reported as an error.
+
+        ``proc`` is ``None`` for remote workers, whose tests are recovered
+        in the same way when they disconnect.
+        """
+        if proc is None:
+            reason = "a remote worker that disconnected"
+            log.warning("Remote worker %s disconnected", conn)
+        else:
+            proc.join(self.testRunTimeout)
+            reason = f"a process that exited with exit code {proc.exitcode}"
+            log.warning(
+                "Subprocess %s exited unexpectedly with exit code %s",
+                proc.pid,
+                proc.exitcode,
+            )
+        batches = self._inFlight.pop(conn, deque())
+        if not batches:
+            return
+        running = batches.popleft()
+        requeue = [unit for batch in batches for unit in batch]
+        if len(running) == 1:
+            unit = running[0]
+            self._crashes[unit] = self._crashes.get(unit, 0) + 1
+            if self._crashes[unit] > self.crashRetries:
+                self._reportCrash(unit, reason)
+                self._release(unit)
+                running = []
+        self._suspects.update(running)
+        self._requeue(queue, running + requeue)
+
+    def _reportCrash(self, unit, reason):
+        exc = exceptions.WorkerCrashError(f"Test {unit} was running in {reason}")
+        tb = "".join(traceback.format_exception_only(type(exc), exc))
+        result = self.session.testResult
+        for test in _iterTests(self._testsForUnit(unit)):
+            result.startTest(test)
+            result.addError(test, (type(exc), exc, tb))
+            result.stopTest(test)
+
+    def _observeDuration(self, duration):
+        if self._testDuration is None:
+            self._testDuration = duration
+        else:
+            self._testDuration = 0.8 * self._testDuration + 0.2 * duration
+
+    def _dispatch(self, conn, queue, workers, done):
+        """Send the next batch of test ids to ``conn``.
+
+        When the queue is empty, ``None`` is sent instead -- once per
+        connection -- to tell the process it won't get any more tests.
+        It will finish any batches already queued in its pipe first.
+        """
+        if conn in done:
+            return
+        sent = self._testsSent.get(conn, 0)
+        if self.maxTestsPerWorker and sent >= self.maxTestsPerWorker:
+            self._retiring.add(conn)
+        if not queue and self._loading is not None and conn not in self._retiring:
+            # more tests may yet be discovered
+            self._idle.add(conn)
+            return
+        if not queue or conn in self._retiring:
+            done.add(conn)
+            self._idle.discard(conn)
+            # NOTE: send throws errors on broken pipes and bad serialization
+            conn.send(None)
+            return
+        size = self._batchSize(len(queue), workers)
+        batch: list[str] = []
+        while queue and len(batch) < size:
+            index = self._available(queue)
+            if index is None:
+                break
+            # units suspected of crashing a process run on their own
+            if batch and queue[index] in self._suspects:
+                break
+            unit = queue[index]
+            del queue[index]
+            self._acquire(unit)
+            batch.append(unit)
+            if batch[0] in self._suspects:
+                break
+        if not batch:
+            # every unit left needs a resource that is in use
+            self._idle.add(conn)
+            return
+        self._idle.discard(conn)
+        self._inFlight.setdefault(conn, deque()).append(batch)
+        self._testsSent[conn] = sent + sum(
+            len(self.units.get(unit, [unit])) for unit in batch
+        )
+        message = batch
+        if self._preloadIndex and conn not in self._remotes:
+            # forked workers already have these tests: send their indexes
+            message = [self._preloadIndex[unit] for unit in batch]
+        try:
+            conn.send(message)
+        except OSError:
+            # the process is exiting, after a test timed out
+            log.debug("Unable to send tests to %s", conn)
+            self._inFlight[conn].pop()
+            self._requeue(queue, batch)
+            done.add(conn)
+
+    def _addWorker(self, session_export, queue, procs, workers, rdrs, done, cpus=None):
+        proc, conn = self._startProc(session_export, cpus)
+        workers[conn] = proc
+        procs.append((proc, conn))
+        rdrs.append(conn)
+        for _ in range(self.prefetch):
+            self._dispatch(conn, queue, len(procs), done)
+
+    def _scale(self, session_export, queue, procs, workers, rdrs, done):
+        """Grow or shrink an elastic pool of worker processes.
+
+        A worker is added while more units are waiting than the workers have
+        room for in their pipelines, up to ``processes``, as long as the load
+        average per CPU is under ``max-load`` and the free memory would stay
+        over ``memory-reserve`` megabytes with one more worker the size of
+        the largest one. A worker is retired, down to ``min-processes``, if
+        it has nothing it can run, or if the load goes over one and a half
+        times ``max-load`` or free memory falls under the reserve.
+        """
+        now = time.time()
+        if now < self._nextScale:
+            return
+        self._nextScale = now + self.scaleInterval
+        local = [
+            conn
+            for conn in rdrs
+            if workers.get(conn) is not None
+            and conn not in done
+            and conn not in self._retiring
+        ]
+        idle = [conn for conn in local if conn in self._idle]
+        if idle and len(local) > self.minProcs:
+            log.debug("Retiring idle process %s", idle[0])
+            self._retiring.add(idle[0])
+            self._shrinking.add(idle[0])
+            self._dispatch(idle[0], queue, len(procs), done)
+            return
+        load = _systemLoad()
+        free = _freeMemory()
+        reserve = self.memoryReserve * 2**20
+        if len(local) > self.minProcs and (
+            (load is not None and load > 1.5 * self.maxLoad)
+            or (free is not None and free < reserve)
+        ):
+            log.debug("Shrinking pool: load %s, free memory %s", load, free)
+            self._retiring.add(local[-1])
+            self._shrinking.add(local[-1])
+            return
+        if len(local) >= self.procs or len(queue) <= len(local) * self.prefetch:
+            return
+        if load is not None and load >= self.maxLoad:
+            return
+        rss = max((_processMemory(workers[conn].pid) or 0 for conn in local), default=0)
+        if free is not None and free - rss < reserve:
+            return
+        if self._available(queue) is None:
+            return
+        log.debug("Growing pool: load %s, free memory %s", load, free)
+        self._addWorker(session_export, queue, procs, workers, rdrs, done)
+
+    def _resourcesFor(self, unit):
+        """Name the resources that the tests of ``unit`` use"""
+        resources: set[str] = set()
+        for test in _iterTests(self._testsForUnit(unit)):
+            resources.update(_testResources(test))
+        return tuple(sorted(resources))
+
+    def _available(self, queue):
+        """Find the first unit in ``queue`` that its resources have room for"""
+        if not self._unitResources:
+            return 0 if queue else None
+        for index, unit in enumerate(queue):
+            if all(
+                self._resourceUse.get(name, 0) < self.resources.get(name, 1)
+                for name in self._unitResources.get(unit, ())
+            ):
+                return index
+        return None
+
+    def _acquire(self, unit):
+        resources = self._unitResources.get(unit)
+        if not resources:
+            return
+        self._holding[unit] = self._holding.get(unit, 0) + 1
+        for name in resources:
+            self._resourceUse[name] = self._resourceUse.get(name, 0) + 1
+
+    def _release(self, unit):
+        if not self._holding.get(unit):
+            return
+        self._holding[unit] -= 1
+        for name in self._unitResources[unit]:
+            self._resourceUse[name] -= 1
+
+    def _requeue(self, queue, units):
+        """Put ``units`` back at the front of ``queue``, in order"""
+        for unit in units:
+            self._release(unit)
+        queue.extendleft(reversed(units))
+
+    def _batchSize(self, remaining, workers):
+        if self.batchSize > 0:
+            return self.batchSize
+        # adaptive: grow batches of fast tests to amortize the round trip,
+        # but never hand a single worker more than its share of the tail
+        if not self._testDuration:
+            size = 1
+        else:
+            size = int(self.batchDuration / self._testDuration)
+        share = -(-remaining // (workers * self.prefetch))
+        return max(1, min(size, share, self.maxBatchSize))
+
     def _prepConns(self):
         """
         If the ``bind_host`` is not ``None``, return:
@@ -187,7 +891,7 @@ class MultiProcess(events.Plugin):
             listener = connection.Listener(address, authkey=authkey)
             return (listener, listener.address + (authkey,))
         else:
-            return MP_CTX.Pipe()
+            return self.context.Pipe()
 
     def _acceptConns(self, parent_conn):
         """
@@ -208,21 +912,182 @@ class MultiProcess(events.Plugin):
         else:
             return parent_conn
 
-    def _startProcs(self, test_count):
+    def _listen(self):
+        """Listen for remote workers, if a ``listen`` address is set"""
+        if self.listen is None:
+            return None
+        if not self.authkey:
+            log.error("Not listening for remote workers: no authkey is set")
+            return None
+        log.info("Listening for remote workers at %s:%s", *self.listen)
+        return _WorkerListener(self.listen, self.authkey.encode(), self.testRunTimeout)
+
+    def _acceptWorker(self, conn, greeting, session_export):
+        """Send the session to a remote worker that has greeted us.
+
+        Workers that run a different version of nose2 or of the result
+        format are turned away.
+        """
+        try:
+            version = _wireVersion()
+            if greeting != ("hello", version):
+                log.warning("Rejected remote worker with version %s", greeting)
+                conn.send(("rejected", version))
+                conn.close()
+                return None
+            export = {
+                key: value
+                for key, value in session_export.items()
+                if key != "preloaded"
+            }
+            export["version"] = version
+            export["cwd"] = os.getcwd()
+            conn.send(export)
+        except (OSError, EOFError) as e:
+            log.warning("Lost remote worker during handshake: %s", e)
+            conn.close()
+            return None
+        self._remotes.add(conn)
+        return conn
+
+    def _serveCoordinator(self):
+        """Run tests for a coordinator, as a remote worker.
+
+        Returns the exit status of this process.
+        """
+        if not self.authkey:
+            log.error("Unable to connect to coordinator: no authkey is set")
+            return 2
+        deadline = time.monotonic() + self.testRunTimeout
+        while True:
+            try:
+                conn = connection.Client(
+                    self.workerAddress, authkey=self.authkey.encode()
+                )
+                break
+            except multiprocessing.AuthenticationError as e:
+                log.error("Unable to connect to coordinator: %s", e)
+                return 2
+            except OSError:
+                # the coordinator may not be listening yet
+                if time.monotonic() > deadline:
+                    log.error("No coordinator at %s:%s", *self.workerAddress)
+                    return 2
+                time.sleep(0.1)
+        version = _wireVersion()
+        conn.send(("hello", version))
+        export = conn.recv()
+        if not isinstance(export, dict) or export.get("version") != version:
+            log.error("Coordinator rejected this worker: version %s", version)
+            conn.close()
+            return 2
+        # the coordinator's paths, relative to this worker's directory
+        for key in ("startDir", "topLevelDir"):
+            path = export.get(key)
+            if path and os.path.isabs(path):
+                relpath = os.path.relpath(path, export["cwd"])
+                if not relpath.startswith(os.pardir):
+                    export[key] = os.path.abspath(relpath)
+        # this process was started by hand, not by the coordinator
+        export["startMethod"] = self.context.get_start_method()
+        procserver(export, conn)
+        return 0
+
+    def _canPreload(self):
+        # Forked processes inherit the tests loaded by this process.
+        # Other start methods would have to pickle them, which is not
+        # generally possible, so they load tests by name.
+        return self.preload and self.context.get_start_method() == "fork"
+
+    def _testsForUnit(self, unit):
+        if unit in self.unitTests:
+            return self.unitTests[unit]
+        return [self.cases[unit]]
+
+    def _startProcs(self, test_count, session_export=None):
         # Create session export
-        session_export = self._exportSession()
+        if session_export is None:
+            session_export = self._exportSession()
         procs = []
         count = min(test_count, self.procs)
+        if self.elastic:
+            # the pool grows from there as load and memory allow
+            count = min(count, self.minProcs)
         log.debug("Creating %i worker processes", count)
-        for _ in range(0, count):
-            parent_conn, child_conn = self._prepConns()
-            proc = MP_CTX.Process(target=procserver, args=(session_export, child_conn))
-            proc.daemon = True
-            proc.start()
-            parent_conn = self._acceptConns(parent_conn)
-            procs.append((proc, parent_conn))
+        cpuSets = self._pinning(count)
+        for index in range(0, count):
+            cpus = cpuSets[index] if cpuSets else None
+            procs.append(self._startProc(session_export, cpus))
         return procs
 
+    def _pinning(self, count):
+        """Return the CPU set to pin each of ``count`` workers to, or ``None``."""
+        if not self.pinCpus:
+            return None
+        cpus = _allowedCpus()
+        if not cpus or not hasattr(os, "sched_setaffinity"):
+            log.warning("CPU pinning is not supported on this platform")
+            return None
+        return _cpuSets(cpus, count)
+
+    def _preimport(self):
+        """Import the ``preload`` modules once, for all worker processes.
+
+        With ``forkserver``, the server process imports them and each
+        worker is forked from it. With ``fork``, the modules are imported
+        here before workers are forked. Worker processes started with
+        ``spawn`` import everything themselves.
+        """
+        method = self.context.get_start_method()
+        if method == "forkserver":
+            self.context.set_forkserver_preload(
+                ["__main__", __name__, *self.preloadModules]
+            )
+        elif method == "fork":
+            for name in self.preloadModules:
+                try:
+                    importlib.import_module(name)
+                except Exception:
+                    log.exception("Unable to preload module %s", name)
+        elif self.preloadModules:
+            log.warning("Modules are not preloaded with start method %s", method)
+
+    def _workerReady(self, conn, message):
+        started = self._startTimes.pop(conn, None)
+        if started is not None:
+            self.startupTimes.append(message["ready"] - started)
+
+    def _startProc(self, session_export, cpus=None):
+        parent_conn, child_conn = self._prepConns()
+        ring = None
+        if self.resultTransport == "shared-memory":
+            ring = _ResultRing.create(int(self.resultBufferSize * 2**20))
+        proc = self.context.Process(
+            target=procserver,
+            args=(session_export, child_conn, ring and ring.name),
+        )
+        proc.daemon = True
+        started = time.time()
+        proc.start()
+        if isinstance(child_conn, connection.Connection):
+            # only the child should hold its end of the pipe, so that the
+            # parent sees EOF if the child dies
+            child_conn.close()
+        if cpus:
+            try:
+                os.sched_setaffinity(proc.pid, cpus)
+            except OSError as exc:
+                log.warning(
+                    "Could not pin worker %s to CPUs %s: %s", proc.pid, cpus, exc
+                )
+        parent_conn = self._acceptConns(parent_conn)
+        if ring is not None:
+            parent_conn = _RingConnection(parent_conn, ring)
+        self._startTimes[parent_conn] = started
+        if cpus:
+            self._cpuSets[parent_conn] = cpus
+        return proc, parent_conn
+
     def _flatten(self, suite):
         """
         Flatten test-suite into list of IDs, AND record all test case
@@ -232,36 +1097,104 @@ class MultiProcess(events.Plugin):
                  tests to find out if they have class or module fixtures and
                  group them that way into name of test classes or module.
                  This is aid in their dispatch.
+
+        Each top-level layer suite is kept whole, so that a worker sets up
+        its layers only once, and is named after its layer. Classes that
+        opt in to splitting are split into chunks by :meth:`_split`.
         """
         log.debug("Flattening test into list of IDs")
         mods = {}
         classes = {}
+        layered: dict[str, list[str]] = {}
         stack = [suite]
         while stack:
             suite = stack.pop()
             for test in suite:
-                if isinstance(test, unittest.TestSuite):
+                if isinstance(test, LayerSuite) and test.layer is not None:
+                    unit = _layerName(test.layer)
+                    # errors in layer fixtures are reported against the suite
+                    self.cases[util.test_name(test)] = test
+                    for case in _iterTests(test):
+                        testid = util.test_name(case)
+                        self.cases[testid] = case
+                        layered.setdefault(unit, []).append(testid)
+                        self.layerUnits.setdefault(unit, [])
+                        module = case.__class__.__module__
+                        if module not in self.layerUnits[unit]:
+                            self.layerUnits[unit].append(module)
+                    # layers with the same name run together
+                    self.unitTests.setdefault(unit, []).append(test)
+                elif isinstance(test, unittest.TestSuite):
                     stack.append(test)
                 else:
                     testid = util.test_name(test)
                     self.cases[testid] = test
-                    if util.has_module_fixtures(test):
-                        mods.setdefault(test.__class__.__module__, []).append(testid)
-                    elif util.has_class_fixtures(test):
-                        # testclasses support
-                        if test.__class__.__name__ == "_MethodTestCase":
-                            test = test.obj
-                        classes.setdefault(
-                            "%s.%s"
-                            % (test.__class__.__module__, test.__class__.__name__),
-                            [],
-                        ).append(testid)
-                    else:
+                    group = util.fixture_group(test)
+                    if group is None:
                         yield testid
-
-        yield from sorted(classes.keys())
+                        continue
+                    if group == test.__class__.__module__:
+                        mods.setdefault(group, []).append(testid)
+                    else:
+                        classes.setdefault(group, []).append(testid)
+                    self.unitTests.setdefault(group, []).append(test)
+
+        self.units.update(layered)
+        yield from layered
+        for group in sorted(classes):
+            for unit, testids in self._split(group, classes[group]):
+                self.units[unit] = testids
+                yield unit
+        self.units.update(mods)
         yield from sorted(mods.keys())
 
+    def _split(self, group, testids):
+        """Split the tests of a fixture class into chunks to run in parallel.
+
+        Classes are only split if they have a true ``split_fixtures``
+        attribute, or if their name matches one of the ``split-classes``
+        patterns. Each chunk runs the class fixtures again. Chunks are made
+        to take about ``chunk-duration`` seconds, judging by the test
+        durations in the durations file, or the run time of the class spread
+        over all worker processes if that isn't set. Without any recorded
+        durations, the tests are split evenly between worker processes.
+
+        Returns ``(unit, testids)`` pairs: the chunks, named ``group#n``, or
+        the whole class if it is not split.
+        """
+        if not _get_attr(self.cases[testids[0]], "split_fixtures") and not any(
+            fnmatch.fnmatchcase(group, pattern) for pattern in self.splitClasses
+        ):
+            return [(group, testids)]
+        if self.durations.path:
+            self.durations.load()
+        if self.durations.tests:
+            costs = [self.durations.estimate(testid, [testid]) for testid in testids]
+            target = self.chunkDuration or sum(costs) / self.procs
+        else:
+            costs = [1.0] * len(testids)
+            target = math.ceil(len(testids) / self.procs)
+        chunks: list[list[str]] = [[]]
+        elapsed = 0.0
+        for testid, cost in zip(testids, costs):
+            if chunks[-1] and elapsed + cost > target:
+                chunks.append([])
+                elapsed = 0.0
+            chunks[-1].append(testid)
+            elapsed += cost
+        if len(chunks) == 1:
+            return [(group, testids)]
+        log.debug("Splitting %s into %d chunks", group, len(chunks))
+        tests = self.unitTests.pop(group)
+        split = []
+        for index, chunk in enumerate(chunks, 1):
+            unit = f"{group}#{index}"
+            self.chunks[unit] = chunk
+            self.unitTests[unit] = tests[: len(chunk)]
+            del tests[: len(chunk)]
+            split.append((unit, chunk))
+        return split
+
     def _localize(self, event):
         # XXX set loader, case, result etc to local ones, if present in event
         # (event case will be just the id)
@@ -291,6 +1224,13 @@ class MultiProcess(events.Plugin):
                     message = unittest.case._subtest_msg_sentinel
                 event.test = unittest.case._SubTest(event.test, message, params)
 
+    def _workerPluginClasses(self):
+        event = RegisterInSubprocessEvent()
+        # fire registerInSubprocess on plugins -- add those plugin classes
+        # CAVEAT: classes must be pickleable!
+        self.session.hooks.registerInSubprocess(event)
+        return event.pluginClasses
+
     def _exportSession(self):
         """
         Generate the session information passed to work process.
@@ -310,19 +1250,256 @@ class MultiProcess(events.Plugin):
             "startDir": self.session.startDir,
             "topLevelDir": self.session.topLevelDir,
             "logLevel": self.session.logLevel,
-            "pluginClasses": [],
+            "pluginClasses": self._workerPluginClasses(),
         }
-        event = RegisterInSubprocessEvent()
-        # fire registerInSubprocess on plugins -- add those plugin classes
-        # CAVEAT: classes must be pickleable!
-        self.session.hooks.registerInSubprocess(event)
-        export["pluginClasses"].extend(event.pluginClasses)
+        export["testTimeout"] = self.testTimeout
+        export["startMethod"] = self.context.get_start_method()
+        # subprocesses only need to send events that some plugin here wants
+        export["recordedHooks"] = self.replayedHooks.union(
+            method for method, hook in self.session.hooks.hooks.items() if hook.plugins
+        )
+        export["layers"] = {
+            unit: (modules, self.units[unit])
+            for unit, modules in self.layerUnits.items()
+        }
+        export["chunks"] = self.chunks
+        if self._preloadIndex:
+            # not pickleable, but forked processes don't need to pickle it
+            export["preloaded"] = self._preloaded
         return export
 
 
-def procserver(session_export, conn):
+def _parseResources(lines):
+    """Parse ``name = capacity`` lines into a dict of resource capacities"""
+    capacities = {}
+    for line in lines:
+        name, _, capacity = line.partition("=")
+        try:
+            capacities[name.strip()] = max(1, int(capacity or 1))
+        except ValueError:
+            raise ValueError(f"Invalid resource capacity: {line!r}")
+    return capacities
+
+
+def _parseAddress(address, option):
+    """Parse a ``HOST:PORT`` address, or return ``None`` if it is empty"""
+    if not address or not address.strip():
+        return None
+    host, sep, port = address.strip().rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Invalid {option} address {address!r}: expected host:port")
+    return (host or "127.0.0.1", int(port))
+
+
+def _wireVersion():
+    """Versions that coordinators and remote workers must agree on"""
+    return {
+        "nose2": nose2.__version__,
+        "wire": WIRE_VERSION,
+        "python": list(sys.version_info[:2]),
+    }
+
+
+def _processMemory(pid):
+    """Return the resident set size of process ``pid`` in bytes.
+
+    Returns ``None`` where this can't be read, which is everywhere but Linux.
+    """
+    try:
+        with open(f"/proc/{pid}/statm") as fh:
+            pages = int(fh.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _allowedCpus():
+    """Return the sorted ids of the CPUs this process may run on.
+
+    Returns ``None`` where the affinity mask can't be read.
+    """
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return None
+
+
+def _cgroupFile(v2name, controller, v1name, root, proc_cgroup):
+    """Find the cgroup file that limits this process.
+
+    Returns a ``(version, path)`` tuple, or ``None`` if there is none. The
+    cgroup's own directory is tried before the root of the hierarchy, which
+    is where containers usually mount it.
+    """
+    try:
+        with open(proc_cgroup) as fh:
+            lines = fh.read().splitlines()
+    except OSError:
+        return None
+    candidates = []
+    for line in lines:
+        parts = line.split(":", 2)
+        if len(parts) != 3:
+            continue
+        _, controllers, path = parts
+        path = path.lstrip("/")
+        if not controllers:
+            for base in (os.path.join(root, path), root):
+                candidates.append((2, os.path.join(base, v2name)))
+        elif controller in controllers.split(","):
+            for mount in (controllers, controller):
+                for subdir in (path, ""):
+                    candidate = os.path.join(root, mount, subdir, v1name)
+                    candidates.append((1, candidate))
+    for version, candidate in candidates:
+        if os.path.isfile(candidate):
+            return version, candidate
+    return None
+
+
+def _cgroupCpuLimit(root="/sys/fs/cgroup", proc_cgroup="/proc/self/cgroup"):
+    """Return the number of CPUs' worth of time this process's cgroup allows.
+
+    Returns ``None`` if there is no quota, or it can't be read.
+    """
+    found = _cgroupFile("cpu.max", "cpu", "cpu.cfs_quota_us", root, proc_cgroup)
+    if found is None:
+        return None
+    version, path = found
+    try:
+        with open(path) as fh:
+            quota = fh.read().split()
+        if version == 1:
+            period = os.path.join(os.path.dirname(path), "cpu.cfs_period_us")
+            with open(period) as fh:
+                quota += fh.read().split()
+        if quota[0] in ("max", "-1"):
+            return None
+        return int(quota[0]) / int(quota[1])
+    except (OSError, ValueError, IndexError, ZeroDivisionError):
+        return None
+
+
+def _cgroupMemoryLimit(root="/sys/fs/cgroup", proc_cgroup="/proc/self/cgroup"):
+    """Return the memory limit of this process's cgroup in bytes.
+
+    Returns ``None`` if there is no limit, or it can't be read.
+    """
+    found = _cgroupFile(
+        "memory.max", "memory", "memory.limit_in_bytes", root, proc_cgroup
+    )
+    if found is None:
+        return None
+    try:
+        with open(found[1]) as fh:
+            value = fh.read().strip()
+        # cgroup v1 reports "no limit" as a huge page-aligned number
+        if value == "max" or int(value) >= 2**62:
+            return None
+        return int(value)
+    except (OSError, ValueError):
+        return None
+
+
+def _availableMemory():
+    """Return the memory available to this process in bytes, or ``None``."""
+    limits = [_cgroupMemoryLimit()]
+    try:
+        limits.append(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES"))
+    except (AttributeError, ValueError, OSError):
+        pass
+    limits = [limit for limit in limits if limit]
+    return min(limits) if limits else None
+
+
+def _systemLoad(loadavg="/proc/loadavg"):
+    """Return the one minute load average per allowed CPU, or ``None``."""
+    try:
+        with open(loadavg) as fh:
+            load = float(fh.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        try:
+            load = os.getloadavg()[0]
+        except (AttributeError, OSError):
+            return None
+    cpus = len(_allowedCpus() or ()) or os.cpu_count() or 1
+    limit = _cgroupCpuLimit()
+    if limit is not None:
+        cpus = min(cpus, limit)
+    return load / max(cpus, 1)
+
+
+def _freeMemory(
+    meminfo="/proc/meminfo", root="/sys/fs/cgroup", proc_cgroup="/proc/self/cgroup"
+):
+    """Return the memory that can still be used, in bytes, or ``None``.
+
+    This is the memory the kernel reports as available, capped by what is
+    left under the memory limit of this process's cgroup.
+    """
+    free = []
+    try:
+        with open(meminfo) as fh:
+            for line in fh:
+                if line.startswith("MemAvailable:"):
+                    free.append(int(line.split()[1]) * 1024)
+                    break
+    except (OSError, ValueError, IndexError):
+        pass
+    limit = _cgroupMemoryLimit(root, proc_cgroup)
+    found = _cgroupFile(
+        "memory.current", "memory", "memory.usage_in_bytes", root, proc_cgroup
+    )
+    if limit is not None and found is not None:
+        try:
+            with open(found[1]) as fh:
+                free.append(limit - int(fh.read().strip()))
+        except (OSError, ValueError):
+            pass
+    return min(free) if free else None
+
+
+def _autoProcs(memory_per_process=0):
+    """Return the number of worker processes to start when ``processes = 0``.
+
+    This is the number of CPUs in this process's affinity mask, capped by the
+    CPU quota of its cgroup and, if ``memory_per_process`` (in MB) is given,
+    by the memory available for that many workers.
+    """
+    cpus = _allowedCpus()
+    if cpus:
+        count = len(cpus)
+    else:
+        count = os.cpu_count() or 1
+    limit = _cgroupCpuLimit()
+    if limit is not None:
+        count = min(count, max(1, math.ceil(limit)))
+    if memory_per_process > 0:
+        memory = _availableMemory()
+        if memory is not None:
+            count = min(count, max(1, memory // (memory_per_process * 2**20)))
+    return count
+
+
+def _cpuSets(cpus, count):
+    """Split ``cpus`` into ``count`` distinct, contiguous CPU sets.
+
+    With more sets than CPUs, CPUs are shared round-robin.
+    """
+    size, extra = divmod(len(cpus), count)
+    sets = []
+    start = 0
+    for index in range(count):
+        end = start + size + (index < extra)
+        sets.append(cpus[start:end] or [cpus[index % len(cpus)]])
+        start = end
+    return sets
+
+
+def procserver(session_export, conn, ring=None):
     # init logging system
-    rlog = MP_CTX.log_to_stderr()
+    context = multiprocessing.get_context(session_export.get("startMethod"))
+    rlog = context.log_to_stderr()
     rlog.setLevel(session_export["logLevel"])
 
     # make a real session from the "session" we got
@@ -330,6 +1507,9 @@ def procserver(session_export, conn):
 
     if isinstance(conn, Sequence):
         conn = connection.Client(conn[:2], authkey=conn[2])
+    if ring is not None:
+        # results go through the main process's shared memory ring buffer
+        conn = _RingConnection(conn, _ResultRing.attach(ring))
 
     event = SubprocessEvent(
         ssn.testLoader, ssn.testResult, ssn.testRunner, ssn.plugins, conn
@@ -340,35 +1520,823 @@ def procserver(session_export, conn):
         conn.close()
         ssn.hooks.stopSubprocess(event)
         return
+    # tell the main process how long this process took to start
+    conn.send({"ready": time.time()})
     # receive and run tests
     executor = event.executeTests
-    for testid in gentests(conn):
-        if testid is None:
-            break
-        # XXX to handle weird cases like layers, need to
-        # deal with the case that testid is something other
-        # than a simple string.
+    # tests loaded by the main process before it forked this one
+    preloaded = session_export.get("preloaded")
+    # modules and test ids of the layers the main process found
+    layerUnits = session_export.get("layers", {})
+    # test ids of the chunks that fixture classes were split into
+    chunks = dict(session_export.get("chunks", {}))
+    watchdog = _Watchdog(session_export.get("testTimeout", 0.0))
+    watchdog.onTimeout = lambda test, timeout: _timedOut(
+        rlog, ssn, event, conn, watchdog, test, timeout
+    )
+    ssn.hooks.register("startTest", watchdog)
+    ssn.hooks.register("stopTest", watchdog)
+    stops = _StopRequests(conn, event.result)
+    ssn.hooks.register("stopTest", stops)
+    for batch in gentests(conn, stops.pending):
+        if isinstance(batch, dict):
+            if "collect" in batch:
+                conn.send({"collected": _collectTests(ssn, batch["collect"])})
+            elif "chunks" in batch:
+                chunks.update(batch["chunks"])
+            else:
+                stops.handle(batch)
+            continue
+        if event.result.shouldStop:
+            # the test run is over: skip batches that were queued
+            continue
+        # a batch of test ids gets one message with all of its results
+        if isinstance(batch, list):
+            results = watchdog.results = []
+            for tid in batch:
+                if event.result.shouldStop:
+                    break
+                results.append(
+                    _runTest(
+                        rlog,
+                        ssn,
+                        event,
+                        executor,
+                        tid,
+                        preloaded,
+                        watchdog,
+                        layerUnits,
+                        chunks,
+                    )
+                )
+            _sendResults(rlog, conn, results)
+        else:
+            watchdog.results = None
+            result = _runTest(
+                rlog,
+                ssn,
+                event,
+                executor,
+                batch,
+                preloaded,
+                watchdog,
+                layerUnits,
+                chunks,
+            )
+            _sendResults(rlog, conn, result)
+    conn.send(None)
+    conn.close()
+    ssn.hooks.stopSubprocess(event)
+
+
+def _collectTests(ssn, names):
+    """Load the tests of the modules ``names`` for the main process.
+
+    Returns a description of each test, with what the main process needs
+    to dispatch and report it. Failures to load a module are described
+    with their exception, to be reported by the main process.
+    """
+    tests = []
+    for name in names:
+        for test in _iterTests(ssn.testLoader.loadTestsFromName(name)):
+            if not getattr(test, "__test__", True):
+                continue
+            if test.__class__.__module__ == loader.__name__:
+                # a load failure made by the test loader
+                method = getattr(test, test._testMethodName)
+                try:
+                    method()
+                except Exception as exc:
+                    try:
+                        pickle.dumps(exc)
+                    except Exception:
+                        exc = Exception(str(exc))
+                    failure = (test.__class__.__name__, test._testMethodName, exc)
+                    tests.append({"failure": failure})
+                continue
+            attrs = {}
+            for attr in ("mp_resources", "split_fixtures"):
+                value = _get_attr(test, attr)
+                if value is not None:
+                    attrs[attr] = value
+            tests.append(
+                {
+                    "id": test.id(),
+                    "name": util.test_name(test),
+                    "module": test.__class__.__module__,
+                    "str": str(test),
+                    "doc": test.shortDescription(),
+                    "group": util.fixture_group(test),
+                    "attrs": attrs,
+                }
+            )
+    # loading isn't reported to the main process, which didn't load them
+    ssn.hooks.flush()
+    return tests
+
+
+def _runTest(
+    rlog,
+    ssn,
+    event,
+    executor,
+    testid,
+    preloaded=None,
+    watchdog=None,
+    layerUnits=None,
+    chunks=None,
+):
+    if isinstance(testid, int):
+        # index of a preloaded test: no need to load it again
+        testid, tests = preloaded[testid]
+        test = event.loader.suiteClass(tests)
+    elif layerUnits and testid in layerUnits:
+        modules, testids = layerUnits[testid]
+        test = _loadLayer(ssn, event.loader, testid, modules, testids)
+    elif chunks and testid in chunks:
+        # one suite, so that the class fixtures run once for the chunk
+        test = event.loader.loadTestsFromNames(chunks[testid])
+    else:
         test = event.loader.loadTestsFromName(testid)
-        # XXX If there a need to protect the loop? try/except?
-        rlog.debug("Execute test %s (%s)", testid, test)
-        executor(test, event.result)
-        events = list(ssn.hooks.flush())
+    if watchdog is not None:
+        watchdog.testid = testid
+    # XXX If there a need to protect the loop? try/except?
+    rlog.debug("Execute test %s (%s)", testid, test)
+    executor(test, event.result)
+    # the class and module fixtures of this test have been torn down;
+    # don't let unittest tear them down again before the next test
+    event.result._previousTestClass = None
+    return (testid, list(ssn.hooks.flush()))
+
+
+def _loadLayer(ssn, loader, unit, modules, testids):
+    """Load the tests of the layer named ``unit`` and rebuild its suite.
+
+    The ids of tests made with the such DSL have spaces in them and can't be
+    loaded by name, so the modules the tests come from are loaded instead,
+    and only the tests with ids in ``testids`` are kept.
+    """
+    wanted = set(testids)
+    tests = [
+        test
+        for test in _iterTests(loader.loadTestsFromNames(modules))
+        if util.test_name(test) in wanted
+    ]
+    suite = layers.Layers(session=ssn).make_suite(
+        loader.suiteClass(tests), loader.suiteClass
+    )
+    return loader.suiteClass(
+        layer for layer in _layerSuites(suite) if _layerName(layer.layer) == unit
+    )
+
+
+def _layerName(layer):
+    return f"{layer.__module__}.{layer.__qualname__}"
+
+
+def _layerSuites(suite):
+    """Yield the top-level layer suites in ``suite``"""
+    for test in suite:
+        if isinstance(test, LayerSuite):
+            yield test
+        elif isinstance(test, unittest.BaseTestSuite):
+            yield from _layerSuites(test)
+
+
+def _iterTests(tests):
+    for test in tests:
+        if isinstance(test, unittest.BaseTestSuite):
+            yield from _iterTests(test)
+        else:
+            yield test
+
+
+def _sendResults(rlog, conn, results):
+    try:
+        if isinstance(results, list):
+            conn.send(_encodeResults(results))
+        else:
+            conn.send(_encodeResults([results]))
+        rlog.debug("Log for %s returned", results)
+    except Exception:
+        rlog.exception(f"Fail sending events {results}")
+        # Send empty event lists to unblock the conn.recv on main process.
+        if isinstance(results, list):
+            conn.send([(testid, []) for testid, _ in results])
+        else:
+            conn.send((results[0], []))
+
+
+# Results are sent to the main process in a compact binary format: a
+# header, the test ids used in the message, one fixed-width record for each
+# unit and each event, and a pickled list of the events that don't fit a
+# record. Only the startTest, setTestOutcome, testOutcome and stopTest
+# events of tests that pass, fail or are skipped without further detail
+# fit a record.
+WIRE_VERSION = 1
+# version, number of records, size of the test ids
+_HEADER = struct.Struct("<BII")
+# kind, string index, event index, outcome code, timestamp
+_RECORD = struct.Struct("<BIIBd")
+_UNIT, _START, _SET_OUTCOME, _OUTCOME, _STOP, _REPEAT, _PICKLED = range(7)
+_HOOKS = ("", "startTest", "setTestOutcome", "testOutcome", "stopTest")
+_KINDS = {hook: kind for kind, hook in enumerate(_HOOKS) if hook}
+_OUTCOMES = (result.PASS, result.FAIL, result.SKIP)
+_OUTCOME_CODES = {outcome: code for code, outcome in enumerate(_OUTCOMES)}
+_START_ATTRS = {"test", "result", "startTime", "handled", "metadata"}
+_STOP_ATTRS = {"test", "result", "stopTime", "handled", "metadata"}
+_OUTCOME_ATTRS = {
+    "test",
+    "result",
+    "outcome",
+    "exc_info",
+    "reason",
+    "expected",
+    "shortLabel",
+    "longLabel",
+    "handled",
+    "metadata",
+}
+
+
+def _compactKind(hook, event):
+    """Return the record kind for ``event``, or ``None`` to pickle it"""
+    kind = _KINDS.get(hook)
+    if kind is None or event.handled or event.metadata:
+        return None
+    if isinstance(event.test, unittest.case._SubTest):
+        return None
+    attrs = event.__dict__.keys()
+    if kind == _START:
+        return kind if attrs == _START_ATTRS else None
+    if kind == _STOP:
+        return kind if attrs == _STOP_ATTRS else None
+    if (
+        attrs == _OUTCOME_ATTRS
+        and event.outcome in _OUTCOME_CODES
+        and event.exc_info is None
+        and event.reason is None
+        and event.shortLabel is None
+        and event.longLabel is None
+    ):
+        return kind
+    return None
+
+
+def _encodeResults(results):
+    """Encode a list of ``(testid, events)`` results for the main process"""
+    strings: dict[str, int] = {}
+    records = []
+    pickled: list = []
+    # the index of each event already sent, by id
+    sent: dict[int, int] = {}
+
+    def intern(string):
+        index = strings.get(string)
+        if index is None:
+            index = strings[string] = len(strings)
+        return index
+
+    pack = _RECORD.pack
+    for testid, unit_events in results:
+        records.append(pack(_UNIT, intern(testid), 0, 0, 0.0))
+        for hook, event in unit_events:
+            index = sent.get(id(event))
+            if index is not None:
+                # the same event was recorded by more than one hook
+                records.append(pack(_REPEAT, intern(hook), index, 0, 0.0))
+                continue
+            sent[id(event)] = len(sent)
+            kind = _compactKind(hook, event)
+            if kind is None:
+                records.append(pack(_PICKLED, 0, len(pickled), 0, 0.0))
+                pickled.append((hook, event))
+                continue
+            testid = intern(util.test_name(event.test))
+            if kind == _START:
+                records.append(pack(kind, testid, 0, 0, event.startTime))
+            elif kind == _STOP:
+                records.append(pack(kind, testid, 0, 0, event.stopTime))
+            else:
+                code = _OUTCOME_CODES[event.outcome] << 1 | bool(event.expected)
+                records.append(pack(kind, testid, 0, code, 0.0))
+    names = "\0".join(strings).encode("utf-8")
+    return b"".join(
+        [
+            _HEADER.pack(WIRE_VERSION, len(records), len(names)),
+            names,
+            *records,
+            pickle.dumps(pickled, pickle.HIGHEST_PROTOCOL) if pickled else b"",
+        ]
+    )
+
+
+def _decodeResults(data):
+    """Decode results encoded by :func:`_encodeResults`"""
+    version, count, size = _HEADER.unpack_from(data)
+    if version != WIRE_VERSION:
+        raise ValueError(f"Unsupported result format version {version}")
+    start = _HEADER.size
+    strings = str(data[start : start + size], "utf-8").split("\0")
+    start += size
+    end = start + count * _RECORD.size
+    pickled = pickle.loads(data[end:]) if len(data) > end else []
+    results: list = []
+    decoded: list = []
+    unit_events: list = []
+    for kind, string, index, code, stamp in _RECORD.iter_unpack(data[start:end]):
+        if kind == _UNIT:
+            unit_events = []
+            results.append((strings[string], unit_events))
+            continue
+        if kind == _REPEAT:
+            unit_events.append((strings[string], decoded[index]))
+            continue
+        if kind == _PICKLED:
+            hook, event = pickled[index]
+        elif kind == _START:
+            hook = _HOOKS[kind]
+            event = events.StartTestEvent(strings[string], None, stamp)
+        elif kind == _STOP:
+            hook = _HOOKS[kind]
+            event = events.StopTestEvent(strings[string], None, stamp)
+        else:
+            hook = _HOOKS[kind]
+            event = events.TestOutcomeEvent(
+                strings[string], None, _OUTCOMES[code >> 1], expected=bool(code & 1)
+            )
+        decoded.append(event)
+        unit_events.append((hook, event))
+    return results
+
+
+class _ResultRing:
+    """A ring buffer in shared memory for the results of one worker.
+
+    The worker writes each message after its length, and the main process
+    reads the messages in the same order. The buffer starts with how many
+    bytes the main process has read so far, so that the worker knows how
+    much room is left, and the size of the ring. How far the worker has
+    written is sent to the main process along with each message.
+    """
+
+    # how far the main process has read, and the size of the ring
+    _HEADER = struct.Struct("<QQ")
+    _READ = struct.Struct("<Q")
+    _LENGTH = struct.Struct("<I")
+    # marks the end of the ring where a message didn't fit
+    _WRAP = 0xFFFFFFFF
+
+    def __init__(self, shm, owner) -> None:
+        self.shm = shm
+        self.owner = owner
+        self.name = shm.name
+        self.buf = shm.buf
+        self.size = self._HEADER.unpack_from(self.buf)[1]
+        # how far this end has written or read
+        self.offset = 0
+
+    @classmethod
+    def create(cls, size):
+        """Create a ring with room for ``size`` bytes of messages"""
+        size = max(size, 2**16)
+        shm = shared_memory.SharedMemory(create=True, size=cls._HEADER.size + size)
+        cls._HEADER.pack_into(shm.buf, 0, 0, size)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to the ring created by the main process as ``name``"""
+        if sys.version_info >= (3, 13):
+            return cls(shared_memory.SharedMemory(name, track=False), owner=False)
+        if os.name != "posix":
+            return cls(shared_memory.SharedMemory(name), owner=False)
+        # the resource tracker, which is shared with the main process,
+        # would unlink the memory when this process exits
+        from multiprocessing import resource_tracker
+
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
         try:
-            conn.send((testid, events))
-            rlog.debug("Log for %s returned", testid)
-        except Exception:
-            rlog.exception(f"Fail sending event {testid}: {events}")
-            # Send empty event list to unblock the conn.recv on main process.
-            conn.send((testid, []))
+            return cls(shared_memory.SharedMemory(name), owner=False)
+        finally:
+            resource_tracker.register = register
+
+    def write(self, data):
+        """Write a message.
+
+        Returns how far the ring has been written, or ``None`` if there
+        isn't room for the message.
+        """
+        need = self._LENGTH.size + len(data)
+        position = self.offset % self.size
+        skip = self.size - position if self.size - position < need else 0
+        end = self.offset + skip + need
+        if need > self.size or end - self._READ.unpack_from(self.buf)[0] > self.size:
+            return None
+        start = self._HEADER.size
+        if skip:
+            if skip >= self._LENGTH.size:
+                self._LENGTH.pack_into(self.buf, start + position, self._WRAP)
+            position = 0
+        start += position
+        self.buf[start + self._LENGTH.size : start + need] = data
+        self._LENGTH.pack_into(self.buf, start, len(data))
+        self.offset = end
+        return end
+
+    def read(self):
+        """Return a view of the next message in the shared memory.
+
+        Its room is given back to the worker by :meth:`release`.
+        """
+        position = self.offset % self.size
+        start = self._HEADER.size + position
+        if (
+            self.size - position < self._LENGTH.size
+            or self._LENGTH.unpack_from(self.buf, start)[0] == self._WRAP
+        ):
+            start = self._HEADER.size
+        (length,) = self._LENGTH.unpack_from(self.buf, start)
+        start += self._LENGTH.size
+        return self.buf[start : start + length]
+
+    def release(self, end):
+        """Give back the room of messages the worker wrote up to ``end``"""
+        self.offset = end
+        self._READ.pack_into(self.buf, 0, end)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class _RingConnection:
+    """A worker connection that carries results in a :class:`_ResultRing`.
+
+    Encoded results are written to the ring, and only how far it has been
+    written goes through the connection, as a short message that isn't
+    pickled. Every other message, and results that don't fit in the ring,
+    go through the connection as usual.
+    """
+
+    # a pickle never starts with this byte
+    _NOTICE = struct.Struct("<cQ")
+
+    def __init__(self, conn, ring) -> None:
+        self.conn = conn
+        self.ring = ring
+
+    def send(self, obj):
+        if isinstance(obj, bytes):
+            end = self.ring.write(obj)
+            if end is not None:
+                self.conn.send_bytes(self._NOTICE.pack(b"R", end))
+                return
+        self.conn.send(obj)
+
+    def recv(self):
+        message = self.conn.recv_bytes()
+        if len(message) != self._NOTICE.size or message[:1] != b"R":
+            return ForkingPickler.loads(message)
+        end = self._NOTICE.unpack(message)[1]
+        with self.ring.read() as data:
+            results = _decodeResults(data)
+        self.ring.release(end)
+        return results
+
+    def close(self):
+        self.conn.close()
+        self.ring.close()
+
+    def __getattr__(self, attr):
+        return getattr(self.conn, attr)
+
+
+class _ModuleCollector:
+    """Keep discovery from importing test modules in the main process.
+
+    Registered for :func:`matchPath` after other plugins, it takes each
+    module that matches the test file pattern, and records its name for
+    worker processes to import instead.
+    """
+
+    def __init__(self) -> None:
+        self.modules: list[str] = []
+
+    def matchPath(self, event):
+        if not fnmatch.fnmatch(event.name, event.pattern):
+            return
+        name, package_path = util.name_from_path(event.path)
+        util.ensure_importable(package_path)
+        self.modules.append(name)
+        event.handled = True
+        return False
+
+
+class _CollectedTest(unittest.TestCase):
+    """Stand-in for a test that a worker process collected.
+
+    It has the id, description and attributes of the test, which is never
+    loaded in the main process.
+    """
+
+    def __init__(self, info) -> None:
+        super().__init__()
+        self._id = info["id"]
+        # util.test_name uses this
+        self._funcName = info["name"]
+        self._str = info["str"]
+        self._doc = info["doc"]
+        # util.fixture_group uses this
+        self._fixtureGroup = info["group"]
+        for attr, value in info["attrs"].items():
+            setattr(self, attr, value)
+
+    def id(self):
+        return self._id
+
+    def shortDescription(self):
+        return self._doc
+
+    def __str__(self):
+        return self._str
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._id}>"
+
+    def __eq__(self, other):
+        return isinstance(other, _CollectedTest) and self._id == other._id
+
+    def __hash__(self):
+        return hash(self._id)
+
+
+def _timedOut(rlog, ssn, event, conn, watchdog, test, timeout):
+    """Report a test that ran out of time, and end this process.
+
+    Called from the watchdog thread, while the test is still running.
+    """
+    exc = exceptions.TestTimeoutError(
+        f"{util.test_name(test)} did not finish within {timeout} seconds"
+    )
+    detail = "Stacks of all threads at timeout:\n\n%s\n%s" % (
+        _dumpStacks(),
+        "".join(traceback.format_exception_only(type(exc), exc)),
+    )
+    outcome = events.TestOutcomeEvent(
+        test,
+        event.result,
+        result.ERROR,
+        (type(exc), exc, detail),
+        shortLabel="T",
+        longLabel="TIMEOUT",
+    )
+    ssn.hooks.setTestOutcome(outcome)
+    ssn.hooks.testOutcome(outcome)
+    event.result.stopTest(test)
+    unit = (watchdog.testid, list(ssn.hooks.flush()))
+    if watchdog.results is None:
+        _sendResults(rlog, conn, unit)
+    else:
+        _sendResults(rlog, conn, watchdog.results + [unit])
     conn.send(None)
     conn.close()
-    ssn.hooks.stopSubprocess(event)
+    try:
+        ssn.hooks.stopSubprocess(event)
+    finally:
+        # the test is still running and can't be stopped any other way
+        os._exit(1)
+
+
+def _isTimeout(event):
+    exc_info = event.exc_info
+    return bool(exc_info) and exc_info[0] is exceptions.TestTimeoutError
+
+
+def _dumpStacks():
+    with tempfile.TemporaryFile("w+") as fh:
+        faulthandler.dump_traceback(fh, all_threads=True)
+        fh.seek(0)
+        return fh.read()
+
+
+def _testResources(test):
+    names = _get_attr(test, "mp_resources")
+    if isinstance(names, str):
+        return (names,)
+    try:
+        names = tuple(names)
+    except TypeError:
+        return ()
+    # ignore anything that isn't a list of resource names
+    if not all(isinstance(name, str) for name in names):
+        return ()
+    return names
+
+
+def _testTimeout(test, default):
+    timeout = _get_attr(test, "mp_timeout")
+    # ignore anything that isn't a number of seconds
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)):
+        return default
+    return float(timeout)
+
+
+class _Watchdog:
+    """Enforce test timeouts in a test runner process.
+
+    Registered for the :func:`startTest` and :func:`stopTest` hooks, it
+    calls ``onTimeout(test, timeout)`` from a separate thread if a test
+    does not stop before its timeout. The timeout of a test is its
+    ``mp_timeout`` attribute, or the default ``timeout`` if it has none. A
+    timeout of 0 means no timeout.
+    """
+
+    def __init__(self, timeout) -> None:
+        self.timeout = timeout
+        self.onTimeout: t.Callable[[t.Any, float], t.Any] | None = None
+        # the unit being run and the results of the batch so far
+        self.testid: str | None = None
+        self.results: list | None = None
+        self._cond = threading.Condition()
+        self._test = None
+        self._testTimeout = 0.0
+        self._deadline: float | None = None
+        self._thread: threading.Thread | None = None
+
+    def startTest(self, event):
+        timeout = _testTimeout(event.test, self.timeout)
+        if not timeout:
+            return
+        with self._cond:
+            self._test = event.test
+            self._testTimeout = timeout
+            self._deadline = time.monotonic() + timeout
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def stopTest(self, event):
+        with self._cond:
+            self._test = self._deadline = None
+
+    def _watch(self):
+        with self._cond:
+            while True:
+                if self._deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                # stopTest waits for this to finish, so the test can't
+                # be reported twice
+                self.onTimeout(self._test, self._testTimeout)
+                return
+
+
+class _WorkerListener:
+    """Accept remote workers in the background.
+
+    Each connection is authenticated and waits for the worker's greeting
+    in a thread of its own, so that a peer that connects and says nothing
+    -- a port scanner, or a health check -- can't hold up the test run.
+    Peers that fail authentication, or don't greet within ``timeout``
+    seconds, are dropped.
+
+    The listener can be passed to :func:`select.select`, and is readable
+    when :meth:`accepted` has workers to return.
+    """
+
+    def __init__(self, address, authkey, timeout) -> None:
+        self.authkey = authkey
+        self.timeout = timeout
+        # the challenge is answered in the handshake threads instead
+        self._listener = connection.Listener(address)
+        self.address = self._listener.address
+        self._lock = threading.Lock()
+        self._greeted: deque = deque()
+        self._handshaking: set = set()
+        self._closed = False
+        self._wakeup, self._notify = os.pipe()
+        threading.Thread(
+            target=self._accept, name="nose2-mp-listener", daemon=True
+        ).start()
+
+    def fileno(self):
+        return self._wakeup
+
+    def accepted(self):
+        """Return the ``(conn, greeting)`` of workers that have greeted us"""
+        os.read(self._wakeup, 4096)
+        with self._lock:
+            greeted = list(self._greeted)
+            self._greeted.clear()
+        return greeted
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            handshaking = list(self._handshaking)
+            greeted = [conn for conn, _ in self._greeted]
+        try:
+            # wakes up the thread waiting in accept()
+            self._listener._listener._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._listener.close()
+        for conn in handshaking + greeted:
+            conn.close()
+        os.close(self._wakeup)
+        os.close(self._notify)
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except OSError as e:
+                if self._closed:
+                    return
+                log.warning("Unable to accept remote worker: %s", e)
+                continue
+            threading.Thread(
+                target=self._handshake,
+                args=(conn, self._listener.last_accepted),
+                daemon=True,
+            ).start()
+
+    def _handshake(self, conn, peer):
+        with self._lock:
+            if self._closed:
+                conn.close()
+                return
+            self._handshaking.add(conn)
+        try:
+            connection.deliver_challenge(conn, self.authkey)
+            connection.answer_challenge(conn, self.authkey)
+            if not conn.poll(self.timeout):
+                raise EOFError("no greeting")
+            greeting = conn.recv()
+        except (OSError, EOFError, multiprocessing.AuthenticationError) as e:
+            log.warning("Rejected remote worker %s: %s", peer, e)
+            with self._lock:
+                self._handshaking.discard(conn)
+            conn.close()
+            return
+        log.info("Remote worker connected: %s", peer)
+        with self._lock:
+            self._handshaking.discard(conn)
+            if self._closed:
+                conn.close()
+                return
+            self._greeted.append((conn, greeting))
+            os.write(self._notify, b"\0")
+
+
+class _StopRequests:
+    """Watch for the main process telling a worker to stop its test run.
+
+    The worker's connection is checked after each test. A stop request makes
+    the worker's test result stop, like a fail-fast plugin would, so that
+    the tests still to run in its fixture group and batch are skipped.
+    Batches and other messages read while looking for a stop request are
+    kept in ``pending`` to be handled in order.
+    """
+
+    def __init__(self, conn, result):
+        self.conn = conn
+        self.result = result
+        self.pending: deque = deque()
+
+    def stopTest(self, event):
+        try:
+            while self.conn.poll():
+                message = self.conn.recv()
+                if isinstance(message, dict) and "stop" in message:
+                    self.handle(message)
+                else:
+                    # batches, and the chunks they need, are kept in order
+                    self.pending.append(message)
+        except (EOFError, OSError):
+            pass
+
+    def handle(self, message):
+        if message.get("stop"):
+            self.result.shouldStop = True
 
 
 def import_session(rlog, session_export):
     ssn = session.Session()
     ssn.config = session_export["config"]
-    ssn.hooks = RecordingPluginInterface()
+    ssn.hooks = RecordingPluginInterface(session_export.get("recordedHooks"))
     ssn.verbosity = session_export["verbosity"]
     ssn.startDir = session_export["startDir"]
     ssn.topLevelDir = session_export["topLevelDir"]
@@ -399,10 +2367,14 @@ def import_session(rlog, session_export):
 
 
 # test generator
-def gentests(conn):
+def gentests(conn, pending=None):
     while True:
         try:
-            testid = conn.recv()
+            if pending:
+                # messages read early, while a test was running
+                testid = pending.popleft()
+            else:
+                testid = conn.recv()
             if testid is None:
                 return
             yield testid
@@ -494,9 +2466,11 @@ class RecordingPluginInterface(events.PluginInterface):
         "getTestMethodNames",
     }
 
-    def __init__(self) -> None:
+    def __init__(self, recordedMethods=None) -> None:
         super().__init__()
         self.events: list[tuple[t.Callable[..., t.Any], events.Event]] = []
+        # if set, only these methods are recorded
+        self.recordedMethods = recordedMethods
 
     def log(self, method, event):
         self.events.append((method, event))
@@ -523,11 +2497,18 @@ class RecordingPluginInterface(events.PluginInterface):
     def _hookForMethod(self, method):
         # return recording hook for most hooks, normal hook for those
         # (like test loading and subprocess events) that we don't want
-        # to send back to the main process.
+        # to send back to the main process, or that no plugin there uses.
         try:
             return self.hooks[method]
         except KeyError:
-            if method in self.noLogMethods or method.startswith("loadTest"):
+            if (
+                method in self.noLogMethods
+                or method.startswith("loadTest")
+                or (
+                    self.recordedMethods is not None
+                    and method not in self.recordedMethods
+                )
+            ):
                 hook = events.Hook(method)
             else:
                 hook = self.hookClass(method, self)
@@ -29,6 +29,7 @@ runs to ``exit(1)``).
 from __future__ import annotations
 
 import sys
+import threading
 import unittest
 
 from nose2 import events, result, util
@@ -64,6 +65,8 @@ class ResultReporter(events.Plugin):
 
         self.stream = util._WritelnDecorator(sys.stderr)
         self.descriptions = self.config.as_bool("descriptions", True)
+        # starts of tests running in threads, reported with their outcomes
+        self._started: dict[int, events.Event] = {}
 
     def startTest(self, event):
         """Handle startTest hook
@@ -71,6 +74,11 @@ class ResultReporter(events.Plugin):
         - prints test description if verbosity > 1
         """
         self.testsRun += 1
+        if util.in_worker_thread():
+            # report it along with its outcome, so that the lines of tests
+            # running side by side don't mix
+            self._started[threading.get_ident()] = event
+            return
         self._reportStartTest(event)
 
     def testOutcome(self, event):
@@ -82,7 +90,10 @@ class ResultReporter(events.Plugin):
           etc)
 
         """
-        if not event.result.test_started:
+        started = self._started.pop(threading.get_ident(), None)
+        if started is not None:
+            self._reportStartTest(started)
+        elif not event.result.test_started:
             self._show_test_description(self.stream, event.test)
 
         if event.outcome == result.ERROR:
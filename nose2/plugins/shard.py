@@ -0,0 +1,252 @@
+"""
+Split a test run across several machines.
+
+Pass :option:`--shard` ``INDEX/TOTAL`` to run only the tests in one of
+``TOTAL`` shards of the suite, numbered from 1. Every machine must load
+the same tests, and each one runs a different shard::
+
+    nose2 --plugin nose2.plugins.shard --shard 2/4
+
+Tests that share class or module fixtures are kept in the same shard, so
+their fixtures run only once. Shards are otherwise made to be about the
+same size. If a ``durations-file`` is set in the ``[shard]`` section of a
+config file, durations of the tests that run are saved to it, and the
+next test run uses them to give shards about the same expected run time:
+
+.. code-block:: ini
+
+   [shard]
+   durations-file = .nose2-durations.json
+
+The shards of a test run can write their JUnit XML reports and durations
+files to different paths. To merge them into one report, and one durations
+file for the next test run, use::
+
+    python -m nose2.plugins.shard junit-xml nose2-junit.xml shard-*.xml
+    python -m nose2.plugins.shard durations .nose2-durations.json shard-*.json
+
+This plugin implements :func:`startTestRun` to remove the tests of other
+shards from the suite, and :func:`startTest` and :func:`stopTest` to record
+test durations.
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import unittest
+from xml.etree import ElementTree as ET
+
+from nose2 import events, util
+from nose2._durations import Durations
+
+log = logging.getLogger(__name__)
+__unittest = True
+
+
+class Shard(events.Plugin):
+    """Run one shard of the test suite"""
+
+    configSection = "shard"
+
+    def __init__(self) -> None:
+        self.addArgument(
+            self.setShard,
+            None,
+            "shard",
+            "Run only shard INDEX of TOTAL shards of the tests, as INDEX/TOTAL",
+        )
+        self.index, self.total = parseShard(self.config.as_str("shard", "1/1"))
+        durations_file = self.config.as_str("durations-file", "")
+        if durations_file and not os.path.isabs(durations_file):
+            durations_file = os.path.join(os.getcwd(), durations_file)
+        self.durations = Durations(durations_file)
+        self.selected = 0
+        self.loaded = 0
+        # the fixture group of each test that runs, and when each group
+        # started and stopped
+        self._groups: dict[str, str] = {}
+        self._groupTimes: dict[str, list[float]] = {}
+        self._started: dict[str, float] = {}
+
+    def setShard(self, shard):
+        self.index, self.total = parseShard(shard[0])
+        self.register()
+
+    def startTestRun(self, event):
+        """Remove tests that belong to other shards"""
+        units: dict[str, list[str]] = {}
+        for test in _iterTests(event.suite):
+            testid = util.test_name(test)
+            group = util.fixture_group(test)
+            units.setdefault(group or testid, []).append(testid)
+            if group is not None:
+                self._groups[testid] = group
+        if self.durations.path:
+            self.durations.load()
+        if self.durations.tests or self.durations.groups:
+            cost = self.durations.estimate
+        else:
+
+            def cost(unit, tests):
+                return len(tests)
+
+        shards = partition(units, self.total, cost)
+        keep = {testid for unit in shards[self.index - 1] for testid in units[unit]}
+        self.loaded = sum(len(tests) for tests in units.values())
+        self.selected = len(keep)
+        log.debug(
+            "Shard %s/%s: %s of %s tests",
+            self.index,
+            self.total,
+            self.selected,
+            self.loaded,
+        )
+        _removeTests(event.suite, keep)
+
+    def startTest(self, event):
+        """Record when the test started"""
+        testid = util.test_name(event.test)
+        self._started[testid] = event.startTime
+        group = self._groups.get(testid)
+        if group is not None:
+            self._groupTimes.setdefault(group, [event.startTime, event.startTime])
+
+    def stopTest(self, event):
+        """Record how long the test took"""
+        testid = util.test_name(event.test)
+        started = self._started.pop(testid, None)
+        if started is None or not self.durations.path:
+            return
+        self.durations.record(testid, event.stopTime - started)
+        group = self._groups.get(testid)
+        if group is not None:
+            self._groupTimes[group][1] = event.stopTime
+
+    def stopTestRun(self, event):
+        """Save durations of the tests that ran"""
+        if not self.durations.path:
+            return
+        for group, (first, last) in self._groupTimes.items():
+            self.durations.recordGroup(group, last - first)
+        self.durations.save()
+
+    def beforeSummaryReport(self, event):
+        """Report which shard ran"""
+        if self.session.verbosity > 0:
+            event.stream.writeln(
+                "Shard %d/%d: ran %d of %d tests"
+                % (self.index, self.total, self.selected, self.loaded)
+            )
+
+
+def parseShard(shard):
+    """Parse an ``INDEX/TOTAL`` shard spec into a pair of ints"""
+    try:
+        index, total = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {shard!r}: expected INDEX/TOTAL")
+    if not 1 <= index <= total:
+        raise ValueError(f"Invalid shard {shard!r}: INDEX must be 1 to TOTAL")
+    return index, total
+
+
+def partition(units, total, cost):
+    """Split ``units`` into ``total`` shards of about the same cost.
+
+    ``units`` maps unit ids to the test ids in each unit, and
+    ``cost(unit, tests)`` estimates the cost of a unit. The result is
+    deterministic: the costliest units are placed first, each in the
+    cheapest shard so far, with ties broken by unit id and shard number.
+    """
+    costs = {unit: cost(unit, tests) for unit, tests in units.items()}
+    loads = [0.0] * total
+    shards: list[list[str]] = [[] for _ in range(total)]
+    for unit in sorted(units, key=lambda unit: (-costs[unit], unit)):
+        shard = min(range(total), key=lambda index: (loads[index], index))
+        shards[shard].append(unit)
+        loads[shard] += costs[unit]
+    return shards
+
+
+def _iterTests(suite):
+    for test in suite:
+        if isinstance(test, unittest.BaseTestSuite):
+            yield from _iterTests(test)
+        else:
+            yield test
+
+
+def _removeTests(suite, keep):
+    """Remove tests not in ``keep`` from ``suite``, and suites left empty"""
+    for test in list(suite):
+        if isinstance(test, unittest.BaseTestSuite):
+            _removeTests(test, keep)
+            if not test.countTestCases():
+                suite._tests.remove(test)
+        elif util.test_name(test) not in keep:
+            suite._tests.remove(test)
+
+
+def mergeJunitXml(output, paths):
+    """Merge the JUnit XML reports in ``paths`` into ``output``"""
+    tree = ET.Element("testsuite")
+    totals = dict.fromkeys(("errors", "failures", "skipped", "tests"), 0)
+    elapsed = 0.0
+    for path in paths:
+        root = ET.parse(path).getroot()
+        for key in totals:
+            totals[key] += int(root.get(key, 0))
+        elapsed = max(elapsed, float(root.get("time", 0)))
+        tree.extend(root.iter("testcase"))
+    tree.set("name", "nose2-junit")
+    for key, value in totals.items():
+        tree.set(key, str(value))
+    # shards run side by side: the merged run took as long as the slowest
+    tree.set("time", "%.3f" % elapsed)
+    ET.indent(tree)
+    ET.ElementTree(tree).write(output, encoding="utf-8")
+
+
+def mergeDurations(output, paths):
+    """Merge the durations files in ``paths`` into ``output``.
+
+    When several files have a duration for the same test or fixture group,
+    the most recent one is kept.
+    """
+    merged = Durations(output)
+    merged._loaded = True
+    for path in paths:
+        durations = Durations(path)
+        durations.load()
+        for mine, theirs in (
+            (merged.tests, durations.tests),
+            (merged.groups, durations.groups),
+        ):
+            for key, value in theirs.items():
+                if key not in mine or value[1] > mine[key][1]:
+                    mine[key] = value
+    merged.save()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m nose2.plugins.shard",
+        description="Merge the reports of the shards of a test run",
+    )
+    parser.add_argument("kind", choices=("junit-xml", "durations"))
+    parser.add_argument("output", help="File to write the merged report to")
+    parser.add_argument("inputs", nargs="+", help="Reports of each shard")
+    args = parser.parse_args(argv)
+    if args.kind == "junit-xml":
+        mergeJunitXml(args.output, args.inputs)
+    else:
+        mergeDurations(args.output, args.inputs)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
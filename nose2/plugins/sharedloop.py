@@ -0,0 +1,208 @@
+"""
+Run async tests concurrently on one event loop.
+
+Each :class:`unittest.IsolatedAsyncioTestCase` normally runs on an event
+loop of its own, one test after another. Tests that spend most of their
+time awaiting I/O can instead share one event loop and run side by side.
+Opt tests in by setting a ``shared_loop`` attribute to ``True`` on their
+class, or at the top of their module::
+
+  class TestService(unittest.IsolatedAsyncioTestCase):
+      shared_loop = True
+
+      async def test_request(self):
+          ...
+
+Then run nose2 with :option:`--shared-loop`. At most ``concurrency`` tests
+(10 by default) run at a time:
+
+.. code-block:: ini
+
+   [shared-loop]
+   always-on = True
+   concurrency = 50
+
+Opted-in tests run after all other tests. Tests that share class or
+module fixtures still run one after the other. Each test's ``setUp``,
+test method, ``tearDown`` and cleanups are run as tasks on the shared loop
+with the test's own :mod:`contextvars` context, and its outcome and timing
+are reported through the usual plugin hooks. Tasks that tests leave behind
+are cancelled when all tests have run.
+
+The output buffer and log capture plugins don't capture output from
+coroutines, which all run in the event loop's thread. This plugin needs
+Python 3.11 or newer; with older versions, opted-in tests run one after
+another as usual.
+
+This plugin implements :func:`startTestRun`, to replace
+``event.executeTests``, and :func:`beforeInteraction`, to keep interactive
+plugins like the debugger from stopping other tests.
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import sys
+import threading
+import unittest
+
+from nose2 import events, util
+from nose2.plugins.attrib import _get_attr
+from nose2.plugins.threads import ThreadResult
+
+log = logging.getLogger(__name__)
+__unittest = True
+
+
+class SharedLoop(events.Plugin):
+    """Run async tests concurrently on one event loop"""
+
+    configSection = "shared-loop"
+    commandLineSwitch = (
+        None,
+        "shared-loop",
+        "Run opted-in async tests concurrently on one event loop",
+    )
+
+    def __init__(self) -> None:
+        self.concurrency = max(1, self.config.as_int("concurrency", 10))
+
+    def startTestRun(self, event):
+        """Run opted-in tests on a shared event loop"""
+        if sys.version_info < (3, 11):
+            log.warning("Running async tests on a shared loop needs Python 3.11")
+            return
+        event.executeTests = self._run
+
+    def beforeInteraction(self, event):
+        """Don't stop other tests for interaction"""
+        if util.in_worker_thread():
+            event.handled = True
+            return False
+
+    def _run(self, test, result):
+        units = list(self._units(test).values())
+        test(result)
+        if not units or result.shouldStop:
+            return
+        log.debug("Running %d units on a shared event loop", len(units))
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(
+            target=loop.run_forever, name="nose2-shared-loop", daemon=True
+        )
+        thread.start()
+        lock = threading.RLock()
+        try:
+            with concurrent.futures.ThreadPoolExecutor(
+                self.concurrency, thread_name_prefix="nose2-async-test"
+            ) as pool:
+                futures = [
+                    pool.submit(self._runUnit, unit, result, lock, loop)
+                    for unit in units
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            asyncio.run_coroutine_threadsafe(_shutdown(loop), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def _runUnit(self, unit, result, lock, loop):
+        if result.shouldStop:
+            return
+        for test in unit:
+            _useLoop(test, loop)
+        with util.worker_thread():
+            unit(ThreadResult(result, lock))
+
+    def _units(self, suite):
+        """Take opted-in tests out of ``suite``.
+
+        Returns them as suites to run concurrently, one for each fixture
+        group or test.
+        """
+        units: dict[str, unittest.TestSuite] = {}
+        for test in list(suite):
+            if isinstance(test, unittest.BaseTestSuite):
+                for key, unit in self._units(test).items():
+                    units.setdefault(key, unittest.TestSuite()).addTests(unit)
+            elif _optedIn(test):
+                key = util.fixture_group(test) or util.test_name(test)
+                units.setdefault(key, unittest.TestSuite()).addTest(test)
+                suite._tests.remove(test)
+        return units
+
+
+def _optedIn(test):
+    if not isinstance(test, unittest.IsolatedAsyncioTestCase):
+        return False
+    opted = _get_attr(test, "shared_loop")
+    if opted is None:
+        module = sys.modules.get(test.__class__.__module__)
+        opted = getattr(module, "shared_loop", False)
+    return bool(opted)
+
+
+def _useLoop(test, loop):
+    """Make an IsolatedAsyncioTestCase run its coroutines on ``loop``"""
+    runner = _SharedLoopRunner(loop)
+
+    def setup():
+        test._asyncioRunner = runner
+
+    def teardown():
+        test._asyncioRunner = None
+
+    test._setupAsyncioRunner = setup
+    test._tearDownAsyncioRunner = teardown
+
+
+class _SharedLoopRunner:
+    """Stand-in for the :class:`asyncio.Runner` of a test.
+
+    Runs each coroutine as a task on the shared loop, and waits for it in
+    the thread that runs the test.
+    """
+
+    def __init__(self, loop) -> None:
+        self.loop = loop
+
+    def get_loop(self):
+        asyncio.set_event_loop(self.loop)
+        return self.loop
+
+    def run(self, coro, context=None):
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        def done(task):
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+
+        def start():
+            task = self.loop.create_task(coro, context=context)
+            task.add_done_callback(done)
+
+        self.loop.call_soon_threadsafe(start)
+        return future.result()
+
+    def close(self):
+        pass
+
+
+async def _shutdown(loop):
+    """Cancel the tasks that tests left running"""
+    tasks = [
+        task for task in asyncio.all_tasks(loop) if task is not asyncio.current_task()
+    ]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await loop.shutdown_asyncgens()
@@ -0,0 +1,205 @@
+"""
+Run tests side by side in a pool of threads.
+
+Tests that spend their time waiting -- on sockets, subprocesses or
+databases -- can run in threads of a single process instead of in the
+worker processes of the :doc:`mp plugin <mp>`, which each import the code
+under test again. Pass :option:`--threads` or set ``threads`` in the
+``[threads]`` section of a config file to the number of threads to use:
+
+.. code-block:: ini
+
+   [threads]
+   always-on = True
+   threads = 8
+
+With ``threads = 0``, the number of threads is chosen by
+:class:`concurrent.futures.ThreadPoolExecutor`.
+
+Tests that share class or module fixtures run one after the other in the
+same thread, as do the tests of a layer. Tests and test classes with a
+``thread_safe`` attribute set to ``False`` are run in the main thread once
+all other tests have finished, one at a time::
+
+  class TestSignals(unittest.TestCase):
+      thread_safe = False
+
+Plugin hooks are called for one test at a time, so plugins don't have to
+be thread-safe. The output buffer and log capture plugins keep the output
+and log messages of each thread apart, and the test result plugin reports
+each test as it finishes. Only the tests themselves run concurrently, which
+on a free-threaded build of Python includes their CPU-bound work.
+
+This plugin implements :func:`startTestRun`, to replace
+``event.executeTests``, and :func:`beforeInteraction`, to keep interactive
+plugins like the debugger from stopping tests in other threads.
+
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from nose2 import events, result, suite, util
+from nose2.plugins.attrib import _get_attr
+
+log = logging.getLogger(__name__)
+__unittest = True
+
+
+class Threads(events.Plugin):
+    """Run tests in a pool of threads"""
+
+    configSection = "threads"
+
+    def __init__(self) -> None:
+        self.addArgument(
+            self.setThreads,
+            None,
+            "threads",
+            "Number of threads used to run tests (0 = auto)",
+        )
+        self.threads = self.config.as_int("threads", 0)
+
+    def setThreads(self, num):
+        self.threads = int(num[0])
+        if self.threads < 0:
+            raise ValueError("Number of threads cannot be less than 0")
+        self.register()
+
+    def startTestRun(self, event):
+        """Run tests in threads"""
+        event.executeTests = self._run
+
+    def beforeInteraction(self, event):
+        """Don't stop tests running in threads for interaction"""
+        if util.in_worker_thread():
+            event.handled = True
+            return False
+
+    def _run(self, test, result_):
+        units, serial = self._units(test)
+        log.debug(
+            "Running %d units in threads, %d in the main thread",
+            len(units),
+            len(serial),
+        )
+        lock = threading.RLock()
+        with ThreadPoolExecutor(
+            self.threads or None, thread_name_prefix="nose2-test"
+        ) as pool:
+            futures = [
+                pool.submit(self._runUnit, unit, result_, lock) for unit in units
+            ]
+            for future in futures:
+                future.result()
+        for unit in serial:
+            if result_.shouldStop:
+                break
+            unit(result_)
+
+    def _runUnit(self, unit, result_, lock):
+        if result_.shouldStop:
+            return
+        with util.worker_thread():
+            unit(ThreadResult(result_, lock))
+
+    def _units(self, test):
+        """Split ``test`` into suites that can run side by side.
+
+        Returns the suites to run in threads, and those to run in the main
+        thread afterwards. Each fixture group and each layer is one suite.
+        """
+        units: dict[str, unittest.TestSuite] = {}
+        unsafe = set()
+        for key, test, safe in self._iterUnits(test):
+            units.setdefault(key, unittest.TestSuite()).addTest(test)
+            if not safe:
+                unsafe.add(key)
+        threaded = [unit for key, unit in units.items() if key not in unsafe]
+        serial = [unit for key, unit in units.items() if key in unsafe]
+        return threaded, serial
+
+    def _iterUnits(self, tests):
+        for test in tests:
+            if isinstance(test, suite.LayerSuite):
+                yield f"layer:{id(test)}", test, True
+            elif isinstance(test, unittest.BaseTestSuite):
+                yield from self._iterUnits(test)
+            else:
+                key = util.fixture_group(test) or util.test_name(test)
+                yield key, test, _get_attr(test, "thread_safe") is not False
+
+
+class ThreadResult(result.PluggableTestResult):
+    """Test result for the tests run in one thread.
+
+    Tests report to a result of their own, so that the fixture bookkeeping
+    unittest keeps in test results isn't shared between threads. Plugin
+    hooks are called with ``lock`` held, one test at a time, and stopping
+    this result stops the test run. A stopped test run can't be started
+    again from a thread.
+
+    :param main: The result of the test run.
+    :param lock: Lock shared by the results of all threads.
+
+    """
+
+    def __init__(self, main, lock) -> None:
+        self.main = main
+        self.lock = lock
+        super().__init__(main.session)
+        self.failfast = main.failfast
+
+    @property
+    def shouldStop(self):
+        return self.main.shouldStop
+
+    @shouldStop.setter
+    def shouldStop(self, value):
+        # PluggableTestResult.__init__ sets it to False
+        if value:
+            self.main.shouldStop = True
+
+    def startTest(self, test):
+        with self.lock:
+            super().startTest(test)
+
+    def stopTest(self, test):
+        with self.lock:
+            super().stopTest(test)
+
+    def addError(self, test, err):
+        with self.lock:
+            super().addError(test, err)
+
+    def addFailure(self, test, err):
+        with self.lock:
+            super().addFailure(test, err)
+
+    def addSubTest(self, test, subtest, err):
+        with self.lock:
+            super().addSubTest(test, subtest, err)
+
+    def addSuccess(self, test):
+        with self.lock:
+            super().addSuccess(test)
+
+    def addSkip(self, test, reason):
+        with self.lock:
+            super().addSkip(test, reason)
+
+    def addExpectedFailure(self, test, err):
+        with self.lock:
+            super().addExpectedFailure(test, err)
+
+    def addUnexpectedSuccess(self, test):
+        with self.lock:
+            super().addUnexpectedSuccess(test)
+
+    def stop(self):
+        with self.lock:
+            super().stop()
@@ -8,6 +8,73 @@ log = logging.getLogger(__name__)
 
 __unittest = True
 
+#
+# Streaming suite class
+#
+
+
+class StreamingSuite(unittest.TestSuite):
+    """Test suite that loads its tests as they are needed.
+
+    Tests are taken from ``tests`` -- usually a generator that discovers
+    them -- only when the suite is iterated or run, so the first tests run
+    while later ones are still being loaded. Anything that needs all the
+    tests, like :meth:`countTestCases`, loads the rest of them first.
+
+    :param tests: Iterable of tests and suites.
+
+    """
+
+    def __init__(self, tests=()) -> None:
+        super().__init__()
+        self._pending = iter(tests)
+        self._filters: list = []
+
+    @property
+    def loading(self):
+        """Whether some tests have yet to be loaded"""
+        return self._pending is not None
+
+    def addFilter(self, keep):
+        """Remove tests for which ``keep(test)`` is false.
+
+        Tests already loaded are filtered at once, and the rest as they
+        are loaded.
+        """
+        self._filters.append(keep)
+        self._tests = [test for test in self._tests if test is None or keep(test)]
+
+    def countTestCases(self):
+        for _ in self:
+            pass
+        return super().countTestCases()
+
+    def __repr__(self):
+        # only the tests loaded so far, so that logging doesn't load them all
+        cls = self.__class__
+        loading = " loading" if self.loading else ""
+        return f"<{cls.__module__}.{cls.__qualname__} tests={self._tests!r}{loading}>"
+
+    def __iter__(self):
+        index = 0
+        while True:
+            while index < len(self._tests):
+                yield self._tests[index]
+                index += 1
+            if not self._loadNext():
+                return
+
+    def _loadNext(self):
+        if self._pending is None:
+            return False
+        for test in self._pending:
+            if all(keep(test) for keep in self._filters):
+                self.addTest(test)
+                return True
+        self._pending = None
+        return False
+
+
 #
 # Layer suite class
 #
@@ -20,6 +87,11 @@ class LayerSuite(unittest.BaseTestSuite):
         self.wasSetup = False
         self.session = session
 
+    def id(self):
+        if self.layer is None:
+            return self.__class__.__name__
+        return f"{self.layer.__module__}.{self.layer.__qualname__}"
+
     def run(self, result):
         self.handle_previous_test_teardown(result)
         if not self._safeMethodCall(self.setUp, result):
@@ -287,6 +287,9 @@ class Conn:
     def send(self, item):
         self.sent.append(item)
 
+    def poll(self):
+        return bool(self.items) and not self.closed
+
     def close(self):
         self.closed = True
 
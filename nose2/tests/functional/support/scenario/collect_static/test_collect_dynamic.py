@@ -0,0 +1,7 @@
+def test_generator():
+    for value in (1, 2):
+        yield check, value
+
+
+def check(value):
+    pass
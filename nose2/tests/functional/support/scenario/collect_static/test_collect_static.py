@@ -0,0 +1,25 @@
+import unittest
+
+from nose2.tools import params
+
+
+class Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    def test_case(self):
+        """A test case method"""
+
+    @params(1, 2)
+    def test_params(self, value):
+        pass
+
+
+class TestClass:
+    def test_method(self):
+        pass
+
+
+def test_function():
+    pass
@@ -0,0 +1,18 @@
+import os
+import unittest
+
+with open(os.environ["NOSE2_COLLECT_LOG"], "a") as fh:
+    fh.write(f"{os.getpid()}\n")
+
+
+class Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.ready = True
+
+    def test_ready(self):
+        """Class fixtures ran"""
+        self.assertTrue(self.ready)
+
+    def test_fails(self):
+        self.fail("as expected")
@@ -0,0 +1,21 @@
+import os
+import unittest
+
+with open(os.environ["NOSE2_COLLECT_LOG"], "a") as fh:
+    fh.write(f"{os.getpid()}\n")
+
+
+class Test(unittest.TestCase):
+    def test_one(self):
+        pass
+
+    def test_two(self):
+        with self.subTest(n=2):
+            self.assertEqual(2, 3)
+
+
+class NotATest(unittest.TestCase):
+    __test__ = False
+
+    def test_not_run(self):
+        self.fail("should not run")
@@ -0,0 +1,19 @@
+import os
+import unittest
+
+
+class Test(unittest.TestCase):
+    def test_ok(self):
+        pass
+
+    def test_crash(self):
+        os._exit(3)
+
+    def test_crash_once(self):
+        marker = os.environ.get("NOSE2_CRASH_MARKER")
+        if marker and not os.path.exists(marker):
+            open(marker, "w").close()
+            os._exit(4)
+
+    def test_ok_too(self):
+        pass
@@ -0,0 +1,19 @@
+import time
+import unittest
+
+
+class Test(unittest.TestCase):
+    pass
+
+
+def _failing(index):
+    def test(self):
+        time.sleep(0.1)
+        self.fail(f"broken {index}")
+
+    test.__name__ = f"test_{index:02d}"
+    return test
+
+
+for _index in range(40):
+    setattr(Test, f"test_{_index:02d}", _failing(_index))
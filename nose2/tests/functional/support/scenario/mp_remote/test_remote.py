@@ -0,0 +1,25 @@
+import os
+import time
+import unittest
+
+
+class Test(unittest.TestCase):
+    pass
+
+
+def _make_test(index):
+    def test(self):
+        # record which kind of worker ran this test
+        log_dir = os.environ.get("NOSE2_REMOTE_LOG")
+        if log_dir:
+            path = os.path.join(log_dir, "test_%02d" % index)
+            with open(path, "w") as fh:
+                fh.write(os.environ.get("NOSE2_WORKER_KIND", "local"))
+        time.sleep(0.05)
+
+    test.__name__ = "test_%02d" % index
+    return test
+
+
+for _index in range(20):
+    setattr(Test, "test_%02d" % _index, _make_test(_index))
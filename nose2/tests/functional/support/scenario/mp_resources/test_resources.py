@@ -0,0 +1,36 @@
+import os
+import tempfile
+import time
+import unittest
+
+# worker processes share their parent, and so this path
+LOCK = os.path.join(tempfile.gettempdir(), "nose2-mp-resources-%d" % os.getppid())
+
+
+class TestPort(unittest.TestCase):
+    mp_resources = "port"
+
+    def setUp(self):
+        # fails if another test holds the port
+        os.close(os.open(LOCK, os.O_CREAT | os.O_EXCL))
+        self.addCleanup(os.remove, LOCK)
+
+    def test_1(self):
+        time.sleep(0.05)
+
+    def test_2(self):
+        time.sleep(0.05)
+
+    def test_3(self):
+        time.sleep(0.05)
+
+    def test_4(self):
+        time.sleep(0.05)
+
+
+def test_free_1():
+    time.sleep(0.05)
+
+
+def test_free_2():
+    time.sleep(0.05)
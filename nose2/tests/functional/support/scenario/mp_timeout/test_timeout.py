@@ -0,0 +1,36 @@
+import time
+import unittest
+
+
+class Test(unittest.TestCase):
+    mp_timeout = 0.5
+
+    def test_ok(self):
+        pass
+
+    def test_hang(self):
+        print("hanging")
+        time.sleep(60)
+
+    def test_ok_too(self):
+        pass
+
+    def test_ok_again(self):
+        pass
+
+
+class Fixtures(unittest.TestCase):
+    mp_timeout = 0.5
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    def test_a(self):
+        pass
+
+    def test_b_hang(self):
+        time.sleep(60)
+
+    def test_c(self):
+        pass
@@ -0,0 +1,46 @@
+import asyncio
+import contextvars
+import unittest
+
+shared_loop = True
+
+current: contextvars.ContextVar[str] = contextvars.ContextVar("current")
+# tests wait until all of them have started: they pass only if they run
+# at the same time
+started = 0
+all_started = None
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        global all_started, started
+        if all_started is None:
+            all_started = asyncio.Event()
+        current.set(self.id())
+        started += 1
+        if started == 4:
+            all_started.set()
+
+    async def _check(self):
+        await asyncio.wait_for(all_started.wait(), 5)
+        self.assertEqual(current.get(), self.id())
+
+    async def test_1(self):
+        await self._check()
+
+    async def test_2(self):
+        await self._check()
+
+    async def test_3(self):
+        await self._check()
+
+    async def test_fail(self):
+        await self._check()
+        self.fail("failing on purpose")
+
+
+class TestNotOptedIn(unittest.IsolatedAsyncioTestCase):
+    shared_loop = False
+
+    async def test_own_loop(self):
+        self.assertIsNot(asyncio.get_running_loop(), all_started and all_started._loop)
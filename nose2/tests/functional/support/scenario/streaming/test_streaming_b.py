@@ -0,0 +1,15 @@
+import os
+import unittest
+
+
+def record(event):
+    with open(os.environ["NOSE2_STREAMING_LOG"], "a") as fh:
+        fh.write(f"{event} {__name__}\n")
+
+
+record("imported")
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        record("ran")
@@ -0,0 +1,38 @@
+import os
+import unittest
+
+
+class Test(unittest.TestCase):
+    split_fixtures = True
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pid = os.getpid()
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.pid
+
+    def test_0(self):
+        self.assertEqual(self.pid, os.getpid())
+
+    def test_1(self):
+        self.assertEqual(self.pid, os.getpid())
+
+    def test_2(self):
+        self.assertEqual(self.pid, os.getpid())
+
+    def test_3(self):
+        self.assertEqual(self.pid, os.getpid())
+
+    def test_4(self):
+        self.assertEqual(self.pid, os.getpid())
+
+    def test_5(self):
+        self.assertEqual(self.pid, os.getpid())
+
+    def test_6(self):
+        self.assertEqual(self.pid, os.getpid())
+
+    def test_7(self):
+        self.assertEqual(self.pid, os.getpid())
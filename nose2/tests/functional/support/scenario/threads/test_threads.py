@@ -0,0 +1,52 @@
+import logging
+import threading
+import time
+import unittest
+
+log = logging.getLogger(__name__)
+# passes only if test_1 to test_4 run at the same time
+barrier = threading.Barrier(4, timeout=5)
+
+
+class Test(unittest.TestCase):
+    def _wait(self, name):
+        print("output of %s" % name)
+        log.info("log of %s", name)
+        barrier.wait()
+
+    def test_1(self):
+        self._wait("test_1")
+
+    def test_2(self):
+        self._wait("test_2")
+
+    def test_3(self):
+        self._wait("test_3")
+
+    def test_4(self):
+        self._wait("test_4")
+
+    def test_fail(self):
+        print("output of test_fail")
+        log.info("log of test_fail")
+        time.sleep(0.1)
+        self.fail("failing on purpose")
+
+
+class TestFixtures(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.thread = threading.get_ident()
+
+    def test_same_thread(self):
+        self.assertEqual(threading.get_ident(), self.thread)
+
+    def test_same_thread_too(self):
+        self.assertEqual(threading.get_ident(), self.thread)
+
+
+class TestUnsafe(unittest.TestCase):
+    thread_safe = False
+
+    def test_main_thread(self):
+        self.assertIs(threading.current_thread(), threading.main_thread())
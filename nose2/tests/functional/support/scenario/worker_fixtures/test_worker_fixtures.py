@@ -0,0 +1,32 @@
+import sys
+import unittest
+
+from nose2.tools import worker_fixture
+
+CREATED = []
+
+
+@worker_fixture
+def resource():
+    CREATED.append(object())
+    yield CREATED[-1]
+    CREATED.clear()
+    sys.stderr.write("resource torn down\n")
+
+
+class TestA(unittest.TestCase):
+    def test_1(self):
+        self.assertIs(resource(), CREATED[0])
+
+    def test_2(self):
+        self.assertIs(resource(), CREATED[0])
+
+
+class TestB(unittest.TestCase):
+    def test_1(self):
+        resource()
+        self.assertEqual(len(CREATED), 1)
+
+    def test_2(self):
+        resource()
+        self.assertEqual(len(CREATED), 1)
@@ -1,4 +1,9 @@
+import json
+import os
 import re
+import shutil
+import sys
+import tempfile
 
 from nose2.tests._common import FunctionalTestCase
 
@@ -16,6 +21,53 @@ class CollectOnlyFunctionalTest(FunctionalTestCase):
         )
 
 
+class CollectStaticFunctionalTest(FunctionalTestCase):
+    def setUp(self):
+        self._modules()
+        self.addCleanup(self._modules)
+        work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, work_dir)
+        self.manifest = os.path.join(work_dir, "manifest.json")
+        # output is cached by "pid", which is the id of the in-process
+        # run: keep runs alive so that ids are not reused
+        self.procs = []
+
+    def _modules(self):
+        for name in ("test_collect_static", "test_collect_dynamic"):
+            sys.modules.pop(name, None)
+
+    def _collect(self, *args):
+        proc = self.runIn(
+            "scenario/collect_static",
+            "-v",
+            "--collect-only",
+            "--plugin=nose2.plugins.collect",
+            f"--collect-manifest={self.manifest}",
+            *args,
+        )
+        self.procs.append(proc)
+        self.assertTestRunOutputMatches(proc, stderr="Ran 7 tests")
+        with open(self.manifest) as fh:
+            manifest = json.load(fh)
+        os.remove(self.manifest)
+        return manifest
+
+    def test_collect_static(self):
+        manifest = self._collect("--collect-static")
+        self.assertNotIn("test_collect_static", sys.modules)
+        # generator tests are only known once the module is imported
+        self.assertIn("test_collect_dynamic", sys.modules)
+        self._modules()
+        self.assertEqual(manifest, self._collect())
+        self.assertIn(
+            {
+                "id": "test_collect_static.Test.test_params:2",
+                "group": "test_collect_static.Test",
+            },
+            manifest["tests"],
+        )
+
+
 # expectations
 EXPECT_LAYOUT1 = re.compile(r"""Ran 25 tests in \d.\d+s
 
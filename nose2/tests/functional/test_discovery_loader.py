@@ -1,6 +1,13 @@
 from __future__ import annotations
 
-from nose2 import events, loader, session
+import json
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from nose2 import events, loader, session, util
 from nose2.plugins.loader.discovery import DiscoveryLoader
 from nose2.tests._common import FunctionalTestCase, TestCase, support_file
 
@@ -56,6 +63,27 @@ class DiscoveryFunctionalTest(FunctionalTestCase):
         self.assertEqual(len(result._tests), 0)
         self.assertEqual(len(self.watcher.called), 0)
 
+    def test_packages_are_found_from_directory_listings(self):
+        self.session.startDir = support_file("scenario/tests_in_package")
+        event = events.LoadFromNamesEvent(self.loader, [], None)
+        with mock.patch.object(util, "ispackage", wraps=util.ispackage) as ispackage:
+            self.session.hooks.loadTestsFromNames(event)
+        self.assertEqual(len(self.watcher.called), 1)
+        ispackage.assert_not_called()
+
+    def test_no_file_events_without_plugins(self):
+        self.session.startDir = support_file("scenario/tests_in_package")
+        event = events.LoadFromNamesEvent(self.loader, [], None)
+        with mock.patch.object(
+            events, "HandleFileEvent", wraps=events.HandleFileEvent
+        ) as handle_file:
+            self.session.hooks.loadTestsFromNames(event)
+        self.assertEqual(len(self.watcher.called), 1)
+        # only directories get events
+        paths = [call.args[2] for call in handle_file.call_args_list]
+        self.assertTrue(paths)
+        self.assertTrue(all(os.path.isdir(path) for path in paths))
+
     def test_handle_file_event_can_add_tests(self):
         class TextTest(TestCase):
             def test(self):
@@ -74,3 +102,146 @@ class DiscoveryFunctionalTest(FunctionalTestCase):
         assert isinstance(result, self.loader.suiteClass)
         self.assertEqual(len(result._tests), 2)
         self.assertEqual(len(self.watcher.called), 1)
+
+
+class DiscoveryCacheTest(TestCase):
+    _RUN_IN_TEMP = True
+
+    def setUp(self):
+        super().setUp()
+        self.root = os.path.join(self._work_dir, "project")
+        self._write("tests/__init__.py", "")
+        self._write("tests/test_cached_one.py", TEST_MODULE)
+        self._write("lib/helpers.py", "")
+        self.cache_file = os.path.join(self._work_dir, "cache.json")
+        self._age()
+        # discovered modules are imported from a new directory each test
+        modules = mock.patch.dict(sys.modules)
+        modules.start()
+        self.addCleanup(modules.stop)
+        for name in list(sys.modules):
+            if name.split(".")[0] in ("lib", "tests"):
+                del sys.modules[name]
+        self.addCleanup(setattr, sys, "path", sys.path[:])
+
+    def _write(self, path, content):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as fh:
+            fh.write(content)
+
+    def _age(self, *dirs):
+        # the cache doesn't trust listings of freshly modified directories
+        past = time.time() - 60
+        paths = [os.path.join(self.root, d) for d in dirs]
+        for path in paths or [path for path, _, _ in os.walk(self.root)]:
+            os.utime(path, (past, past))
+
+    def _session(self, **config):
+        ssn = session.Session()
+        ssn.startDir = self.root
+        ssn.topLevelDir = self.root
+        config["cache-file"] = self.cache_file
+        ssn.config.read_dict({"discovery": config})
+        DiscoveryLoader(session=ssn)
+        watcher = Watcher(session=ssn)
+        watcher.register()
+        event = events.LoadFromNamesEvent(loader.PluggableTestLoader(ssn), [], None)
+        return ssn, watcher, event
+
+    def _discover(self):
+        ssn, watcher, event = self._session()
+        with mock.patch.object(os, "scandir", wraps=os.scandir) as scandir:
+            ssn.hooks.loadTestsFromNames(event)
+        listed = {call.args[0] for call in scandir.call_args_list}
+        return sorted(e.module.__name__ for e in watcher.called), listed
+
+    def test_unchanged_directories_are_not_listed_again(self):
+        modules, listed = self._discover()
+        self.assertEqual(modules, ["tests.test_cached_one"])
+        self.assertIn(os.path.join(self.root, "tests"), listed)
+        self.assertTrue(os.path.isfile(self.cache_file))
+        modules, listed = self._discover()
+        self.assertEqual(modules, ["tests.test_cached_one"])
+        self.assertEqual(listed, set())
+
+    def test_modified_directories_are_listed_again(self):
+        self._discover()
+        self._write("tests/test_cached_two.py", TEST_MODULE)
+        self._age("tests")
+        modules, listed = self._discover()
+        self.assertEqual(modules, ["tests.test_cached_one", "tests.test_cached_two"])
+        self.assertEqual(listed, {os.path.join(self.root, "tests")})
+
+    def test_recently_modified_directories_are_not_cached(self):
+        self._write("tests/test_cached_two.py", TEST_MODULE)
+        self._discover()
+        _, listed = self._discover()
+        self.assertEqual(listed, {os.path.join(self.root, "tests")})
+
+    def test_only_directories_that_are_walked_are_listed(self):
+        self._write(".git/objects/info", "")
+        self._write("node_modules/left-pad/index.js", "")
+        self._write("data/test_cached_data.py", TEST_MODULE)
+        self._write("pkg_cached/__init__.py", "")
+        self._write("pkg_cached/test_cached_pkg.py", TEST_MODULE)
+        modules, listed = self._discover()
+        self.assertEqual(
+            modules, ["pkg_cached.test_cached_pkg", "tests.test_cached_one"]
+        )
+        for name in (".git", "node_modules", "data"):
+            self.assertNotIn(os.path.join(self.root, name), listed)
+        self.assertIn(os.path.join(self.root, "pkg_cached"), listed)
+
+    def test_listings_are_saved_if_the_run_stops_during_discovery(self):
+        self._write("tests/more/__init__.py", "")
+        self._write("tests/more/test_cached_more.py", TEST_MODULE)
+        self._age()
+        ssn, _, event = self._session(stream="true")
+        suite = ssn.hooks.loadTestsFromNames(event)
+        next(iter(suite))
+        ssn.hooks.stopTestRun(events.StopTestRunEvent(None, None, 0, 0))
+        with open(self.cache_file) as fh:
+            saved = json.load(fh)["dirs"]
+        self.assertIn(self.root, saved)
+        self.assertIn(os.path.join(self.root, "tests"), saved)
+
+    def test_new_packages_are_found(self):
+        self._discover()
+        self._write("lib/__init__.py", "")
+        self._write("lib/test_cached_lib.py", TEST_MODULE)
+        self._age("lib")
+        modules, _ = self._discover()
+        self.assertEqual(modules, ["lib.test_cached_lib", "tests.test_cached_one"])
+
+
+TEST_MODULE = """\
+import unittest
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        pass
+"""
+
+
+class StreamingDiscoveryTest(FunctionalTestCase):
+    def _run(self, *args):
+        # the scenario's modules record when they are imported
+        for name in ("test_streaming_a", "test_streaming_b"):
+            sys.modules.pop(name, None)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "log")
+            with mock.patch.dict(os.environ, {"NOSE2_STREAMING_LOG": path}):
+                proc = self.runIn("scenario/streaming", *args)
+                self.assertTestRunOutputMatches(proc, stderr="Ran 2 tests")
+            with open(path) as fh:
+                return [line.split()[0] for line in fh]
+
+    def test_tests_run_before_discovery_finishes(self):
+        log = self._run("--config", support_file("cfg/streaming.cfg"))
+        self.assertEqual(log, ["imported", "ran", "imported", "ran"])
+
+    def test_tests_run_after_discovery_by_default(self):
+        log = self._run()
+        self.assertEqual(log, ["imported", "imported", "ran", "ran"])
@@ -1,15 +1,22 @@
+import json
 import multiprocessing
+import os
 import queue
+import select
+import socket
+import subprocess
 import sys
+import tempfile
 import threading
 import time
 import unittest
 from multiprocessing import connection
+from unittest import mock
 
 from nose2 import session
-from nose2.plugins import buffer
+from nose2.plugins import buffer, layers, mp
 from nose2.plugins.loader import discovery, testcases
-from nose2.plugins.mp import MultiProcess, procserver
+from nose2.plugins.mp import MultiProcess, _decodeResults, procserver
 from nose2.tests._common import (
     Conn,
     FunctionalTestCase,
@@ -90,6 +97,21 @@ class TestMpPlugin(FunctionalTestCase):
             ],
         )
 
+    @skip_if_running_in_daemon
+    def test_flatten_keeps_layers_together(self):
+        sys.path.append(support_file("scenario/layers"))
+        import test_layers as mod
+
+        loader = unittest.TestLoader()
+        suite = layers.Layers(session=self.session).make_suite(
+            loader.loadTestsFromModule(mod), unittest.TestSuite
+        )
+
+        flat = list(self.plugin._flatten(suite))
+        self.assertEqual(flat, ["test_layers.NoLayer.test", "test_layers.Base"])
+        self.assertEqual(len(self.plugin.units["test_layers.Base"]), 7)
+        self.assertEqual(self.plugin.layerUnits, {"test_layers.Base": ["test_layers"]})
+
     @skip_if_running_in_daemon
     def test_conn_prep(self):
         self.plugin.bind_host = None
@@ -105,6 +127,57 @@ class TestMpPlugin(FunctionalTestCase):
         self.assertIsInstance(child_conn, tuple)
         self.assertEqual(parent_conn.address, child_conn[:2])
 
+    @skip_if_running_in_daemon
+    def test_accept_worker_rejects_other_versions(self):
+        listener = mp._WorkerListener(("127.0.0.1", 0), b"secret", 5)
+        replies = []
+
+        def fake_worker(address):
+            client = connection.Client(address, authkey=b"secret")
+            client.send(("hello", {"nose2": "0.0.0"}))
+            replies.append(client.recv())
+            client.close()
+
+        t = threading.Thread(target=fake_worker, args=(listener.address,))
+        t.start()
+        select.select([listener], [], [], 5)
+        [(conn, greeting)] = listener.accepted()
+        self.assertIsNone(self.plugin._acceptWorker(conn, greeting, {}))
+        t.join()
+        listener.close()
+        self.assertEqual(replies[0][0], "rejected")
+
+    @skip_if_running_in_daemon
+    def test_worker_listener_is_not_held_up_by_silent_peers(self):
+        listener = mp._WorkerListener(("127.0.0.1", 0), b"secret", 5)
+        self.addCleanup(listener.close)
+        silent = socket.create_connection(listener.address)
+        self.addCleanup(silent.close)
+
+        def fake_worker(address, authkey):
+            try:
+                client = connection.Client(address, authkey=authkey)
+            except multiprocessing.AuthenticationError:
+                return
+            client.send(("hello", mp._wireVersion()))
+            client.close()
+
+        bad = threading.Thread(target=fake_worker, args=(listener.address, b"nope"))
+        bad.start()
+        bad.join()
+        start = time.time()
+        worker = threading.Thread(
+            target=fake_worker, args=(listener.address, b"secret")
+        )
+        worker.start()
+        readable, _, _ = select.select([listener], [], [], 5)
+        self.assertEqual(readable, [listener])
+        self.assertLess(time.time() - start, 2)
+        [(conn, greeting)] = listener.accepted()
+        self.assertEqual(greeting, ("hello", mp._wireVersion()))
+        conn.close()
+        worker.join()
+
     @skip_if_running_in_daemon
     def test_conn_accept(self):
         parent_conn, child_conn = multiprocessing.Pipe()
@@ -197,10 +270,12 @@ Hello stdout
                 ],
             ),
         ]
-        for val in conn.sent:
+        ready, *sent = conn.sent
+        self.assertIn("ready", ready)
+        for val in sent:
             if val is None:
                 break
-            test, events = val
+            [(test, events)] = _decodeResults(val)
             exp_test, exp_events = expect.pop(0)
             self.assertEqual(test, exp_test)
             for method, event in events:
@@ -209,6 +284,38 @@ Hello stdout
                 for attr, val in exp_attr.items():
                     self.assertEqual(getattr(event, attr), val)
 
+    @skip_if_running_in_daemon
+    def test_dispatch_batch_receives_one_message(self):
+        ssn = {
+            "config": self.session.config,
+            "verbosity": 1,
+            "startDir": support_file("scenario/tests_in_package"),
+            "topLevelDir": support_file("scenario/tests_in_package"),
+            "logLevel": 100,
+            "pluginClasses": [
+                discovery.DiscoveryLoader,
+                testcases.TestCaseLoader,
+            ],
+        }
+        batch = [
+            "pkg1.test.test_things.SomeTests.test_ok",
+            "pkg1.test.test_things.SomeTests.test_failed",
+        ]
+        conn = Conn([batch])
+        procserver(ssn, conn)
+
+        self.assertEqual(len(conn.sent), 3)
+        ready, message, done = conn.sent
+        self.assertIn("ready", ready)
+        self.assertIsNone(done)
+        results = _decodeResults(message)
+        self.assertEqual([testid for testid, _ in results], batch)
+        for _, events in results:
+            self.assertEqual(
+                [hook for hook, _ in events],
+                ["startTest", "setTestOutcome", "testOutcome", "stopTest"],
+            )
+
 
 class MPPluginTestRuns(FunctionalTestCase):
     @skip_if_running_in_daemon
@@ -243,6 +350,76 @@ class MPPluginTestRuns(FunctionalTestCase):
         self.assertTestRunOutputMatches(proc, stderr="Ran 7 tests")
         self.assertEqual(proc.poll(), 0)
 
+    @skip_if_running_in_daemon
+    def test_split_class_fixtures(self):
+        proc = self.runIn(
+            "scenario/split_class_fixtures", "-v", "--plugin=nose2.plugins.mp", "-N=2"
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 8 tests")
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_resources(self):
+        proc = self.runIn(
+            "scenario/mp_resources", "-v", "--plugin=nose2.plugins.mp", "-N=3"
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 6 tests")
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_layers(self):
+        proc = self.runIn(
+            "scenario/layers",
+            "-v",
+            "--plugin=nose2.plugins.layers",
+            "--plugin=nose2.plugins.mp",
+            "-N=2",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 8 tests")
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_such_layers(self):
+        proc = self.runIn(
+            "scenario/layers_and_non_layers",
+            "-v",
+            "--plugin=nose2.plugins.layers",
+            "--plugin=nose2.plugins.mp",
+            "-N=2",
+        )
+        self.assertTestRunOutputMatches(
+            proc, stderr=r"having another setup.test 0000: should do something else"
+        )
+        self.assertTestRunOutputMatches(proc, stderr="OK")
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_preloaded_layers(self):
+        proc = self.runIn(
+            "scenario/layers",
+            "-v",
+            "--config",
+            support_file("cfg/mp_preload.cfg"),
+            "--plugin=nose2.plugins.layers",
+            "--plugin=nose2.plugins.mp",
+            "-N=2",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 8 tests")
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_layer_setup_error(self):
+        proc = self.runIn(
+            "scenario/layers_with_errors",
+            "--plugin=nose2.plugins.layers",
+            "--plugin=nose2.plugins.mp",
+            "-N=2",
+            "test_layer_setup_fail",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="ERROR: LayerSuite")
+        self.assertTestRunOutputMatches(proc, stderr="Bad Error in Layer setUp!")
+        self.assertTestRunOutputMatches(proc, stderr=r"FAILED \(errors=1\)")
+
     @skip_if_running_in_daemon
     def test_large_number_of_tests_stresstest(self):
         proc = self.runIn(
@@ -255,6 +432,340 @@ class MPPluginTestRuns(FunctionalTestCase):
         self.assertTestRunOutputMatches(proc, stderr="Ran 600 tests")
         self.assertEqual(proc.poll(), 0)
 
+    @skip_if_running_in_daemon
+    def test_batched_dispatch_stresstest(self):
+        proc = self.runIn(
+            "scenario/many_tests",
+            "-v",
+            "--config",
+            support_file("cfg/mp_batched.cfg"),
+            "--plugin=nose2.plugins.mp",
+            "--plugin=nose2.plugins.loader.generators",
+            "-N=2",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 600 tests")
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_preloaded_tests_with_fixtures(self):
+        proc = self.runIn(
+            "scenario/class_fixtures",
+            "-v",
+            "--config",
+            support_file("cfg/mp_preload.cfg"),
+            "--plugin=nose2.plugins.mp",
+            "-N=2",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 7 tests")
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_preloaded_tests_in_package(self):
+        proc = self.runIn(
+            "scenario/tests_in_package",
+            "-v",
+            "--config",
+            support_file("cfg/mp_preload.cfg"),
+            "--plugin=nose2.plugins.mp",
+            "-N=2",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 25 tests")
+        self.assertEqual(proc.poll(), 1)
+
+    @skip_if_running_in_daemon
+    @unittest.skipUnless(
+        "forkserver" in multiprocessing.get_all_start_methods(),
+        "forkserver is not available",
+    )
+    def test_forkserver_start_method(self):
+        proc = self.runIn(
+            "scenario/class_fixtures",
+            "-v",
+            "--config",
+            support_file("cfg/mp_forkserver.cfg"),
+            "--plugin=nose2.plugins.mp",
+            "-N=2",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 7 tests")
+        self.assertTestRunOutputMatches(
+            proc, stderr=r"Started 2 worker processes \(forkserver\)"
+        )
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_pinned_workers(self):
+        proc = self.runIn(
+            "scenario/class_fixtures",
+            "-v",
+            "--config",
+            support_file("cfg/mp_pinned.cfg"),
+            "--plugin=nose2.plugins.mp",
+            "-N=2",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 7 tests")
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_max_failures_stops_all_workers(self):
+        proc = self.runIn(
+            "scenario/mp_fail_fast",
+            "-v",
+            "--plugin=nose2.plugins.mp",
+            "--max-failures=3",
+            "-N=2",
+        )
+        # each worker finishes the test it was running
+        self.assertTestRunOutputMatches(proc, stderr=r"Ran [3-6] tests")
+        self.assertTestRunOutputMatches(proc, stderr=r"FAILED \(failures=[3-6]\)")
+        self.assertEqual(proc.poll(), 1)
+
+    @skip_if_running_in_daemon
+    def test_recycled_workers(self):
+        proc = self.runIn(
+            "scenario/class_fixtures",
+            "-v",
+            "--config",
+            support_file("cfg/mp_recycle.cfg"),
+            "--plugin=nose2.plugins.mp",
+            "-N=2",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 7 tests")
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_shared_memory_results(self):
+        proc = self.runIn(
+            "scenario/class_fixtures",
+            "-v",
+            "--config",
+            support_file("cfg/mp_shared_memory.cfg"),
+            "--plugin=nose2.plugins.mp",
+            "-N=2",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 7 tests")
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_collect_in_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "log")
+            with mock.patch.dict(os.environ, {"NOSE2_COLLECT_LOG": path}):
+                proc = self.runIn(
+                    "scenario/mp_collect",
+                    "-v",
+                    "--config",
+                    support_file("cfg/mp_collect.cfg"),
+                    "--plugin=nose2.plugins.mp",
+                    "-N=2",
+                )
+                self.assertTestRunOutputMatches(proc, stderr="Ran 4 tests")
+            self.assertTestRunOutputMatches(proc, stderr="Class fixtures ran ... ok")
+            self.assertTestRunOutputMatches(proc, stderr="AssertionError: as expected")
+            self.assertTestRunOutputMatches(proc, stderr=r"test_two.*\(n=2\)")
+            self.assertTestRunOutputMatches(proc, stderr=r"FAILED \(failures=2\)")
+            with open(path) as fh:
+                pids = {int(line) for line in fh}
+        # only worker processes imported the test modules
+        self.assertNotIn(os.getpid(), pids)
+
+    @skip_if_running_in_daemon
+    def test_streaming_discovery(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "log")
+            with mock.patch.dict(os.environ, {"NOSE2_STREAMING_LOG": path}):
+                proc = self.runIn(
+                    "scenario/streaming",
+                    "-v",
+                    "--config",
+                    support_file("cfg/streaming.cfg"),
+                    "--plugin=nose2.plugins.mp",
+                    "-N=2",
+                )
+                self.assertTestRunOutputMatches(proc, stderr="Ran 2 tests")
+            self.assertEqual(proc.poll(), 0)
+            with open(path) as fh:
+                ran = [line for line in fh if line.startswith("ran")]
+        self.assertEqual(len(ran), 2)
+
+    @skip_if_running_in_daemon
+    def test_streaming_discovery_with_split_classes(self):
+        # whichever module is loaded second has its class split after the
+        # workers have started
+        proc = self.runIn(
+            "scenario/streaming_split",
+            "-v",
+            "--config",
+            support_file("cfg/streaming.cfg"),
+            "--plugin=nose2.plugins.mp",
+            "-N=2",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 16 tests")
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_elastic_pool(self):
+        proc = self.runIn(
+            "scenario/class_fixtures",
+            "-v",
+            "--config",
+            support_file("cfg/mp_elastic.cfg"),
+            "--plugin=nose2.plugins.mp",
+            "-N=3",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 7 tests")
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_worker_crash(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            marker = os.path.join(tmp, "crashed")
+            with mock.patch.dict(os.environ, {"NOSE2_CRASH_MARKER": marker}):
+                proc = self.runIn(
+                    "scenario/mp_crash", "-v", "--plugin=nose2.plugins.mp", "-N=2"
+                )
+                self.assertTestRunOutputMatches(proc, stderr="Ran 4 tests")
+            self.assertTrue(os.path.exists(marker))
+        self.assertTestRunOutputMatches(
+            proc,
+            stderr="WorkerCrashError: Test test_crash.Test.test_crash was running "
+            "in a process that exited with exit code 3",
+        )
+        self.assertTestRunOutputMatches(proc, stderr=r"FAILED \(errors=1\)")
+        self.assertEqual(proc.poll(), 1)
+
+    @skip_if_running_in_daemon
+    def test_test_timeout(self):
+        proc = self.runIn(
+            "scenario/mp_timeout",
+            "-v",
+            "--config",
+            support_file("cfg/mp_timeout.cfg"),
+            "--plugin=nose2.plugins.mp",
+            "-N=1",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 7 tests")
+        self.assertTestRunOutputMatches(proc, stderr="Stacks of all threads")
+        self.assertTestRunOutputMatches(proc, stderr="line 13 in test_hang")
+        self.assertTestRunOutputMatches(
+            proc,
+            stderr="TestTimeoutError: test_timeout.Test.test_hang did not finish "
+            "within 0.5 seconds",
+        )
+        # the rest of a fixture group is reported when one of its tests hangs
+        self.assertTestRunOutputMatches(
+            proc,
+            stderr=r"test_c \(test_timeout.Fixtures.test_c\) \.\.\. skip"
+            r"ped not run: test_timeout.Fixtures.test_b_hang in the same fixture "
+            "group timed out",
+        )
+        self.assertTestRunOutputMatches(proc, stderr=r"FAILED \(errors=2, skipped=1\)")
+        self.assertEqual(proc.poll(), 1)
+
+    @skip_if_running_in_daemon
+    def test_test_timeout_with_output_buffer_and_log_capture(self):
+        proc = self.runIn(
+            "scenario/mp_timeout",
+            "-v",
+            "--config",
+            support_file("cfg/mp_timeout.cfg"),
+            "--plugin=nose2.plugins.mp",
+            "-N=1",
+            "-B",
+            "--log-capture",
+        )
+        self.assertTestRunOutputMatches(
+            proc,
+            stderr="TestTimeoutError: test_timeout.Test.test_hang did not finish "
+            "within 0.5 seconds",
+        )
+        self.assertTestRunOutputMatches(
+            proc, stderr=r">> begin captured stdout << -+\nhanging"
+        )
+        self.assertTestRunOutputMatches(proc, stderr=r"FAILED \(errors=2, skipped=1\)")
+
+    @skip_if_running_in_daemon
+    def test_remote_workers(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = os.path.join(tmp, "coordinator.cfg")
+            with open(cfg, "w") as fh:
+                fh.write(
+                    "[multiprocess]\nlisten = 127.0.0.1:%s\nauthkey = secret\n" % port
+                )
+            worker_cfg = os.path.join(tmp, "worker.cfg")
+            with open(worker_cfg, "w") as fh:
+                fh.write("[multiprocess]\ntest-run-timeout = 20\n")
+            env = dict(
+                os.environ,
+                NOSE2_MP_AUTHKEY="secret",
+                NOSE2_REMOTE_LOG=tmp,
+                NOSE2_WORKER_KIND="remote",
+            )
+            workers = [
+                subprocess.Popen(
+                    [
+                        sys.executable,
+                        "-m",
+                        "nose2",
+                        "--config",
+                        worker_cfg,
+                        "--plugin=nose2.plugins.mp",
+                        "--mp-worker",
+                        "127.0.0.1:%s" % port,
+                    ],
+                    cwd=support_file("scenario/mp_remote"),
+                    env=env,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+                for _ in range(2)
+            ]
+            # give the workers time to start trying to connect
+            time.sleep(1)
+            with mock.patch.dict(os.environ, {"NOSE2_REMOTE_LOG": tmp}):
+                proc = self.runIn(
+                    "scenario/mp_remote",
+                    "--config",
+                    cfg,
+                    "--plugin=nose2.plugins.mp",
+                    "-N=1",
+                )
+                self.assertTestRunOutputMatches(proc, stderr="Ran 20 tests")
+            self.assertEqual(proc.poll(), 0)
+            for worker in workers:
+                worker.communicate(timeout=30)
+                self.assertEqual(worker.returncode, 0)
+            kinds = []
+            for name in os.listdir(tmp):
+                if name.startswith("test_"):
+                    with open(os.path.join(tmp, name)) as fh:
+                        kinds.append(fh.read())
+        self.assertEqual(len(kinds), 20)
+        self.assertIn("remote", kinds)
+
+    @skip_if_running_in_daemon
+    def test_durations_file_written(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = os.path.join(tmp, "durations.cfg")
+            path = os.path.join(tmp, "durations.json")
+            with open(cfg, "w") as fh:
+                fh.write("[multiprocess]\ndurations-file = %s\n" % path)
+            proc = self.runIn(
+                "scenario/class_fixtures",
+                "-v",
+                "--config",
+                cfg,
+                "--plugin=nose2.plugins.mp",
+                "-N=2",
+            )
+            self.assertTestRunOutputMatches(proc, stderr="Ran 7 tests")
+            with open(path) as fh:
+                data = json.load(fh)
+        self.assertIn("test_cf_testcase.Test", data["groups"])
+        self.assertIn("test_cf_testcase.Test2.test_1", data["tests"])
+
     @skip_if_running_in_daemon
     def test_socket_stresstest(self):
         proc = self.runIn(
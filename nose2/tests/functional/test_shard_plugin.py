@@ -0,0 +1,57 @@
+import os
+import re
+from xml.etree import ElementTree as ET
+
+from nose2.plugins import shard
+from nose2.tests._common import (
+    FunctionalTestCase,
+    TestCase,
+    skip_if_running_in_daemon,
+    support_file,
+)
+
+
+class TestShardPlugin(FunctionalTestCase, TestCase):
+    _RUN_IN_TEMP = True
+
+    def setUp(self):
+        super().setUp()
+        self._procs = []
+
+    def _runShard(self, spec, *args):
+        report = os.path.join(os.getcwd(), "shard-%s.xml" % spec[0])
+        proc = self.runIn(
+            os.getcwd(),
+            "-s%s" % support_file("scenario/class_fixtures"),
+            "--plugin=nose2.plugins.shard",
+            "--plugin=nose2.plugins.junitxml",
+            "--junit-xml-path=%s" % report,
+            "--shard=%s" % spec,
+            "-v",
+            *args,
+        )
+        # in-process runs are keyed by id(): keep each one alive so the
+        # next can't reuse its id and its cached output
+        self._procs.append(proc)
+        self.assertTestRunOutputMatches(proc, stderr="OK")
+        self.assertEqual(proc.poll(), 0)
+        stderr = self._output[proc.pid][1]
+        return int(re.search(r"Ran (\d+) tests", stderr).group(1)), report
+
+    def test_shards_run_every_test_once(self):
+        first, first_report = self._runShard("1/2")
+        second, second_report = self._runShard("2/2")
+        self.assertEqual(first + second, 7)
+        # the tests of each class with class fixtures stay together
+        self.assertEqual(sorted([first, second]), [3, 4])
+
+        shard.main(["junit-xml", "merged.xml", first_report, second_report])
+        merged = ET.parse("merged.xml").getroot()
+        self.assertEqual(merged.get("tests"), "7")
+        self.assertEqual(len(merged.findall("testcase")), 7)
+
+    @skip_if_running_in_daemon
+    def test_shards_with_mp(self):
+        first, _ = self._runShard("1/2", "--plugin=nose2.plugins.mp", "-N=2")
+        second, _ = self._runShard("2/2", "--plugin=nose2.plugins.mp", "-N=2")
+        self.assertEqual(first + second, 7)
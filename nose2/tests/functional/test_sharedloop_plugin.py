@@ -0,0 +1,22 @@
+import sys
+import unittest
+
+from nose2.tests._common import FunctionalTestCase
+
+
+@unittest.skipIf(sys.version_info < (3, 11), "needs Python 3.11")
+class TestSharedLoopPlugin(FunctionalTestCase):
+    def test_async_tests_run_side_by_side(self):
+        proc = self.runIn(
+            "scenario/shared_loop",
+            "-v",
+            "--plugin=nose2.plugins.sharedloop",
+            "--shared-loop",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 5 tests")
+        self.assertTestRunOutputMatches(
+            proc, stderr=r"test_own_loop \(test_shared_loop.TestNotOptedIn"
+        )
+        self.assertTestRunOutputMatches(proc, stderr=r"FAILED \(failures=1\)")
+        self.assertTestRunOutputMatches(proc, stderr="failing on purpose")
+        self.assertEqual(proc.poll(), 1)
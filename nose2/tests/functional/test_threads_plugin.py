@@ -0,0 +1,29 @@
+from nose2.tests._common import FunctionalTestCase
+
+
+class TestThreadsPlugin(FunctionalTestCase):
+    def test_tests_run_side_by_side(self):
+        proc = self.runIn(
+            "scenario/threads",
+            "-v",
+            "--plugin=nose2.plugins.threads",
+            "--threads=5",
+            "--output-buffer",
+            "--log-capture",
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 8 tests")
+        self.assertTestRunOutputMatches(proc, stderr=r"FAILED \(failures=1\)")
+        self.assertTestRunOutputMatches(
+            proc, stderr=r"test_1 \(test_threads.Test.test_1\) ... ok\n"
+        )
+        # the failure shows only its own output and log messages
+        self.assertTestRunOutputMatches(
+            proc,
+            stderr=r"captured stdout << -+\noutput of test_fail\n\n-+ >> end",
+        )
+        self.assertTestRunOutputMatches(
+            proc,
+            stderr=r"captured logging << -+\ntest_threads: INFO: log of test_fail\n"
+            r"-+ >> end",
+        )
+        self.assertEqual(proc.poll(), 1)
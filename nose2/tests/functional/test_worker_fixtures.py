@@ -0,0 +1,17 @@
+from nose2.tests._common import FunctionalTestCase, skip_if_running_in_daemon
+
+
+class TestWorkerFixtures(FunctionalTestCase):
+    def test_created_once_per_test_run(self):
+        proc = self.runIn("scenario/worker_fixtures", "-v")
+        self.assertTestRunOutputMatches(proc, stderr="Ran 4 tests")
+        self.assertTestRunOutputMatches(proc, stderr="resource torn down\n")
+        self.assertEqual(proc.poll(), 0)
+
+    @skip_if_running_in_daemon
+    def test_created_once_per_worker(self):
+        proc = self.runIn(
+            "scenario/worker_fixtures", "-v", "--plugin=nose2.plugins.mp", "-N=2"
+        )
+        self.assertTestRunOutputMatches(proc, stderr="Ran 4 tests")
+        self.assertEqual(proc.poll(), 0)
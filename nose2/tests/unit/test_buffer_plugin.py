@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import io
 import sys
+import threading
 
 from nose2 import events, result, session, util
 from nose2.plugins import buffer
@@ -91,3 +92,44 @@ class TestBufferPlugin(TestCase):
         evt = events.OutcomeDetailEvent(self.watcher.events[0])
         self.session.hooks.outcomeDetail(evt)
         assert "hello" in "".join(evt.extraDetail)
+
+    def test_captures_stdout_of_each_thread(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def run(name):
+            with util.worker_thread():
+                self.plugin.startTest(None)
+                barrier.wait()
+                print(name)
+                barrier.wait()
+                event = events.TestOutcomeEvent(None, self.result, result.PASS)
+                self.plugin.setTestOutcome(event)
+                self.plugin.stopTest(None)
+            outputs[name] = event.metadata["stdout"]
+
+        outputs: dict[str, str] = {}
+        out = sys.stdout
+        workers = [threading.Thread(target=run, args=(n,)) for n in ("one", "two")]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.plugin.stopTestRun(None)
+        self.assertIs(sys.stdout, out)
+        self.assertIn("one", outputs["one"])
+        self.assertNotIn("two", outputs["one"])
+        self.assertIn("two", outputs["two"])
+        self.assertNotIn("one", outputs["two"])
+
+    def test_outcome_set_from_another_thread_uses_test_buffer(self):
+        # like the mp plugin's watchdog, reporting a test that timed out
+        event = events.TestOutcomeEvent(None, self.result, result.ERROR)
+        self.plugin.startTest(None)
+        try:
+            print("hello")
+            thread = threading.Thread(target=self.plugin.setTestOutcome, args=(event,))
+            thread.start()
+            thread.join()
+        finally:
+            self.plugin.stopTest(None)
+        self.assertIn("hello", event.metadata["stdout"])
@@ -1,5 +1,10 @@
-from nose2 import session
-from nose2.plugins import collect
+import ast
+import json
+import os
+import textwrap
+
+from nose2 import events, loader, session, util
+from nose2.plugins import attrib, collect
 from nose2.tests._common import FakeStartTestRunEvent, TestCase
 
 
@@ -14,3 +19,203 @@ class TestCollectOnly(TestCase):
         event = FakeStartTestRunEvent()
         self.plugin.startTestRun(event)
         self.assertEqual(event.executeTests, self.plugin.collectTests)
+
+
+class TestStaticCollection(TestCase):
+    _RUN_IN_TEMP = True
+    tags = ["unit"]
+
+    def setUp(self):
+        super().setUp()
+        self.session = session.Session()
+        self.loader = loader.PluggableTestLoader(self.session)
+        self.plugin = collect.CollectOnly(session=self.session)
+        self.plugin.register()
+
+    def _read(self, source):
+        tree = ast.parse(textwrap.dedent(source))
+        return collect._ModuleReader("m", "test").read(tree)
+
+    def _ids(self, source):
+        return [testid for testid, _, _ in self._read(source)]
+
+    def _handleFile(self, name, source):
+        path = os.path.join(self._work_dir, name)
+        with open(path, "w") as fh:
+            fh.write(textwrap.dedent(source))
+        collector = collect._StaticCollector("test")
+        event = events.HandleFileEvent(
+            self.loader, name, path, "test*.py", self._work_dir
+        )
+        return event, collector.handleFile(event)
+
+    def test_finds_test_case_methods(self):
+        found = self._read('''
+            import unittest
+
+            class Base(unittest.TestCase):
+                @classmethod
+                def setUpClass(cls):
+                    pass
+
+                def test_b(self):
+                    """Checks b.
+
+                    In detail.
+                    """
+
+            class Things(Base):
+                def test_A(self):
+                    pass
+
+                def helper(self):
+                    pass
+
+            class Runner(unittest.TestCase):
+                def runTest(self):
+                    pass
+            ''')
+        self.assertEqual(
+            found,
+            [
+                ("m.Base.test_b", "m.Base", "Checks b."),
+                ("m.Runner.runTest", None, None),
+                ("m.Things.test_A", "m.Things", None),
+                ("m.Things.test_b", "m.Things", "Checks b."),
+            ],
+        )
+
+    def test_finds_functions_params_and_test_classes(self):
+        found = self._read("""
+            from unittest import skip
+            from nose2.tools import params
+
+            def setUpModule():
+                pass
+
+            class TestThings:
+                @params(1, (2, 3))
+                def test_method(self, *args):
+                    pass
+
+            @skip("not yet")
+            def test_function():
+                pass
+
+            @params("a")
+            def test_params(arg):
+                pass
+
+            def test_takes_argument(arg):
+                pass
+
+            def helper():
+                pass
+            """)
+        self.assertEqual(
+            [(testid, group) for testid, group, _ in found],
+            [
+                ("m.test_function", "m"),
+                ("m.test_params:1", "m"),
+                ("m.TestThings.test_method:1", "m"),
+                ("m.TestThings.test_method:2", "m"),
+            ],
+        )
+
+    def test_follows_deleted_names_and_main_block(self):
+        ids = self._ids("""
+            import unittest
+
+            class Abstract(unittest.TestCase):
+                def test_shared(self):
+                    pass
+
+            class Concrete(Abstract):
+                pass
+
+            del Abstract
+
+            if __name__ == "__main__":
+                unittest.main()
+            """)
+        self.assertEqual(ids, ["m.Concrete.test_shared"])
+
+    def test_dynamic_modules_need_import(self):
+        sources = {
+            "load_tests": "def load_tests(loader, tests, pattern): pass",
+            "generator": "def test_gen():\n    yield print, 1",
+            "imported base": "from base import Base\nclass TestX(Base): pass",
+            "imported test": "from helpers import TestBase",
+            "star import": "from helpers import *",
+            "__test__": "class TestX:\n    __test__ = False",
+            "decorator": "import deco\n@deco.wrap\ndef test(): pass",
+            "metaclass": "class TestX(metaclass=Meta): pass",
+            "globals": "globals()['test_x'] = lambda: None",
+            "such": "it.createTests(globals())",
+            "conditional": "if FLAG:\n    def test(): pass",
+            "params": "from nose2.tools import params\n@params(x)\ndef test(x): pass",
+        }
+        for kind, source in sources.items():
+            with self.subTest(kind):
+                with self.assertRaises(collect._NeedsImport):
+                    self._read(source)
+
+    def test_collector_loads_stand_ins_for_tests(self):
+        event, suite = self._handleFile(
+            "test_static.py",
+            """
+            import unittest
+
+            class Test(unittest.TestCase):
+                @classmethod
+                def setUpClass(cls):
+                    pass
+
+                def test(self):
+                    pass
+
+                def test_other(self):
+                    pass
+            """,
+        )
+        self.assertTrue(event.handled)
+        test, other = list(suite)
+        self.assertNotEqual(test, other)
+        self.assertEqual(util.test_name(test), "test_static.Test.test")
+        self.assertEqual(util.fixture_group(test), "test_static.Test")
+        self.assertEqual(test.__class__.__module__, "test_static")
+        self.assertEqual(str(test), "test_static.Test.test")
+
+    def test_collector_leaves_dynamic_modules_to_import(self):
+        event, suite = self._handleFile(
+            "test_dynamic.py", "def test_gen():\n    yield print, 1\n"
+        )
+        self.assertFalse(event.handled)
+        self.assertIsNone(suite)
+        event, suite = self._handleFile("helpers.py", "def test(): pass\n")
+        self.assertFalse(event.handled)
+        self.assertIsNone(suite)
+
+    def test_plugins_that_load_tests_prevent_static_collection(self):
+        self.assertTrue(self.plugin._canCollectStatically())
+        attrib.AttributeSelector(session=self.session).register()
+        with self.assertLogs(collect.log, "WARNING"):
+            self.assertFalse(self.plugin._canCollectStatically())
+
+    def test_manifest_lists_collected_tests(self):
+        self.plugin.manifest = "manifest.json"
+        event, suite = self._handleFile(
+            "test_static.py", "def setUpModule(): pass\ndef test(): pass\n"
+        )
+        for test in suite:
+            self.plugin.startTest(events.StartTestEvent(test, None, 0))
+        self.plugin.stopTestRun(events.StopTestRunEvent(None, None, 0, 0))
+        with open(os.path.join(self._work_dir, "manifest.json")) as fh:
+            manifest = json.load(fh)
+        self.assertEqual(
+            manifest,
+            {
+                "version": 1,
+                "tests": [{"id": "test_static.test", "group": "test_static"}],
+            },
+        )
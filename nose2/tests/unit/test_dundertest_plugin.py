@@ -1,7 +1,8 @@
 import unittest
 
-from nose2 import session
+from nose2 import events, session
 from nose2.plugins import dundertest
+from nose2.suite import StreamingSuite
 from nose2.tests._common import TestCase
 
 
@@ -30,3 +31,12 @@ class TestDunderTestPlugin(TestCase):
         self.suite.addTest(dummyTest)
         self.plugin.removeNonTests(self.suite)
         self.assertEqual(len(list(self.suite)), 0)
+
+    def test_streaming_suite_is_filtered_as_it_loads(self):
+        dummyTest = self.caseClass("test_a")
+        dummyTest.__test__ = False
+        suite = StreamingSuite(iter([self.caseClass("test_a"), dummyTest]))
+        event = events.StartTestRunEvent(None, suite, None, 0, None)
+        self.plugin.startTestRun(event)
+        self.assertTrue(suite.loading)
+        self.assertEqual(len(list(suite)), 1)
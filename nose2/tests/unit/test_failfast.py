@@ -58,3 +58,12 @@ class TestFailFast(TestCase):
         test = self.case("test_skip")
         test(self.result)
         assert not self.result.shouldStop
+
+    def test_max_failures(self):
+        self.plugin.setMaxFailures(["2"])
+        self.case("test_err")(self.result)
+        assert not self.result.shouldStop
+        self.case("test")(self.result)
+        assert not self.result.shouldStop
+        self.case("test_fail")(self.result)
+        assert self.result.shouldStop
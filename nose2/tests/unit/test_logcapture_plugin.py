@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import threading
 
 from nose2 import session
 from nose2.plugins import logcapture
@@ -79,6 +80,17 @@ class LogCaptureUnitTest(TestCase):
         self.plugin.setTestOutcome(e)
         assert "logs" in e.metadata, "No log in %s" % e.metadata
 
+    def test_logs_attached_to_event_from_another_thread(self):
+        # like the mp plugin's watchdog, reporting a test that timed out
+        self.plugin.startTestRun(None)
+        self.plugin.startTest(None)
+        logcapture.logging.getLogger("test").debug("hello")
+        e = self.event()
+        thread = threading.Thread(target=self.plugin.setTestOutcome, args=(e,))
+        thread.start()
+        thread.join()
+        self.assertEqual(e.metadata.get("logs"), ["stub: stub: hello"])
+
 
 class Event:
     pass
@@ -1,8 +1,12 @@
 import configparser
+import os
 import sys
+import unittest
+from unittest import mock
 
-from nose2 import session
+from nose2 import events, loader, result, session, util
 from nose2.plugins import mp
+from nose2.plugins.attrib import AttributeSelector
 from nose2.tests._common import Conn, TestCase
 
 
@@ -18,6 +22,423 @@ class TestMPPlugin(TestCase):
             res.append(x)
         self.assertEqual(res, [1, 2, 3])
 
+    def test_gentests_batches(self):
+        conn = Conn([["a", "b"], ["c"], None, ["d"]])
+        self.assertEqual(list(mp.gentests(conn)), [["a", "b"], ["c"]])
+
+    def test_batch_size_fixed(self):
+        self.plugin.batchSize = 5
+        self.assertEqual(self.plugin._batchSize(100, 2), 5)
+
+    def test_batch_size_adaptive(self):
+        self.plugin.batchSize = 0
+        self.plugin.maxBatchSize = 32
+        # nothing observed yet: one test at a time
+        self.assertEqual(self.plugin._batchSize(100, 2), 1)
+        self.plugin._observeDuration(0.01)
+        self.assertEqual(self.plugin._batchSize(100, 2), 10)
+        # very fast tests are capped by max-batch-size
+        self.plugin._testDuration = 0.0001
+        self.assertEqual(self.plugin._batchSize(1000, 2), 32)
+        # and by the share of the remaining tests per worker
+        self.assertEqual(self.plugin._batchSize(9, 2), 5)
+
+    def test_dispatch_sends_batches_then_none(self):
+        self.plugin.batchSize = 2
+        conn = Conn([])
+        queue = mp.deque(["a", "b", "c"])
+        done = set()
+        for _ in range(4):
+            self.plugin._dispatch(conn, queue, 1, done)
+        self.assertEqual(conn.sent, [["a", "b"], ["c"], None])
+
+    def test_dispatch_sends_preloaded_indexes(self):
+        self.plugin._preloadIndex = {"a": 0, "b": 1}
+        conn = Conn([])
+        self.plugin._dispatch(conn, mp.deque(["b", "a"]), 1, set())
+        self.assertEqual(conn.sent, [[1]])
+
+    def test_parse_resources(self):
+        self.assertEqual(
+            mp._parseResources(["port", "emulator = 2"]), {"port": 1, "emulator": 2}
+        )
+        with self.assertRaises(ValueError):
+            mp._parseResources(["port = many"])
+
+    def test_dispatch_respects_resource_capacity(self):
+        self.plugin._unitResources = {"a": ("port",), "b": ("port",)}
+        queue = mp.deque(["a", "b", "c"])
+        conns = [Conn([]) for _ in range(3)]
+        for conn in conns:
+            self.plugin._dispatch(conn, queue, 3, set())
+        # b waits for the port that a holds
+        self.assertEqual([conn.sent for conn in conns], [[["a"]], [["c"]], []])
+        self.assertEqual(self.plugin._idle, {conns[2]})
+        self.plugin._release("a")
+        self.plugin._dispatch(conns[2], queue, 3, set())
+        self.assertEqual(conns[2].sent, [["b"]])
+        self.assertEqual(self.plugin._idle, set())
+
+    def test_test_resources_from_attribute(self):
+        class Test(TestCase):
+            def test(self):
+                pass
+
+        for value, resources in [
+            (None, ()),
+            ("port", ("port",)),
+            (["port", "emulator"], ("port", "emulator")),
+            # the testresources library's attribute of the same kind
+            ([("db", object())], ()),
+            (5, ()),
+        ]:
+            with self.subTest(value=value):
+                setattr(Test, "mp_resources", value)
+                self.assertEqual(mp._testResources(Test("test")), resources)
+
+    def test_resources_with_capacity_run_side_by_side(self):
+        self.plugin.resources = {"port": 2}
+        self.plugin._unitResources = {"a": ("port",), "b": ("port",)}
+        queue = mp.deque(["a", "b"])
+        conns = [Conn([]) for _ in range(2)]
+        for conn in conns:
+            self.plugin._dispatch(conn, queue, 2, set())
+        self.assertEqual([conn.sent for conn in conns], [[["a"]], [["b"]]])
+        self.assertEqual(self.plugin._resourceUse, {"port": 2})
+
+    def test_requeued_units_release_resources(self):
+        self.plugin._unitResources = {"a": ("port",)}
+        queue = mp.deque(["a"])
+        self.plugin._dispatch(Conn([]), queue, 1, set())
+        self.assertEqual(self.plugin._resourceUse, {"port": 1})
+        self.plugin._requeue(queue, ["a"])
+        self.assertEqual(list(queue), ["a"])
+        self.assertEqual(self.plugin._resourceUse, {"port": 0})
+
+    def test_dispatch_waits_for_tests_being_loaded(self):
+        class Test(unittest.TestCase):
+            def test(self):
+                pass
+
+        self.plugin._loading = iter([unittest.TestSuite([Test("test")])])
+        queue = mp.deque()
+        conn = Conn([])
+        done = set()
+        self.plugin._dispatch(conn, queue, 1, done)
+        self.assertEqual(conn.sent, [])
+        self.assertEqual(self.plugin._idle, {conn})
+        self.assertTrue(self.plugin._loadMore(queue))
+        self.plugin._dispatch(conn, queue, 1, done)
+        self.assertEqual(conn.sent, [[mp.util.test_name(Test("test"))]])
+        self.assertFalse(self.plugin._loadMore(queue))
+        self.plugin._dispatch(conn, queue, 1, done)
+        self.assertEqual(conn.sent[-1], None)
+
+    def test_load_more_sends_new_chunks_to_workers(self):
+        class Test(unittest.TestCase):
+            split_fixtures = True
+
+            @classmethod
+            def setUpClass(cls):
+                pass
+
+            def test_a(self):
+                pass
+
+            def test_b(self):
+                pass
+
+        load = unittest.defaultTestLoader.loadTestsFromTestCase
+        self.plugin.procs = 2
+        self.plugin._loading = iter([load(Test)])
+        conn = Conn([])
+        self.assertTrue(self.plugin._loadMore(mp.deque(), [conn]))
+        self.assertEqual(len(self.plugin.chunks), 2)
+        self.assertEqual(conn.sent, [{"chunks": self.plugin.chunks}])
+
+    def _elastic(self, load, free, idle=()):
+        self.plugin.elastic = True
+        self.plugin.procs = 3
+        self.plugin.minProcs = 1
+        self.plugin.memoryReserve = 100
+        conns = [Conn([]) for _ in range(2)]
+        workers = {conn: mock.Mock(pid=0) for conn in conns}
+        self.plugin._idle.update(conns[i] for i in idle)
+        patches = [
+            mock.patch.object(mp, "_systemLoad", return_value=load),
+            mock.patch.object(mp, "_freeMemory", return_value=free * 2**20),
+            mock.patch.object(mp, "_processMemory", return_value=50 * 2**20),
+            mock.patch.object(self.plugin, "_addWorker"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        queue = mp.deque("abcde")
+        self.plugin._scale({}, queue, [], workers, list(conns), set())
+        return conns
+
+    def test_elastic_pool_grows(self):
+        self._elastic(load=0.5, free=1000)
+        self.assertEqual(self.plugin._addWorker.call_count, 1)
+        self.assertEqual(self.plugin._retiring, set())
+        # decisions are made at most once per interval
+        self.plugin._scale({}, mp.deque("abcde"), [], {}, [], set())
+        self.assertEqual(self.plugin._addWorker.call_count, 1)
+
+    def test_elastic_pool_does_not_grow_under_load(self):
+        self._elastic(load=1.2, free=1000)
+        self.assertFalse(self.plugin._addWorker.called)
+        self.assertEqual(self.plugin._retiring, set())
+
+    def test_elastic_pool_does_not_grow_short_of_memory(self):
+        # a worker of 50MB would leave less than the 100MB reserve
+        self._elastic(load=0.5, free=120)
+        self.assertFalse(self.plugin._addWorker.called)
+        self.assertEqual(self.plugin._retiring, set())
+
+    def test_elastic_pool_shrinks_under_load(self):
+        conns = self._elastic(load=2.0, free=1000)
+        self.assertEqual(self.plugin._retiring, {conns[1]})
+
+    def test_elastic_pool_shrinks_short_of_memory(self):
+        conns = self._elastic(load=0.5, free=50)
+        self.assertEqual(self.plugin._retiring, {conns[1]})
+        self.assertFalse(self.plugin._addWorker.called)
+
+    def test_elastic_pool_retires_idle_workers(self):
+        conns = self._elastic(load=0.5, free=1000, idle=[0])
+        self.assertEqual(conns[0].sent, [None])
+        self.assertEqual(self.plugin._shrinking, {conns[0]})
+
+    def test_preload_only_when_forking(self):
+        self.plugin.preload = True
+        with mock.patch.object(
+            self.plugin.context, "get_start_method", return_value="spawn"
+        ):
+            self.assertFalse(self.plugin._canPreload())
+        with mock.patch.object(
+            self.plugin.context, "get_start_method", return_value="fork"
+        ):
+            self.assertTrue(self.plugin._canPreload())
+        self.plugin.preload = False
+        with mock.patch.object(
+            self.plugin.context, "get_start_method", return_value="fork"
+        ):
+            self.assertFalse(self.plugin._canPreload())
+
+    def test_dispatch_retires_worker_after_max_tests(self):
+        self.plugin.maxTestsPerWorker = 2
+        conn = Conn([])
+        queue = mp.deque(["a", "b", "c"])
+        for _ in range(3):
+            self.plugin._dispatch(conn, queue, 1, set())
+        self.assertEqual(conn.sent, [["a"], ["b"], None])
+        self.assertEqual(list(queue), ["c"])
+
+    def test_dispatch_sends_suspects_alone(self):
+        self.plugin.batchSize = 4
+        self.plugin._suspects = {"b"}
+        conn = Conn([])
+        queue = mp.deque(["a", "b", "c"])
+        for _ in range(3):
+            self.plugin._dispatch(conn, queue, 1, set())
+        self.assertEqual(conn.sent, [["a"], ["b"], ["c"]])
+
+    def test_recover_requeues_lost_tests(self):
+        conn = Conn([])
+        proc = mock.Mock(pid=1, exitcode=-9)
+        self.plugin._inFlight[conn] = mp.deque([["a", "b"], ["c"]])
+        queue = mp.deque(["d"])
+        self.plugin._recover(conn, proc, queue)
+        self.assertEqual(list(queue), ["a", "b", "c", "d"])
+        self.assertEqual(self.plugin._suspects, {"a", "b"})
+        self.assertEqual(self.plugin._crashes, {})
+
+    def test_recover_reports_repeated_crash(self):
+        conn = Conn([])
+        proc = mock.Mock(pid=1, exitcode=-9)
+        queue = mp.deque()
+        with mock.patch.object(self.plugin, "_reportCrash") as report:
+            for _ in range(2):
+                self.plugin._inFlight[conn] = mp.deque([["a"]])
+                self.plugin._recover(conn, proc, queue)
+                if queue:
+                    self.assertEqual(queue.popleft(), "a")
+        report.assert_called_once_with("a", "a process that exited with exit code -9")
+        self.assertEqual(list(queue), [])
+
+    def test_recover_requeues_tests_of_remote_worker(self):
+        conn = Conn([])
+        self.plugin.crashRetries = 0
+        self.plugin._inFlight[conn] = mp.deque([["a"], ["b"]])
+        queue = mp.deque()
+        with mock.patch.object(self.plugin, "_reportCrash") as report:
+            self.plugin._recover(conn, None, queue)
+        report.assert_called_once_with("a", "a remote worker that disconnected")
+        self.assertEqual(list(queue), ["b"])
+
+    def test_dispatch_sends_names_to_remote_workers(self):
+        self.plugin._preloadIndex = {"a": 0}
+        conn = Conn([])
+        self.plugin._remotes.add(conn)
+        self.plugin._dispatch(conn, mp.deque(["a"]), 1, set())
+        self.assertEqual(conn.sent, [["a"]])
+
+    def test_stop_tells_each_worker_once(self):
+        first, second = Conn([]), Conn([])
+        queue = mp.deque(["a", "b"])
+        done = {second}
+        self.plugin._stop([first, second], queue, done)
+        self.plugin._stop([first, second], queue, done)
+        self.assertEqual(list(queue), [])
+        self.assertEqual(first.sent, [{"stop": True}, None])
+        self.assertEqual(second.sent, [{"stop": True}])
+        self.assertEqual(done, {first, second})
+
+    def test_stop_requests_between_tests(self):
+        res = mock.Mock(shouldStop=False)
+        chunks = {"chunks": {"m.T#1": ["m.T.a"]}}
+        stops = mp._StopRequests(Conn([chunks, ["b"], {"stop": True}, None]), res)
+        stops.stopTest(None)
+        self.assertTrue(res.shouldStop)
+        # chunks read early are kept for the batches that need them
+        self.assertEqual(list(stops.pending), [chunks, ["b"], None])
+        # batches read early are run before anything else
+        conn = Conn([["c"]])
+        self.assertEqual(list(mp.gentests(conn, stops.pending)), [chunks, ["b"]])
+
+    def test_parse_address(self):
+        self.assertIsNone(mp._parseAddress("", "listen"))
+        self.assertEqual(
+            mp._parseAddress("example.com:8000", "listen"), ("example.com", 8000)
+        )
+        self.assertEqual(mp._parseAddress(":8000", "listen"), ("127.0.0.1", 8000))
+
+    def test_parse_address_without_port(self):
+        for address in ("example.com", "example.com:", "example.com:http"):
+            with self.subTest(address=address):
+                with self.assertRaisesRegex(ValueError, "listen.*host:port"):
+                    mp._parseAddress(address, "listen")
+
+    def test_worker_startup_times(self):
+        conn = Conn([])
+        self.plugin._startTimes[conn] = 10.0
+        self.plugin._workerReady(conn, {"ready": 10.5})
+        # messages from workers that were not started here are ignored
+        self.plugin._workerReady(Conn([]), {"ready": 11.0})
+        self.assertEqual(self.plugin.startupTimes, [0.5])
+
+    def test_process_memory(self):
+        rss = mp._processMemory(mp.os.getpid())
+        if rss is None:
+            self.skipTest("process memory is not available")
+        self.assertGreater(rss, 0)
+
+    def test_test_timeout_from_attribute(self):
+        class Test(TestCase):
+            def test_default(self):
+                pass
+
+            def test_timeout(self):
+                pass
+
+            def timeout(self):
+                pass
+
+        setattr(Test.test_timeout, "mp_timeout", 5)
+        self.assertEqual(mp._testTimeout(Test("test_default"), 2.0), 2.0)
+        self.assertEqual(mp._testTimeout(Test("test_timeout"), 2.0), 5.0)
+
+    def test_test_timeout_ignores_values_that_are_not_numbers(self):
+        class Test(TestCase):
+            def test(self):
+                pass
+
+        for value in ("5", True, [5], None):
+            with self.subTest(value=value):
+                setattr(Test, "mp_timeout", value)
+                self.assertEqual(mp._testTimeout(Test("test"), 2.0), 2.0)
+        # subTest params must pickle under mp, so functions are checked here
+        Test.mp_timeout = Test.test
+        self.assertEqual(mp._testTimeout(Test("test"), 2.0), 2.0)
+
+    def test_watchdog_reports_timeout(self):
+        timedOut = mp.threading.Event()
+        watchdog = mp._Watchdog(0.01)
+        watchdog.onTimeout = lambda test, timeout: timedOut.set()
+        watchdog.startTest(mock.Mock(test="test"))
+        self.assertTrue(timedOut.wait(5))
+
+    def test_watchdog_ignores_finished_tests(self):
+        calls = []
+        watchdog = mp._Watchdog(0.05)
+        watchdog.onTimeout = lambda test, timeout: calls.append(test)
+        watchdog.startTest(mock.Mock(test="test"))
+        watchdog.stopTest(mock.Mock(test="test"))
+        mp.time.sleep(0.1)
+        self.assertEqual(calls, [])
+
+    def test_replay_reports_rest_of_timed_out_group_as_skipped(self):
+        class Test(TestCase):
+            def test_a(self):
+                pass
+
+            def test_b(self):
+                pass
+
+            def test_c(self):
+                pass
+
+        a, b, c = (Test(name) for name in ("test_a", "test_b", "test_c"))
+        names = [util.test_name(test) for test in (a, b, c)]
+        self.plugin.cases = dict(zip(names, (a, b, c)))
+        self.plugin.units = {"unit": names}
+        self.session.testResult = result.PluggableTestResult(self.session)
+        exc = mp.exceptions.TestTimeoutError("test_b did not finish")
+        timedOut = events.TestOutcomeEvent(
+            names[1], None, result.ERROR, (type(exc), exc, "")
+        )
+        outcomes = []
+        with mock.patch.object(self.session.hooks, "testOutcome", outcomes.append):
+            self.plugin._replay(
+                "unit",
+                [
+                    ("startTest", events.StartTestEvent(names[1], None, 0)),
+                    ("testOutcome", timedOut),
+                ],
+            )
+        self.assertEqual(
+            [(event.test, event.outcome) for event in outcomes],
+            [(b, result.ERROR), (a, result.SKIP), (c, result.SKIP)],
+        )
+        self.assertEqual(
+            outcomes[1].reason,
+            f"not run: {names[1]} in the same fixture group timed out",
+        )
+
+    def test_schedule_without_history_puts_big_groups_first(self):
+        self.plugin.units = {"mod.A": ["mod.A.a", "mod.A.b"], "mod": ["x", "y", "z"]}
+        self.assertEqual(
+            self.plugin._schedule(["t1", "t2", "mod.A", "mod"]),
+            ["mod", "mod.A", "t1", "t2"],
+        )
+
+    def test_schedule_uses_durations(self):
+        self.plugin.units = {"mod.A": ["mod.A.a", "mod.A.b"]}
+        self.plugin.durations.record("t1", 5.0)
+        self.plugin.durations.record("t2", 0.1)
+        self.plugin.durations.record("mod.A.a", 1.0)
+        # mod.A.b is unknown, and estimated with the median (1.0)
+        self.assertEqual(
+            self.plugin._schedule(["t2", "mod.A", "t1", "t3"]),
+            ["t1", "mod.A", "t3", "t2"],
+        )
+
+    def test_schedule_disabled(self):
+        self.plugin.schedule = "none"
+        self.plugin.units = {"mod": ["x", "y", "z"]}
+        self.assertEqual(self.plugin._schedule(["t1", "mod"]), ["t1", "mod"])
+
     def test_recording_plugin_interface(self):
         rpi = mp.RecordingPluginInterface()
         # this one should record
@@ -33,6 +454,30 @@ class TestMPPlugin(TestCase):
         rpi.getTestMethodNames(None)
         self.assertEqual(rpi.flush(), [("setTestOutcome", None)])
 
+    def test_recording_plugin_interface_records_only_wanted_methods(self):
+        rpi = mp.RecordingPluginInterface({"startTest", "testOutcome"})
+        rpi.startTest(None)
+        rpi.describeTest(None)
+        rpi.reportSuccess(None)
+        rpi.testOutcome(None)
+        self.assertEqual(rpi.flush(), [("startTest", None), ("testOutcome", None)])
+
+    def test_export_recorded_hooks(self):
+        class Plugin(events.Plugin):
+            def testOutcome(self, event):
+                pass
+
+        Plugin(session=self.session).register()
+        recorded = self.plugin._exportSession()["recordedHooks"]
+        self.assertIn("testOutcome", recorded)
+        self.assertIn("startTest", recorded)
+        self.assertIn("stopTest", recorded)
+        self.assertNotIn("reportSuccess", recorded)
+
+    def test_export_start_method(self):
+        self.plugin.context = mp.multiprocessing.get_context("spawn")
+        self.assertEqual(self.plugin._exportSession()["startMethod"], "spawn")
+
     def test_address(self):
         platform = sys.platform
         try:
@@ -78,3 +523,365 @@ class TestMPPlugin(TestCase):
         self.assertIn("startSubprocess", session.hooks.methods)
         self.assertIn("stopSubprocess", session.hooks.methods)
         pass
+
+
+class TestCollectInWorkers(TestCase):
+    _RUN_IN_TEMP = True
+
+    def setUp(self):
+        super().setUp()
+        self.session = session.Session()
+        self.plugin = mp.MultiProcess(session=self.session)
+        self.plugin._collector = mp._ModuleCollector()
+
+    def _info(self, name, group=None, **attrs):
+        return {
+            "id": name,
+            "name": name,
+            "module": name.rsplit(".", 1)[0],
+            "str": f"{name} (collected)",
+            "doc": None,
+            "group": group,
+            "attrs": attrs,
+        }
+
+    def test_collector_claims_test_modules(self):
+        collector = self.plugin._collector
+        path = os.path.join(self._work_dir, "test_things.py")
+        event = events.MatchPathEvent("test_things.py", path, "test*.py")
+        self.assertFalse(collector.matchPath(event))
+        self.assertTrue(event.handled)
+        event = events.MatchPathEvent("helpers.py", path, "test*.py")
+        self.assertIsNone(collector.matchPath(event))
+        self.assertFalse(event.handled)
+        self.assertEqual(collector.modules, ["test_things"])
+
+    def test_collected_tests_stand_in_for_tests(self):
+        test = mp._CollectedTest(self._info("m.T.test", "m.T", mp_resources="port"))
+        self.assertEqual(mp.util.test_name(test), "m.T.test")
+        self.assertEqual(str(test), "m.T.test (collected)")
+        self.assertEqual(mp._testResources(test), ("port",))
+        self.assertEqual(test, mp._CollectedTest(self._info("m.T.test")))
+        self.assertNotEqual(test, mp._CollectedTest(self._info("m.T.other")))
+
+    def test_collected_tests_are_grouped_by_fixtures(self):
+        suite = unittest.TestSuite(
+            mp._CollectedTest(self._info(name, group))
+            for name, group in (("m.T.a", "m.T"), ("m.T.b", "m.T"), ("m.f", None))
+        )
+        self.assertEqual(list(self.plugin._flatten(suite)), ["m.f", "m.T"])
+        self.assertEqual(self.plugin.units["m.T"], ["m.T.a", "m.T.b"])
+
+    def test_modules_of_crashed_workers_fail_to_load(self):
+        self.session.testLoader = loader.PluggableTestLoader(self.session)
+        self.plugin._collector.modules = ["test_a", "test_b"]
+        # the first process dies importing test_a, and is replaced
+        procs = [(mock.Mock(), Conn([]))]
+        crashed = procs[0]
+        replacement = (mock.Mock(), Conn([{"collected": [self._info("test_b.t")]}]))
+        self.addCleanup(mock.patch.stopall)
+        enqueue = mock.patch.object(self.plugin, "_enqueue").start()
+        mock.patch.object(self.plugin, "_startProc", return_value=replacement).start()
+        mock.patch.object(mp.select, "select", lambda r, w, x, t: (r, w, x)).start()
+        self.plugin._collect(procs, mp.deque(), {})
+        self.assertEqual(crashed[1].sent, [{"collect": ["test_a"]}])
+        self.assertEqual(replacement[1].sent, [{"collect": ["test_b"]}])
+        self.assertEqual(procs, [replacement])
+        tests = mp._iterTests(enqueue.call_args[0][1])
+        self.assertEqual(
+            [mp.util.test_name(test) for test in tests],
+            ["nose2.loader.LoadTestsFailure.test_a", "test_b.t"],
+        )
+
+    def test_loading_plugins_must_run_in_workers(self):
+        self.assertTrue(self.plugin._canCollect())
+        AttributeSelector(session=self.session).register()
+        self.assertFalse(self.plugin._canCollect())
+
+
+class TestSplitClasses(TestCase):
+    def setUp(self):
+        self.session = session.Session()
+        self.plugin = mp.MultiProcess(session=self.session)
+        self.plugin.procs = 3
+
+        class Big(TestCase):
+            split_fixtures = True
+
+            @classmethod
+            def setUpClass(cls):
+                pass
+
+        for index in range(6):
+            setattr(Big, "test_%d" % index, lambda self: None)
+        self.Big = Big
+        self.suite = unittest.TestSuite(Big("test_%d" % index) for index in range(6))
+        self.group = f"{__name__}.Big"
+
+    def test_not_split_without_opting_in(self):
+        self.Big.split_fixtures = False
+        self.assertEqual(list(self.plugin._flatten(self.suite)), [self.group])
+        self.assertEqual(self.plugin.chunks, {})
+
+    def test_split_evenly_without_durations(self):
+        flat = list(self.plugin._flatten(self.suite))
+        self.assertEqual(flat, [f"{self.group}#{n}" for n in (1, 2, 3)])
+        self.assertEqual([len(self.plugin.chunks[unit]) for unit in flat], [2, 2, 2])
+        self.assertEqual([len(self.plugin.unitTests[unit]) for unit in flat], [2, 2, 2])
+        self.assertNotIn(self.group, self.plugin.units)
+
+    def test_split_by_config_pattern(self):
+        self.Big.split_fixtures = False
+        self.plugin.splitClasses = ["*.B?g"]
+        self.assertEqual(len(list(self.plugin._flatten(self.suite))), 3)
+
+    def test_split_by_durations(self):
+        self.plugin.durations = mp.Durations("")
+        for index, duration in enumerate([3.0, 1.0, 1.0, 1.0, 1.0, 1.0]):
+            self.plugin.durations.record(f"{self.group}.test_{index}", duration)
+        self.plugin.chunkDuration = 2.5
+        flat = list(self.plugin._flatten(self.suite))
+        self.assertEqual(
+            [self.plugin.chunks[unit] for unit in flat],
+            [
+                [f"{self.group}.test_0"],
+                [f"{self.group}.test_1", f"{self.group}.test_2"],
+                [f"{self.group}.test_3", f"{self.group}.test_4"],
+                [f"{self.group}.test_5"],
+            ],
+        )
+
+
+class TestDurations(TestCase):
+    _RUN_IN_TEMP = True
+
+    def test_save_and_load(self):
+        durations = mp.Durations("durations.json")
+        durations.record("a.test", 1.5)
+        durations.recordGroup("a", 2.0)
+        durations.save()
+
+        loaded = mp.Durations("durations.json")
+        loaded.record("b.test", 0.5)
+        loaded.load()
+        self.assertEqual(loaded.tests["a.test"][0], 1.5)
+        self.assertEqual(loaded.tests["b.test"][0], 0.5)
+        self.assertEqual(loaded.estimate("a", ["a.test"]), 2.0)
+
+    def test_missing_or_bad_file(self):
+        durations = mp.Durations("missing.json")
+        durations.load()
+        self.assertEqual(durations.tests, {})
+        with open("bad.json", "w") as fh:
+            fh.write('{"version": 99, "tests": {"a": [1, 0]}}')
+        durations = mp.Durations("bad.json")
+        durations.load()
+        self.assertEqual(durations.tests, {})
+
+    def test_estimate_unknown_tests(self):
+        durations = mp.Durations("")
+        self.assertEqual(durations.estimate("a", ["a.x", "a.y"]), 0.0)
+        durations.record("b", 2.0)
+        self.assertEqual(durations.estimate("a", ["a.x", "a.y"]), 4.0)
+
+
+class TestWireFormat(TestCase):
+    def setUp(self):
+        class Test(TestCase):
+            def test_a(self):
+                pass
+
+        self.test = Test("test_a")
+        self.testid = "nose2.tests.unit.test_mp_plugin.Test.test_a"
+        self.test.id = lambda: self.testid
+
+    def _roundTrip(self, unit_events):
+        data = mp._encodeResults([("unit", unit_events)])
+        self.assertIsInstance(data, bytes)
+        [(testid, decoded)] = mp._decodeResults(data)
+        self.assertEqual(testid, "unit")
+        return decoded
+
+    def test_compact_events(self):
+        outcome = events.TestOutcomeEvent(self.test, None, result.SKIP, expected=True)
+        decoded = self._roundTrip(
+            [
+                ("startTest", events.StartTestEvent(self.test, None, 1.5)),
+                ("setTestOutcome", outcome),
+                ("testOutcome", outcome),
+                ("stopTest", events.StopTestEvent(self.test, None, 2.5)),
+            ]
+        )
+        self.assertEqual(
+            [hook for hook, _ in decoded],
+            ["startTest", "setTestOutcome", "testOutcome", "stopTest"],
+        )
+        start, set_outcome, outcome, stop = [event for _, event in decoded]
+        self.assertEqual(start.test, self.testid)
+        self.assertEqual(start.startTime, 1.5)
+        self.assertEqual(stop.stopTime, 2.5)
+        self.assertIs(set_outcome, outcome)
+        self.assertEqual(outcome.outcome, result.SKIP)
+        self.assertTrue(outcome.expected)
+        self.assertEqual(outcome.test, self.testid)
+
+    def test_detailed_events_are_pickled(self):
+        try:
+            raise ValueError("oops")
+        except ValueError:
+            exc_info = mp.sys.exc_info()
+        failure = events.TestOutcomeEvent(self.test, None, result.ERROR, exc_info)
+        start = events.StartTestEvent(self.test, None, 1.0, extra="data")
+        decoded = self._roundTrip(
+            [
+                ("startTest", start),
+                ("setTestOutcome", failure),
+                ("testOutcome", failure),
+                ("customHook", failure),
+            ]
+        )
+        self.assertEqual(
+            [hook for hook, _ in decoded],
+            ["startTest", "setTestOutcome", "testOutcome", "customHook"],
+        )
+        start, failure, *repeats = [event for _, event in decoded]
+        self.assertEqual(start.metadata, {"extra": "data"})
+        self.assertEqual(failure.outcome, result.ERROR)
+        self.assertIn("ValueError: oops", failure.exc_info[2])
+        self.assertEqual(repeats, [failure, failure])
+
+    def test_unknown_version(self):
+        data = bytearray(mp._encodeResults([("unit", [])]))
+        data[0] = mp.WIRE_VERSION + 1
+        with self.assertRaises(ValueError):
+            mp._decodeResults(bytes(data))
+
+
+class TestResultRing(TestCase):
+    def setUp(self):
+        self.writer = mp._ResultRing.create(2**16)
+        self.addCleanup(self.writer.close)
+        self.reader = mp._ResultRing.attach(self.writer.name)
+        self.addCleanup(self.reader.shm.close)
+
+    def _read(self, end):
+        with self.reader.read() as data:
+            message = bytes(data)
+        self.reader.release(end)
+        return message
+
+    def test_messages_round_trip(self):
+        ends = [self.writer.write(b"first"), self.writer.write(b"second")]
+        self.assertEqual([self._read(end) for end in ends], [b"first", b"second"])
+
+    def test_messages_wrap_around(self):
+        message = b"x" * 30000
+        for _ in range(5):
+            end = self.writer.write(message)
+            self.assertIsNotNone(end)
+            self.assertEqual(self._read(end), message)
+
+    def test_full_ring(self):
+        end = self.writer.write(b"x" * 40000)
+        # no room until the first message has been read
+        self.assertIsNone(self.writer.write(b"y" * 40000))
+        self._read(end)
+        self.assertIsNotNone(self.writer.write(b"y" * 40000))
+        self.assertIsNone(self.writer.write(b"z" * 2**17))
+
+    def test_connection_carries_results_in_ring(self):
+        parent, child = mp.multiprocessing.Pipe()
+        worker = mp._RingConnection(child, self.reader)
+        main = mp._RingConnection(parent, self.writer)
+        worker.send(mp._encodeResults([("unit", [])]))
+        self.assertEqual(main.recv(), [("unit", [])])
+        self.assertEqual(self.writer.offset, self.reader.offset)
+        # too large for the ring: sent through the pipe
+        worker.send(b"x" * 2**17)
+        self.assertEqual(main.recv(), b"x" * 2**17)
+        worker.send(None)
+        self.assertIsNone(main.recv())
+
+    def test_invalid_transport(self):
+        ssn = session.Session()
+        ssn.config = configparser.ConfigParser()
+        ssn.config.read_dict({"multiprocess": {"result-transport": "carrier-pigeon"}})
+        with self.assertRaises(ValueError):
+            mp.MultiProcess(session=ssn)
+
+
+class TestAutoProcs(TestCase):
+    _RUN_IN_TEMP = True
+
+    def _write(self, path, content):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as fh:
+            fh.write(content)
+
+    def test_cgroup_v2_cpu_quota(self):
+        self._write("self_cgroup", "0::/ci/job\n")
+        self._write("cg/ci/job/cpu.max", "150000 100000\n")
+        self.assertEqual(mp._cgroupCpuLimit("cg", "self_cgroup"), 1.5)
+        self._write("cg/ci/job/cpu.max", "max 100000\n")
+        self.assertIsNone(mp._cgroupCpuLimit("cg", "self_cgroup"))
+
+    def test_cgroup_v2_mounted_at_root(self):
+        # inside a container the cgroup's own directory is the root
+        self._write("self_cgroup", "0::/docker/abc\n")
+        self._write("cg/cpu.max", "200000 100000\n")
+        self.assertEqual(mp._cgroupCpuLimit("cg", "self_cgroup"), 2.0)
+
+    def test_cgroup_v1_cpu_quota(self):
+        self._write("self_cgroup", "4:cpu,cpuacct:/job\n3:memory:/job\n")
+        self._write("cg/cpu,cpuacct/job/cpu.cfs_quota_us", "300000\n")
+        self._write("cg/cpu,cpuacct/job/cpu.cfs_period_us", "100000\n")
+        self.assertEqual(mp._cgroupCpuLimit("cg", "self_cgroup"), 3.0)
+        self._write("cg/cpu,cpuacct/job/cpu.cfs_quota_us", "-1\n")
+        self.assertIsNone(mp._cgroupCpuLimit("cg", "self_cgroup"))
+
+    def test_cgroup_memory_limit(self):
+        self._write("self_cgroup", "0::/\n")
+        self.assertIsNone(mp._cgroupMemoryLimit("cg", "self_cgroup"))
+        self._write("cg/memory.max", "max\n")
+        self.assertIsNone(mp._cgroupMemoryLimit("cg", "self_cgroup"))
+        self._write("cg/memory.max", "1073741824\n")
+        self.assertEqual(mp._cgroupMemoryLimit("cg", "self_cgroup"), 2**30)
+
+    def test_no_cgroup(self):
+        self.assertIsNone(mp._cgroupCpuLimit("cg", "missing"))
+
+    def test_auto_procs_capped_by_quota_and_memory(self):
+        with mock.patch.object(mp, "_allowedCpus", return_value=list(range(8))):
+            with mock.patch.object(mp, "_cgroupCpuLimit", return_value=2.5):
+                self.assertEqual(mp._autoProcs(), 3)
+            with mock.patch.object(mp, "_cgroupCpuLimit", return_value=None):
+                self.assertEqual(mp._autoProcs(), 8)
+                with mock.patch.object(mp, "_availableMemory", return_value=2**30):
+                    self.assertEqual(mp._autoProcs(256), 4)
+                    self.assertEqual(mp._autoProcs(4096), 1)
+
+    def test_system_load(self):
+        self._write("loadavg", "3.00 2.00 1.00 2/100 12345\n")
+        with mock.patch.object(mp, "_allowedCpus", return_value=[0, 1, 2, 3]):
+            with mock.patch.object(mp, "_cgroupCpuLimit", return_value=None):
+                self.assertEqual(mp._systemLoad("loadavg"), 0.75)
+            with mock.patch.object(mp, "_cgroupCpuLimit", return_value=2.0):
+                self.assertEqual(mp._systemLoad("loadavg"), 1.5)
+
+    def test_free_memory(self):
+        self._write("meminfo", "MemTotal: 4096 kB\nMemAvailable: 2048 kB\n")
+        self._write("self_cgroup", "0::/\n")
+        self.assertEqual(mp._freeMemory("meminfo", "cg", "self_cgroup"), 2 * 2**20)
+        # capped by what is left under the cgroup's limit
+        self._write("cg/memory.max", "%d\n" % 2**20)
+        self._write("cg/memory.current", "%d\n" % 2**19)
+        self.assertEqual(mp._freeMemory("meminfo", "cg", "self_cgroup"), 2**19)
+        self.assertIsNone(mp._freeMemory("missing", "cg", "missing"))
+
+    def test_cpu_sets(self):
+        self.assertEqual(mp._cpuSets([0, 1, 2, 3, 4], 2), [[0, 1, 2], [3, 4]])
+        self.assertEqual(mp._cpuSets([0, 1], 3), [[0], [1], [0]])
+
+    def test_pinning_disabled(self):
+        plugin = mp.MultiProcess(session=session.Session())
+        self.assertIsNone(plugin._pinning(2))
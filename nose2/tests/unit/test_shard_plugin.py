@@ -0,0 +1,108 @@
+import json
+import unittest
+from xml.etree import ElementTree as ET
+
+from nose2 import events, session, util
+from nose2.plugins import shard
+from nose2.tests._common import TestCase
+
+
+class Grouped(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    def test_a(self):
+        pass
+
+    def test_b(self):
+        pass
+
+
+class Single(unittest.TestCase):
+    def test_c(self):
+        pass
+
+    def test_d(self):
+        pass
+
+
+class TestShardPlugin(TestCase):
+    def setUp(self):
+        self.session = session.Session()
+        self.plugin = shard.Shard(session=self.session)
+
+    def _suite(self):
+        load = unittest.defaultTestLoader.loadTestsFromTestCase
+        return unittest.TestSuite([load(Grouped), load(Single)])
+
+    def _run(self, spec):
+        self.plugin.setShard([spec])
+        suite = self._suite()
+        event = events.StartTestRunEvent(None, suite, None, 0, None)
+        self.plugin.startTestRun(event)
+        return [util.test_name(test) for test in shard._iterTests(suite)]
+
+    def test_parse_shard(self):
+        self.assertEqual(shard.parseShard("2/4"), (2, 4))
+        for spec in ("0/4", "5/4", "2", "a/b"):
+            with self.assertRaises(ValueError):
+                shard.parseShard(spec)
+
+    def test_shards_keep_fixture_groups_together(self):
+        first = self._run("1/2")
+        second = self._run("2/2")
+        grouped = [f"{__name__}.Grouped.test_a", f"{__name__}.Grouped.test_b"]
+        self.assertEqual(first, grouped)
+        self.assertEqual(
+            second, [f"{__name__}.Single.test_c", f"{__name__}.Single.test_d"]
+        )
+        self.assertEqual((self.plugin.selected, self.plugin.loaded), (2, 4))
+
+    def test_partition_balances_cost(self):
+        units = {"a": ["a"], "b": ["b"], "c": ["c"], "d": ["d"]}
+        costs = {"a": 3.0, "b": 2.0, "c": 2.0, "d": 1.0}
+        shards = shard.partition(units, 2, lambda unit, tests: costs[unit])
+        self.assertEqual(shards, [["a", "d"], ["b", "c"]])
+
+    def test_partition_with_more_shards_than_units(self):
+        shards = shard.partition({"a": ["a"]}, 3, lambda unit, tests: 1)
+        self.assertEqual(shards, [["a"], [], []])
+
+
+class TestMerge(TestCase):
+    _RUN_IN_TEMP = True
+
+    def test_merge_junit_xml(self):
+        for name, tests, time in (("one.xml", 2, "1.5"), ("two.xml", 1, "2.5")):
+            root = ET.Element(
+                "testsuite",
+                errors="0",
+                failures="1",
+                skipped="0",
+                tests=str(tests),
+                time=time,
+            )
+            for index in range(tests):
+                ET.SubElement(root, "testcase", name=f"{name}:{index}")
+            ET.ElementTree(root).write(name)
+        self.assertEqual(
+            shard.main(["junit-xml", "merged.xml", "one.xml", "two.xml"]), 0
+        )
+        merged = ET.parse("merged.xml").getroot()
+        self.assertEqual(merged.get("tests"), "3")
+        self.assertEqual(merged.get("failures"), "2")
+        self.assertEqual(merged.get("time"), "2.500")
+        self.assertEqual(len(merged.findall("testcase")), 3)
+
+    def test_merge_durations(self):
+        for name, tests in (
+            ("one.json", {"a": [1.0, 10], "b": [2.0, 10]}),
+            ("two.json", {"a": [3.0, 20]}),
+        ):
+            with open(name, "w") as fh:
+                json.dump({"version": 1, "tests": tests, "groups": {}}, fh)
+        shard.main(["durations", "merged.json", "one.json", "two.json"])
+        with open("merged.json") as fh:
+            merged = json.load(fh)
+        self.assertEqual(merged["tests"], {"a": [3.0, 20], "b": [2.0, 10]})
@@ -0,0 +1,61 @@
+import asyncio
+import contextvars
+import sys
+import threading
+import unittest
+
+from nose2 import session
+from nose2.plugins import sharedloop
+from nose2.tests._common import TestCase
+
+
+class Opted(unittest.IsolatedAsyncioTestCase):
+    shared_loop = True
+
+    async def test_a(self):
+        pass
+
+
+class NotOpted(unittest.IsolatedAsyncioTestCase):
+    async def test_b(self):
+        pass
+
+
+class Sync(unittest.TestCase):
+    shared_loop = True
+
+    def test_c(self):
+        pass
+
+
+class TestSharedLoopPlugin(TestCase):
+    def setUp(self):
+        self.session = session.Session()
+        self.plugin = sharedloop.SharedLoop(session=self.session)
+
+    def test_units_take_opted_in_async_tests(self):
+        load = unittest.defaultTestLoader.loadTestsFromTestCase
+        suite = unittest.TestSuite([load(Opted), load(NotOpted), load(Sync)])
+        units = self.plugin._units(suite)
+        self.assertEqual(list(units), [f"{__name__}.Opted.test_a"])
+        self.assertEqual(suite.countTestCases(), 2)
+
+    @unittest.skipIf(sys.version_info < (3, 11), "needs Python 3.11")
+    def test_runner_runs_coroutines_on_loop_in_context(self):
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+        try:
+            var = contextvars.ContextVar("var")
+            context = contextvars.copy_context()
+            context.run(var.set, "test")
+            runner = sharedloop._SharedLoopRunner(loop)
+
+            async def check():
+                return asyncio.get_running_loop(), var.get()
+
+            self.assertEqual(runner.run(check(), context=context), (loop, "test"))
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
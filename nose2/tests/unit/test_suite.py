@@ -0,0 +1,68 @@
+import unittest
+
+from nose2 import events, loader, session
+from nose2.suite import StreamingSuite
+from nose2.tests._common import TestCase
+
+
+class TestStreamingSuite(TestCase):
+    tags = ["unit"]
+
+    def setUp(self):
+        self.log = []
+
+        class Test(unittest.TestCase):
+            def test(self_):
+                self.log.append(("ran", self_.name))
+
+        self.caseClass = Test
+
+    def _tests(self, *names):
+        for name in names:
+            self.log.append(("loaded", name))
+            test = self.caseClass("test")
+            test.name = name
+            yield unittest.TestSuite([test])
+
+    def test_tests_are_loaded_as_they_run(self):
+        suite = StreamingSuite(self._tests("a", "b"))
+        self.assertTrue(suite.loading)
+        self.assertEqual(self.log, [])
+        suite(unittest.TestResult())
+        self.assertEqual(
+            self.log,
+            [("loaded", "a"), ("ran", "a"), ("loaded", "b"), ("ran", "b")],
+        )
+        self.assertFalse(suite.loading)
+
+    def test_loaded_tests_are_kept(self):
+        suite = StreamingSuite(self._tests("a", "b"))
+        self.assertEqual(len(list(suite)), 2)
+        self.assertEqual(len(list(suite)), 2)
+        self.assertEqual(self.log, [("loaded", "a"), ("loaded", "b")])
+
+    def test_count_test_cases_loads_all_tests(self):
+        suite = StreamingSuite(self._tests("a", "b", "c"))
+        self.assertEqual(suite.countTestCases(), 3)
+        self.assertFalse(suite.loading)
+
+    def test_filters_apply_to_loaded_and_pending_tests(self):
+        suite = StreamingSuite(self._tests("a", "b", "c"))
+        next(iter(suite))
+        suite.addFilter(lambda test: next(iter(test)).name != "a")
+        suite.addFilter(lambda test: next(iter(test)).name != "c")
+        self.assertEqual([next(iter(test)).name for test in suite], ["b"])
+
+    def test_loader_does_not_load_streaming_suites(self):
+        ssn = session.Session()
+        suite = StreamingSuite(self._tests("a"))
+
+        class Discovery(events.Plugin):
+            def loadTestsFromNames(self, event):
+                event.handled = True
+                return suite
+
+        ssn.hooks.register("loadTestsFromNames", Discovery(session=ssn))
+        result = loader.PluggableTestLoader(ssn).loadTestsFromNames([])
+        self.assertIs(result, suite)
+        self.assertTrue(suite.loading)
@@ -0,0 +1,124 @@
+import threading
+import unittest
+from unittest import mock
+
+from nose2 import result, session
+from nose2.plugins import threads
+from nose2.tests._common import TestCase
+
+
+class Plain(unittest.TestCase):
+    def test_a(self):
+        pass
+
+    def test_b(self):
+        pass
+
+
+class WithFixtures(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    def test_c(self):
+        pass
+
+    def test_d(self):
+        pass
+
+
+class Unsafe(unittest.TestCase):
+    def test_e(self):
+        pass
+
+    setattr(test_e, "thread_safe", False)
+
+    def test_f(self):
+        pass
+
+
+class TestThreadsPlugin(TestCase):
+    def setUp(self):
+        self.session = session.Session()
+        self.plugin = threads.Threads(session=self.session)
+
+    def _names(self, units):
+        return [[test._testMethodName for test in unit] for unit in units]
+
+    def test_units(self):
+        load = unittest.defaultTestLoader.loadTestsFromTestCase
+        suite = unittest.TestSuite([load(Plain), load(WithFixtures), load(Unsafe)])
+        units, serial = self.plugin._units(suite)
+        self.assertEqual(
+            self._names(units),
+            [["test_a"], ["test_b"], ["test_c", "test_d"], ["test_f"]],
+        )
+        self.assertEqual(self._names(serial), [["test_e"]])
+
+    def test_thread_result_stops_test_run(self):
+        main = result.PluggableTestResult(self.session)
+        res = threads.ThreadResult(main, threading.RLock())
+        self.assertFalse(res.shouldStop)
+        res.shouldStop = True
+        self.assertTrue(main.shouldStop)
+
+    def test_units_starting_after_stop_do_not_restart_test_run(self):
+        main = result.PluggableTestResult(self.session)
+        lock = threading.RLock()
+        threads.ThreadResult(main, lock).stop()
+        res = threads.ThreadResult(main, lock)
+        self.assertTrue(main.shouldStop)
+        self.assertTrue(res.shouldStop)
+
+    def test_run_stops_while_other_units_start(self):
+        ran = []
+        starting, stopped = threading.Event(), threading.Event()
+        runUnit = self.plugin._runUnit
+
+        class SlowResult(threads.ThreadResult):
+            def __init__(self, main, lock):
+                if threading.current_thread().name == "slow":
+                    # the test run stops while this unit starts
+                    starting.set()
+                    stopped.wait(5)
+                super().__init__(main, lock)
+
+        def slowRunUnit(unit, result_, lock):
+            if "test_b" in str(unit):
+                threading.current_thread().name = "slow"
+            runUnit(unit, result_, lock)
+
+        class Test(unittest.TestCase):
+            def test_a(self):
+                starting.wait(5)
+                self._outcome.result.stop()
+                stopped.set()
+
+            def test_b(self):
+                ran.append("b")
+
+        suite = unittest.defaultTestLoader.loadTestsFromTestCase(Test)
+        main = result.PluggableTestResult(self.session)
+        self.plugin.threads = 2
+        with mock.patch.object(threads, "ThreadResult", SlowResult):
+            with mock.patch.object(self.plugin, "_runUnit", slowRunUnit):
+                self.plugin._run(suite, main)
+        self.assertTrue(main.shouldStop)
+        self.assertEqual(ran, [])
+
+    def test_run(self):
+        ran = []
+
+        class Test(unittest.TestCase):
+            def test_thread(self):
+                ran.append(threading.current_thread() is threading.main_thread())
+
+            def test_main(self):
+                ran.append(threading.current_thread() is threading.main_thread())
+
+            test_main.thread_safe = False
+
+        suite = unittest.defaultTestLoader.loadTestsFromTestCase(Test)
+        self.plugin.threads = 2
+        self.plugin._run(suite, result.PluggableTestResult(self.session))
+        self.assertEqual(sorted(ran), [False, True])
@@ -160,3 +160,23 @@ class HasModuleFixturesTests(TestCase):
             self.assertTrue(util.has_module_fixtures(C()))
         finally:
             del sys.modules[M.__name__]
+
+
+class FixtureGroupTests(TestCase):
+    def test_no_fixtures(self):
+        class C(unittest.TestCase):
+            def runTest(self):
+                pass
+
+        self.assertIsNone(util.fixture_group(C()))
+
+    def test_class_fixtures(self):
+        class C(unittest.TestCase):
+            @classmethod
+            def setUpClass(cls):
+                pass
+
+            def runTest(self):
+                pass
+
+        self.assertEqual(util.fixture_group(C()), f"{__name__}.C")
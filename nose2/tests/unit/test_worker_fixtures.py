@@ -0,0 +1,68 @@
+from unittest import mock
+
+from nose2.tests._common import TestCase
+from nose2.tools import fixtures
+
+
+class WorkerFixtureTests(TestCase):
+    def setUp(self):
+        self.events = []
+        self.addCleanup(fixtures.tearDown)
+
+    def fixture(self, name):
+        def make():
+            self.events.append(f"setup {name}")
+            yield name
+            self.events.append(f"teardown {name}")
+
+        make.__qualname__ = name
+        return fixtures.worker_fixture(make)
+
+    def test_set_up_once(self):
+        first = self.fixture("first")
+        self.assertEqual(first(), "first")
+        self.assertEqual(first(), "first")
+        self.assertEqual(self.events, ["setup first"])
+        self.assertIs(fixtures.registry[f"{__name__}.first"], first)
+        self.assertEqual(fixtures.get(f"{__name__}.first"), "first")
+
+    def test_torn_down_in_reverse_order(self):
+        first, second = self.fixture("first"), self.fixture("second")
+        first()
+        second()
+        fixtures.tearDown()
+        self.assertEqual(
+            self.events,
+            ["setup first", "setup second", "teardown second", "teardown first"],
+        )
+        self.assertFalse(first.active)
+        # set up again after the teardown
+        first()
+        self.assertEqual(self.events[-1], "setup first")
+
+    def test_plain_function(self):
+        fixture = fixtures.worker_fixture(lambda: 42)
+        self.assertEqual(fixture(), 42)
+        fixtures.tearDown()
+        self.assertIsNone(fixture.value)
+
+    def test_teardown_errors_are_logged(self):
+        def broken():
+            yield 1
+            raise RuntimeError("teardown")
+
+        fixture = fixtures.worker_fixture(broken)
+        fixture()
+        other = self.fixture("other")
+        other()
+        fixtures.tearDown()
+        self.assertFalse(fixture.active)
+        self.assertIn("teardown other", self.events)
+
+    def test_forked_process_sets_up_its_own(self):
+        fixture = self.fixture("forked")
+        fixture()
+        with mock.patch("os.getpid", return_value=-1):
+            self.assertFalse(fixture.active)
+            fixture()
+            self.assertEqual(self.events, ["setup forked", "setup forked"])
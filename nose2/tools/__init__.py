@@ -1,4 +1,12 @@
-from . import decorators, such
+from . import decorators, fixtures, such
+from .fixtures import worker_fixture
 from .params import cartesian_params, params
 
-__all__ = ["cartesian_params", "params", "such", "decorators"]
+__all__ = [
+    "cartesian_params",
+    "params",
+    "such",
+    "decorators",
+    "fixtures",
+    "worker_fixture",
+]
@@ -0,0 +1,145 @@
+"""
+This module provides fixtures that are set up once per test process.
+
+A worker fixture is a function that makes an expensive resource -- a
+database, a running server, a loaded model -- decorated with
+:func:`worker_fixture`. The first test to call it creates the resource,
+and later tests that call it get the same one back. With the
+:doc:`mp plugin <plugins/mp>`, each worker process creates its own
+resource, once. Without it, the resource is created once for the whole
+test run.
+
+If the function is a generator, it yields the resource and tears it down
+after the yield. Resources are torn down in the reverse of the order they
+were made, when the test run or the worker process ends.
+
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import logging
+import os
+import threading
+import typing as t
+
+__unittest = True
+
+log = logging.getLogger(__name__)
+
+# every worker fixture, by name, and those created in this process, in the
+# order they were created
+registry: dict[str, WorkerFixture] = {}
+_created: list[WorkerFixture] = []
+_lock = threading.RLock()
+
+
+class WorkerFixture:
+    """A resource created once per test process.
+
+    Call the fixture to get its resource, creating it first if this process
+    doesn't have it yet.
+
+    :param func: A function that returns the resource, or a generator
+                 function that yields it and then tears it down.
+    :param name: The name of the fixture in :data:`registry`.
+
+    """
+
+    def __init__(self, func, name) -> None:
+        self.func = func
+        self.name = name
+        self.value: t.Any = None
+        self._teardown: t.Iterator | None = None
+        # the process that created the resource: a process forked after
+        # the fixture was set up must not use or tear down the resource
+        self._pid: int | None = None
+        functools.update_wrapper(self, func)
+
+    @property
+    def active(self):
+        """Whether this process has set up the resource"""
+        return self._pid == os.getpid()
+
+    def __call__(self):
+        with _lock:
+            if not self.active:
+                self.setUp()
+            return self.value
+
+    def setUp(self):
+        log.debug("Setting up worker fixture %s", self.name)
+        if inspect.isgeneratorfunction(self.func):
+            gen = self.func()
+            self.value = next(gen)
+            self._teardown = gen
+        else:
+            self.value = self.func()
+            self._teardown = None
+        self._pid = os.getpid()
+        _created.append(self)
+
+    def tearDown(self):
+        if not self.active:
+            return
+        log.debug("Tearing down worker fixture %s", self.name)
+        gen, self._teardown = self._teardown, None
+        self.value = None
+        self._pid = None
+        if gen is not None:
+            try:
+                next(gen)
+            except StopIteration:
+                pass
+            else:
+                raise RuntimeError(f"Worker fixture {self.name} yielded twice")
+
+
+def worker_fixture(func):
+    """Make a function into a fixture that runs once per test process.
+
+    .. code-block :: python
+
+      import unittest
+
+      from nose2.tools import worker_fixture
+
+
+      @worker_fixture
+      def database():
+          db = create_template_database()
+          yield db
+          db.drop()
+
+
+      class TestQueries(unittest.TestCase):
+          def setUp(self):
+              self.db = database()
+
+    The fixture is registered in :data:`registry` under the qualified
+    name of the function.
+
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+    fixture = registry[name] = WorkerFixture(func, name)
+    return fixture
+
+
+def get(name):
+    """Get the resource of the worker fixture registered as ``name``"""
+    return registry[name]()
+
+
+def tearDown():
+    """Tear down the resources of all worker fixtures set up in this process.
+
+    Errors are logged, and don't keep other fixtures from being torn down.
+    """
+    with _lock:
+        while _created:
+            fixture = _created.pop()
+            try:
+                fixture.tearDown()
+            except Exception:
+                log.exception("Error tearing down worker fixture %s", fixture.name)
@@ -4,17 +4,21 @@
 # unittest2 is Copyright (c) 2001-2010 Python Software Foundation; All
 # Rights Reserved. See: http://docs.python.org/license.html
 
+import contextlib
 import inspect
 import logging
 import os
 import re
 import sys
+import threading
 import traceback
 import types
 
 __unittest = True
 IDENT_RE = re.compile(r"^[_a-zA-Z]\w*$", re.UNICODE)
 VALID_MODULE_RE = re.compile(r"[_a-zA-Z]\w*\.py$", re.UNICODE)
+# files that make a directory a package
+PACKAGE_INIT_FILES = ("__init__.py", "__init__.pyc", "__init__.pyo")
 
 
 def ln(label, char="-", width=70):
@@ -41,7 +45,7 @@ def valid_module_name(path):
     return VALID_MODULE_RE.search(path)
 
 
-def name_from_path(path):
+def name_from_path(path, packages=None):
     """Translate ``path`` into module name
 
     Returns a two-element tuple:
@@ -52,6 +56,9 @@ def name_from_path(path):
     2. a full path to filesystem directory, which must be on ``sys.path``
        for the import to succeed.
 
+    ``packages``, if given, is a dict of directories already known to be
+    packages or not. It is checked before the filesystem, and updated.
+
     """
     # back up to find module root
     parts = []
@@ -60,7 +67,13 @@ def name_from_path(path):
     candidate, top = os.path.split(base)
     parts.append(top)
     while candidate:
-        if ispackage(candidate):
+        if packages is None:
+            package = ispackage(candidate)
+        else:
+            package = packages.get(candidate)
+            if package is None:
+                package = packages[candidate] = ispackage(candidate)
+        if package:
             candidate, top = os.path.split(candidate)
             parts.append(top)
         else:
@@ -189,7 +202,7 @@ def ispackage(path):
         # and __init__.py[co] must exist
         end = os.path.basename(path)
         if IDENT_RE.match(end):
-            for init in ("__init__.py", "__init__.pyc", "__init__.pyo"):
+            for init in PACKAGE_INIT_FILES:
                 if os.path.isfile(os.path.join(path, init)):
                     return True
             if sys.platform.startswith("java") and os.path.isfile(
@@ -217,6 +230,30 @@ def has_module_fixtures(test):
     return hasattr(mod, "setUpModule") or hasattr(mod, "tearDownModule")
 
 
+def fixture_group(test):
+    """Name the module or class fixture group of this test, if it has one.
+
+    A test in a module with module fixtures belongs to that module's group,
+    named after the module. Otherwise a test in a class with class fixtures
+    belongs to that class's group, named ``module.Class``. Tests in the same
+    group have to run together, in the same process.
+
+    Returns ``None`` for tests without module or class fixtures.
+    """
+    if hasattr(test, "_fixtureGroup"):
+        # a stand-in for a test that was not loaded in this process
+        return test._fixtureGroup
+    if has_module_fixtures(test):
+        return test.__class__.__module__
+    if has_class_fixtures(test):
+        # testclasses support
+        cls = test.__class__
+        if cls.__name__ == "_MethodTestCase":
+            cls = test.obj.__class__
+        return f"{cls.__module__}.{cls.__name__}"
+    return None
+
+
 def has_class_fixtures(test):
     # test may be class or instance
     test_class = test if isinstance(test, type) else test.__class__
@@ -241,6 +278,29 @@ def has_class_fixtures(test):
     return has_class_setups or has_class_teardowns
 
 
+_testThreads = threading.local()
+
+
+def in_worker_thread():
+    """Is this code running tests side by side with other threads?
+
+    This is the case for tests run by the threads plugin, in the threads
+    of its pool. Other threads, like the one the mp plugin uses to stop
+    tests that time out, are treated like the main thread.
+    """
+    return getattr(_testThreads, "running", False)
+
+
+@contextlib.contextmanager
+def worker_thread():
+    """Mark the current thread as running tests side by side with others"""
+    _testThreads.running = True
+    try:
+        yield
+    finally:
+        _testThreads.running = False
+
+
 def safe_decode(string):
     """Safely decode a byte string into unicode"""
     if string is None: